@@ -0,0 +1,67 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Plans a table of synthetic names through a few sets of rename rules, the way
+# the preview and the copy do (Rename.loop), name by name and a column at a
+# time (Pipeline.plan), and checks that both plan the same names.
+#
+#   python -m benchmarks.bench_rules [number of names]
+
+import sys
+import time
+from typing import (
+    List,
+    Tuple
+)
+
+from loguru import logger
+
+import constants as c
+import utils
+from gui.structures import Registry
+from benchmarks.synthetic import synthetic_names
+
+RULES: List[Tuple[str, List[str]]] = [
+    ("year only", []),
+    ("prefix + regex + case", ["remove-prefix -i draft_", "replace '[\\s-]+' _", "case lower"]),
+    ("numbered template", ["replace '\\s+' _", "template {stem}_{year}_{n:05}"]),
+]
+
+
+def plan(registry: Registry, bulk: bool) -> Tuple[float, dict]:
+    c.RENAME_BULK_THRESHOLD = 0 if bulk else len(registry.files) + 1
+    utils.plan_name.cache_clear()
+    start: float = time.perf_counter()
+    utils.Rename(registry)
+    return time.perf_counter() - start, dict(registry.rename_mapping)
+
+
+def main(n: int = 100_000) -> None:
+    # Every plan and copy logs a [span] line, which would flood stderr
+    logger.disable("utils")
+    names: List[str] = synthetic_names(n, unique=True)
+    print(f"{n:,} names")
+    for label, lines in RULES:
+        registry: Registry = Registry(
+            selected_files={name: True for name in names},
+            selected_year="2025",
+            use_year=True,
+            rules=utils.parse_rules(lines)
+        )
+        per_name, expected = plan(registry, bulk=False)
+        bulk, planned = plan(registry, bulk=True)
+        print(
+            f"{label:<24}: name by name {per_name:6.3f}s  bulk {bulk:6.3f}s  "
+            f"speed up {per_name / bulk:5.2f}x  {'same' if planned == expected else 'DIFFERENT'}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,76 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Breaks down what importing the GUI (or the CLI) costs, module by module,
+# from `python -X importtime` in a fresh interpreter:
+#
+#   python -m benchmarks.bench_startup [--module gui.gui] [--repeat 5] [--top 15]
+#
+# The fastest run is kept. Inclusive is the module with everything it imported
+# first, self is the module on its own. The GUI logs the rest of its startup
+# (setup and the first frame) as a "startup" span.
+
+import os
+import sys
+import argparse
+import subprocess
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple
+)
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Break down the import time of the app.")
+    parser.add_argument("--module", default="gui.gui", help="what to import (default: gui.gui)")
+    parser.add_argument("--repeat", type=int, default=5, help="the fastest of this many runs is kept")
+    parser.add_argument("--top", type=int, default=15, help="modules to show")
+    return parser
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    # module -> (self, inclusive) in microseconds
+    stderr: str = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stderr
+    times: Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, inclusive, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(inclusive))
+    return times
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    best: Optional[Dict[str, Tuple[int, int]]] = None
+    for _ in range(max(1, args.repeat)):
+        times = import_times(args.module)
+        if best is None or times[args.module][1] < best[args.module][1]:
+            best = times
+
+    total: int = best[args.module][1]
+    print(f"import {args.module}: {total / 1000:.1f}ms (fastest of {args.repeat})")
+    print(f"{'inclusive':>10} {'self':>8}  module")
+    for name, (own, inclusive) in sorted(best.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f"{inclusive / 1000:8.1f}ms {own / 1000:6.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
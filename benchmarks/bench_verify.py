@@ -0,0 +1,85 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# The cost of verified copies over plain ones, and over hashing both files
+# again after a plain copy.
+#
+#   python -m benchmarks.bench_verify [number of files] [size in KiB]
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from typing import (
+    Callable,
+    Optional
+)
+
+from loguru import logger
+
+import utils
+from gui.structures import Registry
+
+
+def make_input(root: str, n: int, size: int) -> Registry:
+    input_folder: str = os.path.join(root, "input")
+    os.makedirs(input_folder)
+    for i in range(n):
+        with open(os.path.join(input_folder, f"report_{i}_2024.xlsx"), "wb") as f:
+            f.write(os.urandom(size))
+    return Registry(
+        input_folder_root=input_folder,
+        rename_mapping={f"report_{i}_2024.xlsx": f"report_{i}_2025.xlsx" for i in range(n)}
+    )
+
+
+def timed_run(
+    registry: Registry,
+    output_folder: str,
+    verify: Optional[str] = None,
+    after: Optional[Callable[[Registry], None]] = None
+) -> float:
+    shutil.rmtree(output_folder, ignore_errors=True)
+    os.makedirs(output_folder)
+    registry.output_folder_root = output_folder
+    start: float = time.perf_counter()
+    utils.apply_rename_to_registry(registry, verify=verify)
+    if after is not None:
+        after(registry)
+    return time.perf_counter() - start
+
+
+def hash_both(registry: Registry) -> None:
+    for from_name, to_name in registry.rename_mapping.items():
+        utils.checksum_file(os.path.join(registry.input_folder_root, from_name), "blake2b")
+        utils.checksum_file(os.path.join(registry.output_folder_root, to_name), "blake2b")
+
+
+def main(n: int = 200, size_kib: int = 1024) -> None:
+    # Every plan and copy logs a [span] line, which would flood stderr
+    logger.disable("utils")
+    with tempfile.TemporaryDirectory() as root:
+        registry: Registry = make_input(root, n, size_kib * 1024)
+        output_folder: str = os.path.join(root, "output")
+        total_mib: float = n * size_kib / 1024
+
+        plain: float = timed_run(registry, output_folder)
+        rehash: float = timed_run(registry, output_folder, after=hash_both)
+        print(f"{n:,} files of {size_kib:,} KiB ({total_mib:,.0f} MiB)")
+        print(f"plain copy         : {plain:6.2f}s  {total_mib / plain:8,.0f} MiB/s")
+        print(f"copy, then rehash  : {rehash:6.2f}s  {rehash / plain:5.2f}x")
+        for algorithm in utils.CHECKSUM_ALGORITHMS:
+            verified: float = timed_run(registry, output_folder, verify=algorithm)
+            print(f"verified ({algorithm:<7}): {verified:6.2f}s  {verified / plain:5.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,79 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Compares Rename.rename_year against the findall/replace version it replaced.
+#
+#   python -m benchmarks.bench_year [number of names]
+
+import re
+import sys
+import time
+import pathlib
+from typing import (
+    Callable,
+    List
+)
+
+from loguru import logger
+
+import utils
+from gui.structures import Registry
+from benchmarks.synthetic import synthetic_names
+
+
+def legacy_add_suffix(path: str, suffix: str) -> str:
+    path = pathlib.Path(path)
+    return path.stem + suffix + path.suffix
+
+
+def legacy_rename_year(renamer: utils.Rename, name: str) -> str:
+    search: str = re.findall(r"\d{4}", name)
+    if len(search) == 1:
+        proposed_year = int(search[0])
+        if renamer.year_lower <= proposed_year <= renamer.year_upper:
+            return name.replace(str(proposed_year), renamer.registry.selected_year)
+    elif len(search) > 1:
+        search = [int(i) for i in search if renamer.year_lower <= int(i) <= renamer.year_upper]
+        for year in search:
+            name = name.replace(str(year), "")
+    return legacy_add_suffix(name, f" ({renamer.registry.selected_year})")
+
+
+def timeit(func: Callable, renamer: utils.Rename, names: List[str]) -> float:
+    start: float = time.perf_counter()
+    for name in names:
+        func(renamer, name)
+    return time.perf_counter() - start
+
+
+def main(n: int = 1_000_000) -> None:
+    # Every plan and copy logs a [span] line, which would flood stderr
+    logger.disable("utils")
+    names: List[str] = synthetic_names(n)
+    renamer = utils.Rename(Registry(selected_year="2025"), plan=False)
+
+    legacy: float = timeit(legacy_rename_year, renamer, names)
+    current: float = timeit(utils.Rename.rename_year, renamer, names)
+
+    mismatches: int = sum(
+        legacy_rename_year(renamer, name) != renamer.rename_year(name)
+        for name in names
+    )
+
+    print(f"{n:,} names")
+    print(f"legacy   : {legacy:6.2f}s  {n / legacy:12,.0f} names/s")
+    print(f"current  : {current:6.2f}s  {n / current:12,.0f} names/s")
+    print(f"speed up : {legacy / current:6.2f}x")
+    # Only names where the same year also shows up outside its own token differ
+    print(f"different: {mismatches:,}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
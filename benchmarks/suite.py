@@ -0,0 +1,216 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Times every stage of a rollover on synthetic folders and writes the results
+# as JSON, so runs from different commits can be compared.
+#
+#   python -m benchmarks.suite --files 1000 10000 100000 --output before.json
+#
+# Stages, each on a folder of N files:
+#
+#   listing         utils.list_files on a folder it hasn't seen
+#   refresh         InputFolder.refresh with the preview on, headless
+#   plan            Rename over every selected file, nothing memoized yet
+#   conflicts       the same again, now only the conflict check isn't memoized
+#   copy            apply_rename_to_registry into an empty folder
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional
+)
+
+from loguru import logger
+
+import utils
+from utils import rename
+from gui.structures import Registry
+from benchmarks.synthetic import make_folder
+
+# Share of the planned names already in the output folder
+CONFLICT_RATIO: float = 0.1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark a rollover on synthetic folders.")
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--min-size", type=int, default=0, help="smallest file, in bytes")
+    parser.add_argument("--max-size", type=int, default=4096, help="biggest file, in bytes")
+    parser.add_argument("--repeat", type=int, default=3, help="the fastest of this many runs is kept")
+    parser.add_argument("--no-copy", action="store_true", help="skip the copy stage")
+    parser.add_argument("--no-gui", action="store_true", help="skip the stages that need dearpygui")
+    parser.add_argument("--root", default=None, help="folder to generate in (default: a temp folder)")
+    parser.add_argument("--output", default=None, help="write the JSON here instead of stdout")
+    return parser
+
+
+def best_of(repeat: int, func: Callable[[], None], setup: Optional[Callable[[], None]] = None) -> float:
+    times: List[float] = []
+    for _ in range(max(1, repeat)):
+        if setup is not None:
+            setup()
+        start: float = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def new_registry(input_folder: str, output_folder: str, names: List[str]) -> Registry:
+    return Registry(
+        input_folder_root=input_folder,
+        output_folder_root=output_folder,
+        selected_files={name: utils.is_excel(name) for name in names},
+        use_year=True,
+        selected_year="2025"
+    )
+
+
+def headless_refresh(registry: Registry) -> Callable[[], None]:
+    # The components only touch widgets that exist, so without a layout
+    # refresh does the listing and planning work and nothing else
+    import gui.components as comp
+
+    def refresh() -> None:
+        utils.invalidate(registry.input_folder_root)
+        registry.use_preview = True
+        input_folder = comp.InputFolder(refresh_callback=lambda *args: None, registry=registry)
+        input_folder.refresh()
+        input_folder.wait_for_scan()
+        input_folder.file_list.render()
+
+    return refresh
+
+
+def bench_size(root: str, n: int, args: argparse.Namespace) -> List[Dict]:
+    input_folder: str = os.path.join(root, f"input_{n}")
+    output_folder: str = os.path.join(root, f"output_{n}")
+    names: List[str] = make_folder(input_folder, n, (args.min_size, args.max_size))
+    registry: Registry = new_registry(input_folder, output_folder, names)
+
+    # Put some of the planned names in the way
+    os.makedirs(output_folder, exist_ok=True)
+    planned: List[str] = [name for name in map(utils.Rename(registry, plan=False).plan_name, names) if name]
+    for name in planned[:int(len(planned) * CONFLICT_RATIO)]:
+        open(os.path.join(output_folder, name), "wb").close()
+    utils.invalidate(output_folder)
+
+    timings: Dict[str, float] = {}
+    timings["listing"] = best_of(
+        args.repeat,
+        lambda: utils.list_files(input_folder),
+        setup=lambda: utils.invalidate(input_folder)
+    )
+    if not args.no_gui:
+        timings["refresh"] = best_of(args.repeat, headless_refresh(registry))
+    timings["plan"] = best_of(
+        args.repeat,
+        lambda: utils.Rename(registry),
+        setup=lambda: (rename.plan_name.cache_clear(), utils.invalidate(output_folder))
+    )
+    timings["conflicts"] = best_of(
+        args.repeat,
+        lambda: utils.Rename(registry),
+        setup=lambda: utils.invalidate(output_folder)
+    )
+    renamer = utils.Rename(registry)
+    if not args.no_copy:
+        copy_folder: str = os.path.join(root, f"copy_{n}")
+        copy_registry: Registry = new_registry(input_folder, copy_folder, names)
+        copy_registry.files = registry.files.copy()
+
+        def empty_copy_folder() -> None:
+            shutil.rmtree(copy_folder, ignore_errors=True)
+            os.makedirs(copy_folder)
+
+        timings["copy"] = best_of(
+            1,
+            lambda: utils.apply_rename_to_registry(copy_registry),
+            setup=empty_copy_folder
+        )
+        shutil.rmtree(copy_folder, ignore_errors=True)
+
+    planned_count: int = sum(1 for _ in registry.files.planned())
+    return [
+        {
+            "stage": stage,
+            "files": n,
+            "selected": sum(1 for _ in registry.files.selected()),
+            "planned": planned_count,
+            "conflicts": len(renamer.conflicts),
+            "seconds": seconds,
+            # The copy stage only copies the planned files
+            "files_per_second": (planned_count if stage == "copy" else n) / seconds if seconds else None,
+        }
+        for stage, seconds in timings.items()
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    # Every plan and copy logs a [span] line, which would flood stderr
+    logger.disable("utils")
+    args = build_parser().parse_args(argv)
+    results: List[Dict] = []
+    if not args.no_gui:
+        import dearpygui.dearpygui as dpg
+        dpg.create_context()
+    with tempfile.TemporaryDirectory(dir=args.root) as root:
+        for n in args.files:
+            results += bench_size(root, n, args)
+            print(f"{n:,} files done", file=sys.stderr)
+    if not args.no_gui:
+        dpg.destroy_context()
+
+    report: dict = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "min_size": args.min_size,
+            "max_size": args.max_size,
+            "repeat": args.repeat,
+            "conflict_ratio": CONFLICT_RATIO,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Synthetic rollover folders for the benchmarks: year bearing names like the
+# ones people actually keep, mostly workbooks with some other documents.
+#
+#   python -m benchmarks.synthetic <folder> [number of files] [min KiB] [max KiB]
+
+import os
+import sys
+import random
+from typing import (
+    List,
+    Tuple
+)
+
+STEMS: Tuple[str, ...] = ("budget", "report", "important_work", "Q4 forecast", "payroll")
+PATTERNS: Tuple[str, ...] = (
+    "{stem}_{year}",
+    "{stem}{year}",
+    "{stem}_{year}_{year2}",
+    "{stem} {n}",
+    "{stem}",
+    "{year} {stem} v{n}",
+)
+EXTENSIONS: Tuple[str, ...] = (".xlsx", ".xlsx", ".docx", ".pdf")
+
+
+def synthetic_names(n: int, seed: int = 2025, unique: bool = False) -> List[str]:
+    rng = random.Random(seed)
+    names: List[str] = []
+    seen: set = set()
+    while len(names) < n:
+        name: str = rng.choice(PATTERNS).format(
+            stem=rng.choice(STEMS),
+            year=rng.randint(1995, 2035),
+            year2=rng.randint(1995, 2035),
+            n=rng.randint(1, 99999)
+        )
+        name += rng.choice(EXTENSIONS)
+        if unique:
+            # Folders can't hold the same name twice
+            if name.lower() in seen:
+                continue
+            seen.add(name.lower())
+        names.append(name)
+    return names
+
+
+def make_folder(
+    path: str,
+    n: int,
+    size_range: Tuple[int, int] = (0, 0),
+    seed: int = 2025
+) -> List[str]:
+    # Sizes are in bytes, every file gets a random size in the range
+    os.makedirs(path, exist_ok=True)
+    rng = random.Random(seed)
+    names: List[str] = synthetic_names(n, seed=seed, unique=True)
+    low, high = size_range
+    block: bytes = os.urandom(high) if high else b""
+    for name in names:
+        with open(os.path.join(path, name), "wb") as f:
+            f.write(block[:rng.randint(low, high)])
+    return names
+
+
+if __name__ == "__main__":
+    args: List[str] = sys.argv[1:]
+    make_folder(
+        args[0],
+        int(args[1]) if len(args) > 1 else 1000,
+        (
+            int(args[2]) * 1024 if len(args) > 2 else 0,
+            int(args[3]) * 1024 if len(args) > 3 else 0
+        )
+    )
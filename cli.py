@@ -0,0 +1,426 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Headless rollovers for scripts and scheduled jobs. Nothing in here may import
+# dearpygui, directly or through `gui`.
+#
+#   python cli.py "2024 (input)" "2025 (output)" --year 2025 --dry-run --json
+#   python cli.py --resume ~/.local/state/Rollover!/journals/rollover_....jsonl
+#   python cli.py --jobs rollover_2025.json --io-limit 32
+
+import os
+import sys
+import json
+import argparse
+import dataclasses
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+from loguru import logger
+
+from gui.structures import Registry
+import constants as c
+import utils
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="rollover",
+        description="Copy a folder of files into a new folder, renaming the year and/or adding a suffix."
+    )
+    parser.add_argument("input", nargs="?", help="folder to copy the files from")
+    parser.add_argument("output", nargs="?", help="folder to copy the renamed files into")
+    parser.add_argument(
+        "--year",
+        type=year,
+        default=str(utils.get_current_year()),
+        help="year to replace with (default: this year)"
+    )
+    parser.add_argument(
+        "--no-year",
+        action="store_true",
+        help="don't replace the year"
+    )
+    parser.add_argument(
+        "--suffix",
+        default=None,
+        help="suffix to add to every file name"
+    )
+    parser.add_argument(
+        "--rule",
+        action="append",
+        type=rule,
+        default=[],
+        dest="rules",
+        metavar="RULE",
+        help="rename rule, run before the year and the suffix, can be repeated "
+             "(e.g. \"remove-prefix DRAFT_\", \"template {stem}_{n:03}\", see utils/rules.py)"
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="only rename files matching this glob, can be repeated (default: *.xlsx)"
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="skip files matching this glob, can be repeated"
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="also roll over the subfolders, renaming the folders too"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of files to copy at once"
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=utils.STRATEGIES,
+        default=None,
+        help="how to copy: auto picks the fastest way per file, hardlink links instead of copying where it can"
+    )
+    parser.add_argument(
+        "--dedup",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="STORE",
+        help="link files to a shared store of contents instead of copying them "
+             "(default store: .rollover_store next to the output folder)"
+    )
+    parser.add_argument(
+        "--verify",
+        nargs="?",
+        const=c.VERIFY_ALGORITHM,
+        default=None,
+        choices=utils.CHECKSUM_ALGORITHMS,
+        help=f"checksum every file while it's copied and write the checksums to a manifest "
+             f"in the output folder (default: {c.VERIFY_ALGORITHM})"
+    )
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="don't keep a journal of the copy to resume it after a crash"
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="JOURNAL",
+        help="finish the copy of an interrupted run from its journal, instead of starting a new one"
+    )
+    parser.add_argument(
+        "--jobs",
+        default=None,
+        metavar="FILE",
+        help="run every rollover in a JSON jobs file, instead of one input and output folder (see utils/jobs.py)"
+    )
+    parser.add_argument(
+        "--parallel-jobs",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"with --jobs, how many jobs run at once (default: {c.BATCH_JOBS})"
+    )
+    parser.add_argument(
+        "--io-limit",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"with --jobs, how many files are copied at once over all the jobs (default: {c.BATCH_IO_LIMIT})"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only show what would be copied"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print the result as JSON"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="log the timing of every stage (listing, planning, each copy) to stderr"
+    )
+    return parser
+
+
+def year(value: str) -> str:
+    if not utils.is_year(value):
+        raise argparse.ArgumentTypeError(f"{value!r} isn't a four digit year")
+    return value
+
+
+def rule(line: str) -> utils.Rule:
+    try:
+        return utils.parse_rule(line)
+    except utils.RuleError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def select_files(
+    files: Sequence[str],
+    include: Sequence[str],
+    exclude: Sequence[str]
+) -> Dict[str, bool]:
+    return {file: utils.is_selected(file, include, exclude) for file in files}
+
+
+def build_registry(args: argparse.Namespace) -> Registry:
+    files = utils.list_files(args.input).files
+    return Registry(
+        input_folder_root=args.input,
+        output_folder_root=args.output,
+        selected_files=select_files(files, args.include, args.exclude),
+        use_year=not args.no_year,
+        use_suffix=args.suffix is not None,
+        selected_year=args.year,
+        selected_suffix=args.suffix or "",
+        rules=tuple(args.rules),
+        recursive=args.recursive
+    )
+
+
+def print_report(report: dict) -> None:
+    for from_name, to_name in report["conflicts"].items():
+        print(f"skipped  {from_name} >> {to_name} (name already taken)")
+    if report["dry_run"]:
+        for from_name, to_name in report["planned"].items():
+            print(f"planned  {from_name} >> {to_name}")
+        print(f"{len(report['planned'])} file(s) would be copied")
+        return
+    for result in report["results"]:
+        line: str = f"{result['status']:<8} {result['from_name']} >> {result['to_name']}"
+        if result["strategy"]:
+            line += f" [{result['strategy']}]"
+        if result["error"]:
+            line += f" ({result['error']})"
+        print(line)
+    print(f"{report['copied']} file(s) copied, {report['failed']} failed")
+    if report["manifest"]:
+        print(f"checksums written to {report['manifest']}")
+    if report["manifest_error"]:
+        print(f"failed to write the checksums: {report['manifest_error']}")
+
+
+def open_dedup_store(registry: Registry, args: argparse.Namespace) -> Optional[utils.DedupStore]:
+    if args.dedup is None:
+        return None
+    return utils.DedupStore(args.dedup or utils.default_store(registry.output_folder_root))
+
+
+def open_journal(
+    registry: Registry,
+    args: argparse.Namespace,
+    dedup: Optional[utils.DedupStore]
+) -> Optional[utils.Journal]:
+    if args.no_journal:
+        return None
+    return utils.Journal.create(
+        registry.input_folder_root,
+        registry.output_folder_root,
+        strategy=args.strategy,
+        dedup=dedup.root if dedup is not None else None,
+        verify=args.verify
+    )
+
+
+def new_report(registry: Registry, args: argparse.Namespace) -> dict:
+    return {
+        "input": registry.input_folder_root,
+        "output": registry.output_folder_root,
+        "dry_run": args.dry_run,
+        "planned": {},
+        "conflicts": {},
+        "results": [],
+        "copied": 0,
+        "failed": 0,
+        "manifest": None,
+        "manifest_error": None,
+    }
+
+
+def run_engine(report: dict, engine: utils.CopyEngine) -> None:
+    engine.run()
+    report["results"] = [dataclasses.asdict(result) for result in engine.report]
+    report["copied"] = engine.copied
+    report["failed"] = engine.failed
+    report["manifest"] = engine.manifest
+    report["manifest_error"] = engine.manifest_error
+
+
+def new_engine(
+    registry: Registry,
+    args: argparse.Namespace,
+    pairs: Optional[Iterable[Tuple[str, str]]] = None
+) -> utils.CopyEngine:
+    dedup: Optional[utils.DedupStore] = open_dedup_store(registry, args)
+    return utils.CopyEngine(
+        registry,
+        workers=args.workers,
+        pairs=pairs,
+        strategy=args.strategy,
+        dedup=dedup,
+        journal=open_journal(registry, args, dedup),
+        verify=args.verify
+    )
+
+
+def run_flat(registry: Registry, args: argparse.Namespace) -> dict:
+    renamer = utils.Rename(registry=registry)
+    report: dict = new_report(registry, args)
+    report["planned"] = {file.name: file.proposed for file in registry.files.planned()}
+    report["conflicts"] = renamer.conflicts
+
+    if not args.dry_run:
+        run_engine(report, new_engine(registry, args))
+    return report
+
+
+def run_tree(registry: Registry, args: argparse.Namespace) -> dict:
+    # Copies start while the tree is still being walked. Only the failures
+    # are reported per file, a big tree would otherwise make a huge report.
+    renamer = utils.Rename(registry=registry, plan=False)
+    pairs = renamer.plan_tree(lambda path: utils.is_selected(path, args.include, args.exclude))
+    report: dict = new_report(registry, args)
+
+    if args.dry_run:
+        report["planned"] = dict(pairs)
+    else:
+        run_engine(report, new_engine(registry, args, pairs=pairs))
+    report["conflicts"] = renamer.conflicts
+    return report
+
+
+def run_resume(args: argparse.Namespace) -> dict:
+    # Only the files the journal never saw land in the output folder are
+    # copied again, the new run appends to the same journal
+    header, pending = utils.read_journal(args.resume)
+    registry = Registry(
+        input_folder_root=header["input"],
+        output_folder_root=header["output"],
+        rename_mapping=pending
+    )
+    report: dict = new_report(registry, args)
+    report["planned"] = pending
+
+    if not args.dry_run:
+        run_engine(report, utils.CopyEngine(
+            registry,
+            workers=args.workers,
+            strategy=args.strategy or header.get("strategy"),
+            dedup=utils.DedupStore(header["dedup"]) if header.get("dedup") else None,
+            journal=utils.Journal(args.resume),
+            verify=args.verify or header.get("verify")
+        ))
+    return report
+
+
+def run_jobs(jobs: List[utils.Job], args: argparse.Namespace) -> int:
+    batch = utils.BatchRun(
+        jobs,
+        parallel_jobs=args.parallel_jobs,
+        io_limit=args.io_limit,
+        workers=args.workers,
+        strategy=args.strategy,
+        verify=args.verify,
+        journal=not args.no_journal,
+        dry_run=args.dry_run
+    )
+    batch.run()
+    reports: List[dict] = batch.report()
+    if args.json:
+        json.dump({"dry_run": args.dry_run, "jobs": reports}, sys.stdout, indent=2)
+        print()
+    else:
+        for report in reports:
+            line: str = f"{report['state']:<9} {report['input']} >> {report['output']}: "
+            if args.dry_run:
+                line += f"{report['planned']} file(s) would be copied"
+            else:
+                line += f"{report['copied']} of {report['planned']} file(s) copied"
+            if report["conflicts"]:
+                line += f", {report['conflicts']} skipped (name already taken)"
+            if report["error"]:
+                line += f" ({report['error']})"
+            print(line)
+        print(f"{len(reports) - batch.failed} of {len(reports)} job(s) finished")
+    return 1 if batch.failed else 0
+
+
+def print_result(report: dict, args: argparse.Namespace) -> int:
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
+    return 1 if report["failed"] or report["manifest_error"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.verbose:
+        logger.enable("utils")
+    else:
+        logger.disable("utils")
+
+    if args.resume is not None:
+        try:
+            return print_result(run_resume(args), args)
+        except (OSError, KeyError) as e:
+            parser.error(f"can't resume from {args.resume}: {e}")
+    if args.jobs is not None:
+        try:
+            jobs: List[utils.Job] = utils.read_jobs(args.jobs)
+        except (OSError, utils.JobError) as e:
+            parser.error(f"can't read the jobs from {args.jobs}: {e}")
+        return run_jobs(jobs, args)
+    if args.input is None or args.output is None:
+        parser.error("the input and output folders are required")
+
+    try:
+        registry: Registry = build_registry(args)
+    except OSError as e:
+        parser.error(f"can't read the input folder: {e}")
+
+    if not registry.use_year and not registry.use_suffix and not registry.rules:
+        parser.error("nothing to do, pass --suffix or --rule or leave the year replacement on")
+    if not args.dry_run:
+        # Made up front, not once per file by the copies
+        try:
+            os.makedirs(registry.output_folder_root, exist_ok=True)
+        except OSError as e:
+            parser.error(f"can't create the output folder: {e}")
+
+    if registry.recursive:
+        report: dict = run_tree(registry, args)
+    else:
+        report = run_flat(registry, args)
+    return print_result(report, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,9 @@
 
 import os
 import tempfile
+from typing import (
+    Optional
+)
 
 # =========== // DEAR PY GUI SPECIFIC // ===========
 
@@ -24,6 +27,23 @@ MIN_WINDOW_WIDTH: int = BOX_WIDTH * 2 + 100
 
 SPACER_HEIGHT: int = 8
 
+REFRESH_DEBOUNCE_SECONDS: float = 0.15
+
+FILE_LIST_ROWS: int = 10
+FILE_LIST_WHEEL_ROWS: int = 3
+
+RULES_INPUT_HEIGHT: int = 60
+
+STATS_REFRESH_SECONDS: float = 0.5
+
+# Files per batch that a background folder scan hands to the file list
+SCAN_BATCH_SIZE: int = 500
+
+# "auto" uses inotify on Linux and polls everywhere else, "polling" always polls
+WATCH_BACKEND: str = "auto"
+WATCH_BATCH_SECONDS: float = 0.2
+WATCH_POLL_SECONDS: float = 2.0
+
 START_MAXIMIZED: bool = False
 
 DEFAULT_FILE_DIALOG_SETTINGS: dict = {
@@ -33,7 +53,63 @@ DEFAULT_FILE_DIALOG_SETTINGS: dict = {
     "height": 400
 }
 
+# =========== // RENAME // ===========
+
+# FAT and SMB only keep folder timestamps to within a couple of seconds
+LISTING_RACY_SECONDS: float = 2.0
+
+RENAME_CACHE_SIZE: int = 2 ** 17
+# Plans with at least this many files are worked out a column at a time
+# instead of name by name, see Pipeline.plan in utils/rules.py
+RENAME_BULK_THRESHOLD: int = 5000
+
+# =========== // COPY ENGINE // ===========
+
+COPY_QUEUE_SIZE: int = 64
+COPY_WORKERS: int = 8
+COPY_BUFFER_SIZE: int = 1024 * 1024
+# "auto" picks the fastest way to copy each file, "hardlink" links files that
+# are on the same drive instead of copying them, "buffered" always copies
+COPY_STRATEGY: str = "auto"
+# Copies are written under a short temporary name next to the destination
+# (".rollover-<pid>-<n>.partial") and renamed into place once complete
+COPY_PARTIAL_PREFIX: str = ".rollover-"
+COPY_PARTIAL_SUFFIX: str = ".partial"
+# "blake2b", or "xxh128" when the xxhash package is installed
+VERIFY_ALGORITHM: str = "blake2b"
+
+# =========== // BATCH JOBS // ===========
+
+# How many jobs of a jobs file are planned and copied at the same time
+BATCH_JOBS: int = 4
+# How many files are copied at once over all the jobs
+BATCH_IO_LIMIT: int = 16
+
+# =========== // DEDUPLICATION // ===========
+
+DEDUP_STORE_NAME: str = ".rollover_store"
+DEDUP_HASH_PROCESSES: Optional[int] = None  # None is one per core
+DEDUP_POOL_THRESHOLD: int = 32
+
+# =========== // JOURNAL // ===========
+
+# Not in the temp folder, it has to survive the reboot after a crash
+JOURNAL_DIRECTORY: str = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "state"),
+    APP_NAME,
+    "journals"
+)
+
+# =========== // PROFILING // ===========
+
+PROFILE_ENVIRONMENT_VARIABLE: str = "ROLLOVER_PROFILE"
+PROFILE_TOP_ALLOCATIONS: int = 25
+PROFILE_TOP_FUNCTIONS: int = 40
+
 # =========== // LOGGER DIRECTORY // ===========
 
+# Created when the first record is written, see utils/log.py
 LOG_DIRECTORY: str = os.path.join(tempfile.gettempdir(), APP_NAME, "logs")
-os.makedirs(LOG_DIRECTORY, exist_ok=True)
+
+# How many names a log line lists before it only counts the rest
+LOG_SAMPLE_SIZE: int = 5
@@ -1 +1,9 @@
-from gui.gui import GUI
+# The GUI pulls in dearpygui, so only import it when someone asks for it. That
+# keeps `gui.structures` usable from the headless CLI.
+
+
+def __getattr__(name: str):
+    if name == "GUI":
+        from gui.gui import GUI
+        return GUI
+    raise AttributeError(f"module 'gui' has no attribute {name!r}")
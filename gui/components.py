@@ -9,10 +9,14 @@
 # ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
 
 
-import pathlib
+import time
 from typing import (
     Callable,
+    FrozenSet,
+    List,
     Optional,
+    Sequence,
+    Tuple,
     TYPE_CHECKING
 )
 
@@ -26,8 +30,6 @@ import utils
 if TYPE_CHECKING:
     from gui.gui import Registry
 
-logger.add(**utils.log_args("gui"))
-
 
 class FileDialog:
     def __init__(
@@ -93,6 +95,25 @@ class FileSettingsInput:
             self.registry.selected_year = dpg.get_value("year_input")
         if dpg.does_item_exist("suffix_input"):
             self.registry.selected_suffix = dpg.get_value("suffix_input")
+        if dpg.does_item_exist("rules_input"):
+            self.read_rules(dpg.get_value("rules_input"))
+        self.registry.recursive = dpg.get_value("recursive_checkbox") if (
+            dpg.does_item_exist("recursive_checkbox")
+        ) else False
+        self.registry.verify = dpg.get_value("verify_checkbox") if (
+            dpg.does_item_exist("verify_checkbox")
+        ) else False
+
+    def read_rules(self, text: str) -> None:
+        # While the rules don't parse, the last ones that did stay in use
+        try:
+            self.registry.rules = utils.parse_rules(text.splitlines())
+        except utils.RuleError as e:
+            message: str = str(e)
+        else:
+            message = ""
+        if dpg.does_item_exist("rules_error"):
+            dpg.set_value("rules_error", message)
 
     def reset(self) -> None:
         if dpg.does_item_exist("use_year_checkbox"):
@@ -103,6 +124,13 @@ class FileSettingsInput:
             dpg.set_value("year_input", str(utils.get_current_year()))
         if dpg.does_item_exist("suffix_input"):
             dpg.set_value("suffix_input", "")
+        if dpg.does_item_exist("rules_input"):
+            dpg.set_value("rules_input", "")
+            self.read_rules("")
+        if dpg.does_item_exist("recursive_checkbox"):
+            dpg.set_value("recursive_checkbox", False)
+        if dpg.does_item_exist("verify_checkbox"):
+            dpg.set_value("verify_checkbox", False)
 
     def layout(self) -> None:
         with dpg.group(horizontal=True):
@@ -131,99 +159,317 @@ class FileSettingsInput:
                 width=c.BOX_WIDTH * 0.5,
                 callback=self.refresh_callback
             )
+        dpg.add_text("Rename rules, one per line (run before the year and the suffix)")
+        dpg.add_input_text(
+            tag="rules_input",
+            multiline=True,
+            width=c.BOX_WIDTH,
+            height=c.RULES_INPUT_HEIGHT,
+            hint="remove-prefix DRAFT_",
+            callback=self.refresh_callback
+        )
+        dpg.add_text("", tag="rules_error", color=s.Colors.red, wrap=c.BOX_WIDTH)
+        with dpg.group(horizontal=True):
+            dpg.add_checkbox(
+                id="recursive_checkbox",
+                callback=self.refresh_callback,
+                default_value=False
+            )
+            dpg.add_text("Include subfolders (Excel files in subfolders are copied too)")
+        with dpg.group(horizontal=True):
+            dpg.add_checkbox(
+                id="verify_checkbox",
+                callback=self.refresh_callback,
+                default_value=False
+            )
+            dpg.add_text(f"Verify copies (writes {utils.CHECKSUM_MANIFESTS[c.VERIFY_ALGORITHM]} to the output folder)")
+
+
+class FileList:
+    # Only c.FILE_LIST_ROWS rows of widgets ever exist. Scrolling and refreshing
+    # re-point those rows at a different window of `files` instead of creating
+    # one checkbox per file.
+    def __init__(
+        self,
+        registry: 'Registry',
+        on_file_selected: Callable,
+        preview_name: Callable[[str], str]
+    ) -> None:
+        self.registry: 'Registry' = registry
+        self.on_file_selected: Callable = on_file_selected
+        self.preview_name: Callable[[str], str] = preview_name
+        self.files: Sequence[str] = ()
+        self.offset: int = 0
+
+    @property
+    def max_offset(self) -> int:
+        return max(0, len(self.files) - c.FILE_LIST_ROWS)
+
+    def set_files(self, files: Sequence[str]) -> None:
+        self.files = files
+        self.scroll_to(self.offset)
+
+    def scroll_to(self, offset: int) -> None:
+        self.offset = min(max(0, offset), self.max_offset)
+        self.render()
+
+    def on_mouse_wheel(self, sender, app_data) -> None:
+        if dpg.does_item_exist("files_checkbox_group") and dpg.is_item_hovered("files_checkbox_group"):
+            self.scroll_to(self.offset - int(app_data) * c.FILE_LIST_WHEEL_ROWS)
+
+    def on_scrollbar(self, sender, app_data) -> None:
+        self.scroll_to(int(app_data))
+
+    def render(self) -> None:
+        for row in range(c.FILE_LIST_ROWS):
+            checkbox: str = f"file_row_{row}_checkbox"
+            preview: str = f"file_row_{row}_preview"
+            if not dpg.does_item_exist(checkbox):
+                continue
+            index: int = self.offset + row
+            if index >= len(self.files):
+                dpg.configure_item(f"file_row_{row}", show=False)
+                continue
+            file: str = self.files[index]
+            dpg.configure_item(f"file_row_{row}", show=True)
+            dpg.configure_item(checkbox, label=file, user_data=file)
+            dpg.set_value(checkbox, self.registry.files.is_selected(file))
+            dpg.set_value(preview, self.preview_name(file))
+
+        if dpg.does_item_exist("file_list_scrollbar"):
+            dpg.configure_item(
+                "file_list_scrollbar",
+                max_value=self.max_offset,
+                enabled=self.max_offset > 0
+            )
+            dpg.set_value("file_list_scrollbar", self.offset)
+        if dpg.does_item_exist("file_list_position"):
+            last: int = min(len(self.files), self.offset + c.FILE_LIST_ROWS)
+            dpg.set_value(
+                "file_list_position",
+                f"{self.offset + 1}-{last} of {len(self.files)}" if self.files else ""
+            )
+
+    def reset(self) -> None:
+        self.files = ()
+        self.scroll_to(0)
+
+    def layout(self) -> None:
+        with dpg.child_window(
+            height=c.BOX_HEIGHT - 30,
+            width=c.BOX_WIDTH,
+            tag="files_checkbox_group",
+            horizontal_scrollbar=True
+        ):
+            for row in range(c.FILE_LIST_ROWS):
+                with dpg.group(horizontal=True, tag=f"file_row_{row}", show=False):
+                    dpg.add_checkbox(
+                        tag=f"file_row_{row}_checkbox",
+                        callback=self.on_file_selected
+                    )
+                    dpg.add_text(
+                        tag=f"file_row_{row}_preview",
+                        default_value="",
+                        color=s.Colors.yellow
+                    )
+        with dpg.group(horizontal=True):
+            dpg.add_slider_int(
+                tag="file_list_scrollbar",
+                width=c.BOX_WIDTH * 0.6,
+                min_value=0,
+                max_value=0,
+                format="",
+                callback=self.on_scrollbar
+            )
+            dpg.add_text("", tag="file_list_position", color=s.Colors.grey)
+
+        with dpg.handler_registry():
+            dpg.add_mouse_wheel_handler(callback=self.on_mouse_wheel)
 
 
 class InputFolder:
+    depends_on: FrozenSet[str] = frozenset({
+        "input_folder_root",
+        "output_folder_root",
+        "selected_files",
+        "use_year",
+        "use_suffix",
+        "selected_year",
+        "selected_suffix",
+        "rules",
+        "use_preview",
+    })
+
     def __init__(
         self,
         refresh_callback: Callable,
-        registry: 'Registry'
+        registry: 'Registry',
+        dirty_callback: Optional[Callable] = None
     ) -> None:
         self.refresh_callback: Callable = refresh_callback
+        self.dirty_callback: Optional[Callable] = dirty_callback
         self.registry: 'Registry' = registry
         self.feedback: Feedback = Feedback()
+        self.renamer: Optional[utils.Rename] = None
+        self.file_list: FileList = FileList(
+            registry=registry,
+            on_file_selected=self.on_file_selected,
+            preview_name=self.preview_name
+        )
+        self._snapshot: Optional[utils.DirectorySnapshot] = None
+        # Listing happens on a background scan, see poll
+        self.scan: Optional[utils.FolderScan] = None
+        self._root: Optional[str] = None
+        self._files: Sequence[str] = ()
+        # The folder changed while it was being scanned, scan it again after
+        self._stale: bool = False
+
+    @property
+    def scanning(self) -> bool:
+        # Only true while there's no complete listing of the folder to show yet
+        return self.scan is not None and self._snapshot is None
 
     @property
     def preview_enabled(self) -> bool:
-        return dpg.get_value("preview_checkbox") if (
+        return self.registry.use_preview
+
+    def read_inputs(self) -> None:
+        self.registry.use_preview = dpg.get_value("preview_checkbox") if (
             dpg.does_item_exist("preview_checkbox")
         ) else False
 
     def on_file_selected(self, sender, app_data, user_data):
-        self.registry.selected_files[user_data] = app_data
-        self.refresh()
+        self.registry.files.select(user_data, app_data)
+        self.file_list.render()
+        if self.dirty_callback is not None:
+            self.dirty_callback("selected_files")
         logger.debug(f"File selection changed: {user_data} -> {app_data}")
 
-    def refresh(self) -> None:
-        if dpg.does_item_exist("files_checkbox_group"):
-            dpg.delete_item("files_checkbox_group")
+    def preview_name(self, file: str) -> str:
+        # Only ever asked for the visible rows, so the preview costs the same
+        # no matter how many files are in the folder
+        if self.renamer is None or not self.registry.files.is_selected(file):
+            return ""
+        proposed_name: Optional[str] = self.renamer.propose(file)
+        return f">> {proposed_name}" if proposed_name is not None else ""
+
+    def seed_selection(self, files: Sequence[str]) -> None:
+        self.registry.files.extend(files, utils.is_excel)
+
+    def start_scan(self) -> None:
+        root: Optional[str] = self.registry.input_folder_root
+        if root != self._root:
+            # Another folder: drop the old list and whatever is still scanning it
+            self.cancel_scan()
+            self._root = root
+            self._snapshot = None
+            self._files = []
+        # A rescan of the same folder keeps showing the old list until it's done,
+        # it's usually answered from the listing cache anyway
+        if root is not None and (self.scan is None or self.scan.done):
+            self.scan = utils.FolderScan(root).start()
+
+    def cancel_scan(self) -> None:
+        if self.scan is not None:
+            self.scan.cancel()
+            self.scan = None
+        self.render_scan_indicator()
+
+    def poll(self) -> None:
+        # Called every frame, moves what the scan found so far into the list
+        if self.scan is None:
+            return
+        scan: utils.FolderScan = self.scan
+        done: bool = scan.done  # Before draining, so no batch slips in between
+        found: List[str] = scan.poll()
+        changed: bool = False
+        if found and self._snapshot is None:
+            self._files.extend(found)
+            self.seed_selection(found)
+            changed = True
+
+        if done:
+            self.scan = None
+            if self._stale:
+                self._stale = False
+                self.start_scan()
+            if scan.error is not None:
+                logger.error(f"Failed to list {scan.path}: {scan.error}")
+                self.feedback.error(f"Can't read the input folder: {scan.error}")
+            elif scan.snapshot is not None and scan.snapshot is not self._snapshot:
+                # Only seed the default selection when the listing actually changed
+                self._snapshot = scan.snapshot
+                self._files = scan.snapshot.files
+                self.seed_selection(self._files)
+                changed = True
+
+        if changed:
+            self.file_list.set_files(self._files)
+        self.render_scan_indicator()
+
+    def on_folder_changed(self, change: 'utils.FolderChanges') -> None:
+        # Files came or went in the input folder, see utils/watch.py
+        if self.scanning:
+            self._stale = True
+            return
+        if change.snapshot is None or self._snapshot is None:
+            self.start_scan()
+            return
+        for name in change.names:
+            if name not in change.snapshot.names:
+                self.registry.files.remove(name)
+        self._snapshot = change.snapshot
+        self._files = change.snapshot.files
+        self.seed_selection(self._files)
+        self.file_list.set_files(self._files)
+
+    def on_output_changed(self, change: 'utils.FolderChanges') -> None:
+        # Keeps the preview's conflict marks right without planning again
+        if self.renamer is None:
+            return
+        self.renamer.update_taken(
+            change.names,
+            change.snapshot.entries if change.snapshot is not None else None
+        )
+        self.file_list.render()
 
-        with dpg.child_window(
-            height=c.BOX_HEIGHT,
-            width=c.BOX_WIDTH,
-            tag="files_checkbox_group",
-            parent="from_group",
-            horizontal_scrollbar=True
-        ):
-            if self.registry.input_folder_root is not None:
-                input_path = pathlib.Path(self.registry.input_folder_root)
-                files = [item for item in input_path.iterdir() if item.is_file()]
-
-                files.sort(
-                    key=lambda x: (
-                        0 if
-                        x.suffix.lower() == '.xlsx'
-                        else 1, x.name
-                    )
-                )
+    def wait_for_scan(self) -> None:
+        # For headless use (benchmarks), there are no frames to poll from
+        if self.scan is not None:
+            self.scan.wait()
+            self.poll()
+
+    def render_scan_indicator(self) -> None:
+        if dpg.does_item_exist("scan_indicator"):
+            dpg.configure_item(
+                "scan_indicator",
+                show=self.scanning,
+                default_value=f"Scanning... {self.scan.count:,} files" if self.scanning else ""
+            )
 
-                for file in files:
-                    is_excel = file.suffix.lower() == '.xlsx'
-                    if file.name not in self.registry.selected_files:
-                        self.registry.selected_files[file.name] = is_excel
-
-                warning_msg = "You need to select an output and input folder to enable the preview"
-                if self.preview_enabled:
-                    if (
-                        self.registry.input_folder_root is not None and
-                        self.registry.output_folder_root is not None
-                    ):
-                        if self.feedback.current_feedback == warning_msg:
-                            self.feedback.reset()
-                        utils.Rename(
-                            registry=self.registry
-                        )
-                    else:
-                        self.feedback.warning(warning_msg)
-                elif (
-                    not self.preview_enabled and
-                    self.feedback.current_feedback == warning_msg
-                ):
+    def refresh(self) -> None:
+        self.start_scan()
+
+        self.renamer = None
+        warning_msg = "You need to select an output and input folder to enable the preview"
+        if self.preview_enabled:
+            if (
+                self.registry.input_folder_root is not None and
+                self.registry.output_folder_root is not None
+            ):
+                if self.feedback.current_feedback == warning_msg:
                     self.feedback.reset()
+                self.renamer = utils.Rename(
+                    registry=self.registry,
+                    plan=False
+                )
+            else:
+                self.feedback.warning(warning_msg)
+        elif self.feedback.current_feedback == warning_msg:
+            self.feedback.reset()
 
-                logger.debug(f"{self.registry.rename_mapping=}")
-
-                for file in files:
-                    preview_name = ""
-                    if (
-                        self.preview_enabled and
-                        self.registry.selected_files[file.name] and
-                        file.name in self.registry.rename_mapping and
-                        self.registry.rename_mapping
-                    ):
-                        preview_name = f">> {self.registry.rename_mapping[file.name]}"
-
-                    with dpg.group(horizontal=True):
-                        dpg.add_checkbox(
-                            label=file.name,
-                            default_value=self.registry.selected_files[file.name],
-                            callback=self.on_file_selected,
-                            user_data=file.name,
-                        )
-                        dpg.add_text(
-                            default_value=preview_name,
-                            color=s.Colors.yellow,
-                        )
+        self.file_list.set_files(self._files)
+        self.render_scan_indicator()
 
         if (
             dpg.does_item_exist("input_folder_root_preview") and
@@ -236,6 +482,12 @@ class InputFolder:
             )
 
     def reset(self) -> None:
+        self.cancel_scan()
+        self._stale = False
+        self._snapshot = None
+        self._root = None
+        self._files = ()
+        self.file_list.reset()
         if dpg.does_item_exist("preview_checkbox"):
             dpg.set_value("preview_checkbox", False)
 
@@ -262,11 +514,13 @@ class InputFolder:
                     wrap=c.BOX_WIDTH,
                     color=s.Colors.corn_blue
                 )
-                dpg.add_child_window(
-                    height=c.BOX_HEIGHT,
-                    width=c.BOX_WIDTH,
-                    tag="files_checkbox_group"
+                dpg.add_text(
+                    "",
+                    tag="scan_indicator",
+                    color=s.Colors.grey,
+                    show=False
                 )
+                self.file_list.layout()
             dpg.add_checkbox(
                 label="Preview Changes",
                 id="preview_checkbox",
@@ -275,6 +529,10 @@ class InputFolder:
 
 
 class OutputFolder:
+    depends_on: FrozenSet[str] = frozenset({
+        "output_folder_root",
+    })
+
     def __init__(
         self,
         refresh_callback: Callable,
@@ -282,14 +540,33 @@ class OutputFolder:
     ) -> None:
         self.refresh_callback: Callable = refresh_callback
         self.registry: 'Registry' = registry
+        self.scan: Optional[utils.FolderScan] = None
+
+    def poll(self) -> None:
+        if self.scan is None or not self.scan.done:
+            return
+        scan: utils.FolderScan = self.scan
+        self.scan = None
+        if scan.error is not None:
+            logger.error(f"Failed to list {scan.path}: {scan.error}")
+        if dpg.does_item_exist("to_listbox"):
+            items = list(scan.snapshot.files) if scan.snapshot is not None else []
+            dpg.configure_item("to_listbox", items=items)
+
+    def on_folder_changed(self, change: 'utils.FolderChanges') -> None:
+        if change.snapshot is None:
+            self.refresh()
+        elif self.scan is None and dpg.does_item_exist("to_listbox"):
+            dpg.configure_item("to_listbox", items=list(change.snapshot.files))
 
     def refresh(self) -> None:
-        if dpg.does_item_exist("to_listbox"):
-            items = []
-            if self.registry.output_folder_root is not None:
-                output_path = pathlib.Path(self.registry.output_folder_root)
-                items = [item.name for item in output_path.iterdir() if item.is_file()]
-            dpg.configure_item("to_listbox", items=items if items else [])
+        if self.scan is not None:
+            self.scan.cancel()
+            self.scan = None
+        if self.registry.output_folder_root is not None:
+            self.scan = utils.FolderScan(self.registry.output_folder_root).start()
+        elif dpg.does_item_exist("to_listbox"):
+            dpg.configure_item("to_listbox", items=[])
 
         if (
             dpg.does_item_exist("output_folder_root_preview") and
@@ -364,3 +641,210 @@ class Feedback:
             color=s.Colors.red,
             wrap=c.MIN_WINDOW_WIDTH
         )
+
+
+class StatsPanel:
+    # Where the time went, from the timing spans in utils.STATS. Redrawn at
+    # most every c.STATS_REFRESH_SECONDS, and only while it's open.
+    COLUMNS: Tuple[str, ...] = ("Stage", "Calls", "Count", "Bytes", "Total", "Last", "Slowest")
+
+    def __init__(self) -> None:
+        self._version: int = -1
+        self._next_render: float = 0.0
+
+    def render(self) -> None:
+        if not dpg.does_item_exist("stats_table") or not dpg.get_value("stats_header"):
+            return
+        now: float = time.perf_counter()
+        if utils.STATS.version == self._version or now < self._next_render:
+            return
+        self._version = utils.STATS.version
+        self._next_render = now + c.STATS_REFRESH_SECONDS
+
+        dpg.delete_item("stats_table", children_only=True, slot=1)
+        for stage, stats in sorted(utils.STATS.snapshot().items()):
+            with dpg.table_row(parent="stats_table"):
+                dpg.add_text(stage)
+                dpg.add_text(f"{stats.calls:,}")
+                dpg.add_text(f"{stats.count:,}")
+                dpg.add_text(f"{stats.bytes / 1024 / 1024:,.1f} MiB")
+                dpg.add_text(f"{stats.seconds * 1000:,.1f} ms")
+                dpg.add_text(f"{stats.last * 1000:,.2f} ms")
+                dpg.add_text(f"{stats.slowest * 1000:,.2f} ms")
+
+    def reset(self) -> None:
+        utils.STATS.reset()
+
+    def layout(self) -> None:
+        with dpg.collapsing_header(label="Stats", tag="stats_header", default_open=False):
+            with dpg.table(
+                tag="stats_table",
+                header_row=True,
+                borders_innerH=True,
+                width=c.MIN_WINDOW_WIDTH - 100
+            ):
+                for column in self.COLUMNS:
+                    dpg.add_table_column(label=column)
+            dpg.add_button(
+                label="Reset stats",
+                callback=lambda: self.reset()
+            )
+
+
+class JobsPanel:
+    # Runs a jobs file (see utils/jobs.py) in the background and shows how
+    # every job is getting on, redrawn at most every c.STATS_REFRESH_SECONDS
+    COLUMNS: Tuple[str, ...] = ("Input", "Output", "Status", "Files", "Failed", "Skipped")
+    STATE_COLORS: dict = {
+        "queued": s.Colors.grey,
+        "planning": s.Colors.corn_blue,
+        "copying": s.Colors.teal,
+        "done": s.Colors.green,
+        "failed": s.Colors.red,
+        "cancelled": s.Colors.yellow,
+    }
+
+    def __init__(self, registry: 'Registry') -> None:
+        self.registry: 'Registry' = registry
+        self.batch: Optional[utils.BatchRun] = None
+        self._next_render: float = 0.0
+
+    def on_file_selected(self, sender, app_data: dict) -> None:
+        if self.batch is not None:
+            self.status("Please wait for the jobs to finish or cancel them first", s.Colors.yellow)
+            return
+        path: str = app_data["file_path_name"]
+        try:
+            jobs: List[utils.Job] = utils.read_jobs(path)
+        except (OSError, utils.JobError) as e:
+            logger.error(f"Can't read the jobs from {path}: {e}")
+            self.status(f"Can't read the jobs: {e}", s.Colors.red)
+            return
+        logger.info("Running {} job(s) from {}", len(jobs), path)
+        self.batch = utils.BatchRun(
+            jobs,
+            verify=c.VERIFY_ALGORITHM if self.registry.verify else None
+        )
+        self.layout_rows()
+        self.batch.start()
+        if dpg.does_item_exist("cancel_jobs_button"):
+            dpg.configure_item("cancel_jobs_button", show=True, enabled=True)
+        self.status(f"Running {len(jobs)} job(s) from {path}", s.Colors.teal)
+
+    def on_cancel_clicked(self) -> None:
+        if self.batch is None:
+            return
+        self.batch.cancel()
+        self.status("Cancelling after the current files...", s.Colors.yellow)
+        if dpg.does_item_exist("cancel_jobs_button"):
+            dpg.configure_item("cancel_jobs_button", enabled=False)
+
+    def status(self, message: str, color: tuple) -> None:
+        if dpg.does_item_exist("jobs_status"):
+            dpg.set_value("jobs_status", message)
+            dpg.configure_item("jobs_status", color=color)
+
+    def poll(self) -> None:
+        if self.batch is None:
+            return
+        # Check finished before drawing so that the last draw is up to date
+        finished: bool = self.batch.finished
+        now: float = time.perf_counter()
+        if not finished and now < self._next_render:
+            return
+        self._next_render = now + c.STATS_REFRESH_SECONDS
+        self.render()
+        if finished:
+            self.on_finished()
+
+    def on_finished(self) -> None:
+        batch: utils.BatchRun = self.batch
+        self.batch = None
+        if dpg.does_item_exist("cancel_jobs_button"):
+            dpg.configure_item("cancel_jobs_button", show=False)
+        for report in batch.report():
+            logger.info("Job {input} >> {output}: {state}, {copied} of {planned} copied, {error}", **report)
+        total: int = len(batch.statuses)
+        if batch.cancelled:
+            self.status(f"Cancelled, {total - batch.failed} of {total} job(s) finished", s.Colors.yellow)
+        elif batch.failed:
+            self.status(f"{batch.failed} of {total} job(s) failed. Check the logs in {c.LOG_DIRECTORY}", s.Colors.red)
+        else:
+            self.status(f"All {total} job(s) finished", s.Colors.green)
+
+    def layout_rows(self) -> None:
+        if not dpg.does_item_exist("jobs_table"):
+            return
+        dpg.delete_item("jobs_table", children_only=True, slot=1)
+        for i, status in enumerate(self.batch.statuses):
+            with dpg.table_row(parent="jobs_table"):
+                dpg.add_text(utils.format_path_display(status.job.input))
+                dpg.add_text(utils.format_path_display(status.job.output))
+                for column in ("state", "files", "failed", "skipped"):
+                    dpg.add_text("", tag=f"job_{i}_{column}")
+        self.render()
+
+    def render(self) -> None:
+        for i, status in enumerate(self.batch.statuses):
+            if not dpg.does_item_exist(f"job_{i}_state"):
+                return
+            dpg.set_value(f"job_{i}_state", status.state if status.error is None else f"{status.state}: {status.error}")
+            dpg.configure_item(f"job_{i}_state", color=self.STATE_COLORS[status.state])
+            dpg.set_value(f"job_{i}_files", f"{status.done:,}/{status.total:,}")
+            dpg.set_value(f"job_{i}_failed", f"{status.failed:,}")
+            dpg.set_value(f"job_{i}_skipped", f"{status.conflicts:,}")
+
+    def layout(self) -> None:
+        with dpg.collapsing_header(label="Batch jobs", tag="jobs_header", default_open=False):
+            dpg.add_text("Run every rollover in a jobs file, see the README for the format", wrap=c.MIN_WINDOW_WIDTH - 100)
+            with dpg.group(horizontal=True):
+                dpg.add_button(
+                    label="Run a jobs file",
+                    callback=lambda: dpg.show_item("jobs_file_dialog")
+                )
+                dpg.add_button(
+                    label="Cancel jobs",
+                    callback=lambda: self.on_cancel_clicked(),
+                    tag="cancel_jobs_button",
+                    show=False
+                )
+            dpg.add_text("", tag="jobs_status", wrap=c.MIN_WINDOW_WIDTH - 100)
+            with dpg.table(
+                tag="jobs_table",
+                header_row=True,
+                borders_innerH=True,
+                width=c.MIN_WINDOW_WIDTH - 100
+            ):
+                for column in self.COLUMNS:
+                    dpg.add_table_column(label=column)
+
+        with dpg.file_dialog(
+            **{**c.DEFAULT_FILE_DIALOG_SETTINGS, "directory_selector": False},
+            callback=self.on_file_selected,
+            tag="jobs_file_dialog"
+        ):
+            dpg.add_file_extension(".json")
+
+
+class Progress:
+    def update(self, done: int, total: int) -> None:
+        if dpg.does_item_exist("rename_progress"):
+            dpg.configure_item(
+                "rename_progress",
+                show=True,
+                overlay=f"{done}/{total}"
+            )
+            dpg.set_value("rename_progress", done / total if total else 0.0)
+
+    def reset(self) -> None:
+        if dpg.does_item_exist("rename_progress"):
+            dpg.set_value("rename_progress", 0.0)
+            dpg.configure_item("rename_progress", show=False, overlay="")
+
+    def layout(self) -> None:
+        dpg.add_progress_bar(
+            tag="rename_progress",
+            default_value=0.0,
+            width=c.MIN_WINDOW_WIDTH - 100,
+            show=False
+        )
@@ -16,10 +16,6 @@ from typing import (
 from loguru import logger
 import dearpygui.dearpygui as dpg
 
-import utils
-
-logger.add(**utils.log_args("gui"))
-
 
 def get_font_path(font_name: str):
     try:
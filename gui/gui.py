@@ -10,6 +10,14 @@
 
 # =========== // STANDARD IMPORTS // ===========
 
+import os
+import time
+from typing import (
+    Dict,
+    Optional,
+    Set
+)
+
 import dearpygui.dearpygui as dpg
 from loguru import logger
 
@@ -19,22 +27,39 @@ import gui.structures as s
 import gui.components as comp
 import constants as c
 import utils
-
-logger.add(**utils.log_args("gui_app"))
+from utils import log
+from utils.spans import record_span
 
 
 class GUI(GUIFonts, GUIUtils):
-    def __init__(self):
+    def __init__(self, started: Optional[float] = None):
+        # started is when main.py got going, for the startup breakdown
+        init_start: float = time.perf_counter()
+        self._startup: Dict[str, float] = {}
+        if started is not None:
+            self._startup["imports"] = init_start - started
+        log.setup()
         logger.debug("Starting a new GUI...")
         dpg.create_context()
+        # Widget callbacks run in the render loop (see run), on the same thread
+        # as on_frame, so they never race it over the registry
+        dpg.configure_app(manual_callback_management=True)
 
         self.registry: s.Registry = s.Registry()
+        self.copy_engine: Optional[utils.CopyEngine] = None
+        self.renamer: Optional[utils.Rename] = None
         self._is_refreshing = False
+        self._dirty: Set[str] = set()
+        self._refresh_due: float = 0.0
+        self._last_state: dict = {}
+        # Tells the input and output folders about files that come and go
+        self.watcher: utils.Watcher = utils.new_watcher()
 
         self.__init_components()
 
         self.layout()
         self.reset()
+        self._startup["setup"] = time.perf_counter() - init_start
         self.run()
 
     def __init_components(self) -> None:
@@ -44,34 +69,43 @@ class GUI(GUIFonts, GUIUtils):
         )
         self.input_folder: comp.InputFolder = comp.InputFolder(
             refresh_callback=self.refresh,
-            registry=self.registry
+            registry=self.registry,
+            dirty_callback=self.mark_dirty
         )
         self.output_folder: comp.OutputFolder = comp.OutputFolder(
             refresh_callback=self.refresh,
             registry=self.registry
         )
         self.feedback: comp.Feedback = comp.Feedback()
+        self.progress: comp.Progress = comp.Progress()
+        self.stats_panel: comp.StatsPanel = comp.StatsPanel()
+        self.jobs_panel: comp.JobsPanel = comp.JobsPanel(registry=self.registry)
         self.font_setup()
 
     def _reset_registry(self) -> None:
         self.registry.input_folder_root = None
         self.registry.output_folder_root = None
-        self.registry.selected_files = {}
-        self.registry.rename_mapping = {}
+        self.registry.files.clear()
 
     def reset(self):
+        if self.copy_engine is not None:
+            self.feedback.warning("Please wait for the rename to finish or cancel it first")
+            return
+
         logger.debug("Resetting...")
         self._reset_registry()
 
         self.file_settings_input.reset()
         self.feedback.reset()
+        self.progress.reset()
         self.input_folder.reset()
         self.output_folder.reset()
 
         if dpg.does_item_exist("rename_button"):
             dpg.configure_item("rename_button", label="Rename", enabled=True)
 
-        self.refresh()
+        self.mark_dirty(*s.Registry.REFRESH_FIELDS)
+        self.refresh_now()
 
     def validate_folder_choices(self) -> None:
         same_folder_feedback: str = "I see you selected the input and output folder as the same folder. Is this correct?"
@@ -84,19 +118,53 @@ class GUI(GUIFonts, GUIUtils):
         elif self.feedback.current_feedback == same_folder_feedback:
             self.feedback.reset()
 
+    def mark_dirty(self, *fields: str) -> None:
+        self._dirty.update(fields)
+        self._refresh_due = time.perf_counter() + c.REFRESH_DEBOUNCE_SECONDS
+
     def refresh(self):
-        if self._is_refreshing:  # Prevent recursive calls
+        # Widget callbacks only read the inputs into the registry and note what
+        # changed. The components are refreshed once the burst of events settles.
+        try:
+            self.file_settings_input.refresh()
+            self.input_folder.read_inputs()
+
+            state: dict = self.registry.state()
+            changed: list = [
+                k for k, v in state.items()
+                if k not in self._last_state or self._last_state[k] != v
+            ]
+            if changed:
+                self.mark_dirty(*changed)
+            self._last_state = state
+        except Exception as e:
+            logger.error(f"Error in refresh: {e}")
+
+    def refresh_now(self) -> None:
+        self.refresh()
+        self.flush_refresh()
+
+    def flush_refresh(self) -> None:
+        if self._is_refreshing or not self._dirty:  # Prevent recursive calls
             return
 
         try:
             self._is_refreshing = True
-            logger.debug("Refreshing...")
-
-            self.file_settings_input.refresh()
-            self.input_folder.refresh()
-            self.output_folder.refresh()
-
-            self.validate_folder_choices()
+            dirty: Set[str] = self._dirty
+            self._dirty = set()
+            logger.opt(lazy=True).debug("Refreshing {}...", lambda: sorted(dirty))
+
+            for component in (self.input_folder, self.output_folder):
+                if component.depends_on & dirty:
+                    with utils.span("widgets", component=type(component).__name__):
+                        component.refresh()
+
+            if {"input_folder_root", "output_folder_root"} & dirty:
+                self.validate_folder_choices()
+                self.watcher.set_folders([
+                    self.registry.input_folder_root,
+                    self.registry.output_folder_root
+                ])
 
             self.print_registry()
         except Exception as e:
@@ -105,6 +173,7 @@ class GUI(GUIFonts, GUIUtils):
             self._is_refreshing = False
 
     def on_rename_clicked(self):
+        self.refresh_now()
         self.feedback.reset()
 
         if not self.registry.input_folder_root:
@@ -115,28 +184,206 @@ class GUI(GUIFonts, GUIUtils):
             self.feedback.error("You need to select an output folder")
             return
 
-        selected_files = [f for f, selected in self.registry.selected_files.items() if selected]
-        if not selected_files:
+        if self.input_folder.scanning:
+            self.feedback.warning("Please wait for the input folder to finish scanning")
+            return
+
+        if next(self.registry.files.selected(), None) is None and not self.registry.recursive:
             self.feedback.error("No files are selected for renaming")
             return
 
         self.print_registry()
-        utils.Rename(
+        if self.registry.recursive:
+            self.start_tree_rename()
+            return
+
+        self.renamer = utils.Rename(
             registry=self.registry
         )
-        if not self.registry.rename_mapping:
+        if self.renamer.conflicts:
+            logger.warning(
+                "Skipping {:,} file(s) whose new name is taken: {}",
+                len(self.renamer.conflicts),
+                log.sample(
+                    (f"{file} >> {name}" for file, name in self.renamer.conflicts.items()),
+                    total=len(self.renamer.conflicts)
+                )
+            )
+        if next(self.registry.files.planned(), None) is None:
             self.feedback.error("Nothing to rename!")
             return
 
-        utils.apply_rename_to_registry(self.registry)
+        self.start_copy(utils.CopyEngine(
+            self.registry,
+            journal=self.new_journal(),
+            verify=self.verify_algorithm
+        ))
+
+    def start_tree_rename(self) -> None:
+        # Files in the top folder follow the checkboxes, files in subfolders
+        # follow the same default as the checkboxes (Excel files only)
+        selected: Set[str] = set(self.registry.files.names(lambda file: file.selected))
+
+        def select(path: str) -> bool:
+            if os.path.dirname(path):
+                return utils.is_excel(path)
+            return path in selected
+
+        self.renamer = utils.Rename(registry=self.registry, plan=False)
+        self.start_copy(utils.CopyEngine(
+            self.registry,
+            pairs=self.renamer.plan_tree(select),
+            journal=self.new_journal(),
+            verify=self.verify_algorithm
+        ))
+
+    @property
+    def verify_algorithm(self) -> Optional[str]:
+        return c.VERIFY_ALGORITHM if self.registry.verify else None
+
+    def new_journal(self) -> Optional['utils.Journal']:
+        # A journal is nice to have, not being able to write one shouldn't
+        # stop the rename
+        try:
+            return utils.Journal.create(
+                self.registry.input_folder_root,
+                self.registry.output_folder_root,
+                verify=self.verify_algorithm
+            )
+        except OSError as e:
+            logger.warning(f"Renaming without a journal: {e}")
+            return None
 
-        self.feedback.success(f"Successfully renamed {len(self.registry.rename_mapping)} file(s). Please reset to rename more files.")
+    def on_resume_clicked(self):
+        if self.copy_engine is not None:
+            return
+        journals = utils.unfinished_journals()
+        if not journals:
+            self.show_resume_button()
+            return
+        path: str = journals[0]
+        try:
+            header, pending = utils.read_journal(path)
+            registry = s.Registry(
+                input_folder_root=header["input"],
+                output_folder_root=header["output"],
+                rename_mapping=pending
+            )
+            dedup: Optional[utils.DedupStore] = utils.DedupStore(header["dedup"]) if header.get("dedup") else None
+        except (OSError, KeyError) as e:
+            logger.error(f"Can't resume from {path}: {e}")
+            self.feedback.error(f"Can't resume the interrupted rename: {e}")
+            return
+        logger.info(f"Resuming {len(pending)} file(s) from {path}")
+        self.feedback.info(f"Resuming {len(pending)} file(s) into {header['output']}")
+        self.start_copy(utils.CopyEngine(
+            registry,
+            strategy=header.get("strategy"),
+            dedup=dedup,
+            journal=utils.Journal(path),
+            verify=header.get("verify")
+        ))
+
+    def show_resume_button(self) -> None:
+        if dpg.does_item_exist("resume_button"):
+            dpg.configure_item("resume_button", show=bool(utils.unfinished_journals()))
+
+    def start_copy(self, engine: 'utils.CopyEngine') -> None:
+        self.copy_engine = engine
+        self.copy_engine.start()
+        self.progress.update(0, self.copy_engine.total)
+        if dpg.does_item_exist("rename_button"):
+            dpg.configure_item("rename_button", label="Renaming...", enabled=False)
+        if dpg.does_item_exist("cancel_button"):
+            dpg.configure_item("cancel_button", show=True, enabled=True)
+        if dpg.does_item_exist("resume_button"):
+            dpg.configure_item("resume_button", show=False)
+
+    def on_cancel_clicked(self):
+        if self.copy_engine is None:
+            return
+        self.copy_engine.cancel()
+        self.feedback.warning("Cancelling after the current file...")
+        if dpg.does_item_exist("cancel_button"):
+            dpg.configure_item("cancel_button", enabled=False)
+
+    def on_copy_progress(self, event: 'utils.CopyProgress') -> None:
+        result: utils.CopyResult = event.result
+        self.progress.update(event.done, event.total)
+        if not result.ok:
+            logger.error("Failed to copy {} >> {}: {}", result.from_name, result.to_name, result.error)
+            self.feedback.error(f"Failed to copy {result.from_name}: {result.error}")
+        else:
+            logger.info(
+                "Copied {} >> {} ({} bytes in {:.3f}s using {})",
+                result.from_name, result.to_name, result.size, result.seconds, result.strategy
+            )
+            self.feedback.info(f"Copied {event.done}/{event.total}: {result.from_name}")
+
+    def on_copy_finished(self) -> None:
+        engine: utils.CopyEngine = self.copy_engine
+        skipped_conflicts: int = len(self.renamer.conflicts) if self.renamer is not None else 0
+        self.copy_engine = None
+        self.renamer = None
+        utils.invalidate(engine.output_folder_root)
+        if dpg.does_item_exist("cancel_button"):
+            dpg.configure_item("cancel_button", show=False)
+        self.show_resume_button()
+        if engine.manifest:
+            logger.info(f"Wrote the checksums of {len(engine.checksums)} file(s) to {engine.manifest}")
+
+        label: str = "Success!"
+        if engine.cancelled:
+            label = "Cancelled"
+            self.feedback.warning(f"Cancelled after renaming {engine.copied} of {engine.total} file(s). Please reset to rename more files.")
+        elif engine.manifest_error:
+            label = "Failed"
+            self.feedback.error(f"Renamed {engine.copied} file(s), but couldn't write the checksums: {engine.manifest_error}")
+        elif engine.failed:
+            label = "Failed"
+            self.feedback.error(f"Renamed {engine.copied} file(s), but {engine.failed} failed. Check the logs in {c.LOG_DIRECTORY}")
+        elif skipped_conflicts:
+            self.feedback.warning(f"Renamed {engine.copied} file(s) and skipped {skipped_conflicts} whose new name was already taken. Please reset to rename more files.")
+        else:
+            self.feedback.success(f"Successfully renamed {engine.copied} file(s). Please reset to rename more files.")
 
         self.registry.input_folder_root = None
-        self.registry.selected_files = {}
+        self.registry.files.clear()
         if dpg.does_item_exist("rename_button"):
-            dpg.configure_item("rename_button", label="Success!", enabled=False)
-        self.refresh()
+            dpg.configure_item("rename_button", label=label, enabled=False)
+        self.mark_dirty("selected_files", "output_folder_root")
+        self.refresh_now()
+
+    def on_frame(self) -> None:
+        if self._dirty and time.perf_counter() >= self._refresh_due:
+            self.flush_refresh()
+        self.input_folder.poll()
+        self.output_folder.poll()
+        for change in self.watcher.poll():
+            self.on_folder_changed(change)
+        self.stats_panel.render()
+        self.jobs_panel.poll()
+
+        if self.copy_engine is None:
+            return
+        # Check finished before draining so that no event can slip in between
+        finished: bool = self.copy_engine.finished
+        for event in self.copy_engine.poll():
+            self.on_copy_progress(event)
+        if finished:
+            self.on_copy_finished()
+
+    def on_folder_changed(self, change: 'utils.FolderChanges') -> None:
+        logger.opt(lazy=True).debug("{} changed: {}", lambda: change.folder, lambda: log.sample(sorted(change.names)))
+
+        def is_folder(root: Optional[str]) -> bool:
+            return bool(root) and os.path.normcase(os.path.abspath(root)) == os.path.normcase(os.path.abspath(change.folder))
+
+        if is_folder(self.registry.input_folder_root):
+            self.input_folder.on_folder_changed(change)
+        if is_folder(self.registry.output_folder_root):
+            self.output_folder.on_folder_changed(change)
+            self.input_folder.on_output_changed(change)
 
     def layout(self) -> None:
         with dpg.window(
@@ -176,6 +423,7 @@ class GUI(GUIFonts, GUIUtils):
                 self.output_folder.layout()
 
             self.feedback.layout()
+            self.progress.layout()
 
             # Right-aligned buttons
             with dpg.group(horizontal=True):
@@ -192,6 +440,25 @@ class GUI(GUIFonts, GUIUtils):
                     width=100,
                     tag="rename_button"
                 )
+                dpg.add_button(
+                    label="Cancel",
+                    callback=self.on_cancel_clicked,
+                    width=100,
+                    tag="cancel_button",
+                    show=False
+                )
+                # Only there when a rename was interrupted before it finished
+                dpg.add_button(
+                    label="Resume",
+                    callback=self.on_resume_clicked,
+                    width=100,
+                    tag="resume_button",
+                    show=bool(utils.unfinished_journals())
+                )
+
+            self.add_space()
+            self.jobs_panel.layout()
+            self.stats_panel.layout()
 
         dpg.create_viewport(
             title=c.APP_NAME,
@@ -199,12 +466,29 @@ class GUI(GUIFonts, GUIUtils):
             height=c.DEFAULT_VIEWPORT_HEIGHT
         )
 
+    def log_startup(self) -> None:
+        # How long until the first frame was on screen, and where that went
+        record_span("startup", sum(self._startup.values()), **self._startup)
+
     def run(self):
         logger.debug("Kick starting GUI!")
+        run_start: float = time.perf_counter()
         dpg.setup_dearpygui()
         dpg.show_viewport()
         if c.START_MAXIMIZED:
             dpg.maximize_viewport()
         dpg.set_primary_window("main_window", True)
-        dpg.start_dearpygui()
+        first_frame: bool = True
+        while dpg.is_dearpygui_running():
+            dpg.run_callbacks(dpg.get_callback_queue())
+            self.on_frame()
+            dpg.render_dearpygui_frame()
+            if first_frame:
+                first_frame = False
+                self._startup["first_frame"] = time.perf_counter() - run_start
+                self.log_startup()
+        if self.copy_engine is not None:
+            self.copy_engine.cancel()
+        self.watcher.close()
         dpg.destroy_context()
+        log.close()
@@ -8,15 +8,34 @@
 #
 # ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
 
+import dataclasses
 from typing import (
+    ClassVar,
+    Mapping,
     Optional,
-    Dict
+    Tuple
 )
 from dataclasses import (
+    InitVar,
     dataclass,
     field
 )
 
+from utils.rules import Rule
+from utils.table import (
+    FileTable,
+    PlanView,
+    SelectionView
+)
+
+
+class view(property):
+    # A property that reads as None on the class itself. The dataclass takes
+    # that as the default of the InitVar of the same name, so the property and
+    # the constructor argument can share a name.
+    def __get__(self, registry, owner=None):
+        return None if registry is None else super().__get__(registry, owner)
+
 
 # class Registry(BaseModel):
 #     input_folder_root: Optional[str] = None
@@ -34,14 +53,74 @@ from dataclasses import (
 class Registry:
     input_folder_root: Optional[str] = None
     output_folder_root: Optional[str] = None
-    selected_files: Dict[str, str] = field(default_factory=dict)
-    rename_mapping: Dict[str, str] = field(default_factory=dict)
+    # One record per file: its selection, planned name and conflict, see
+    # utils/table.py. selected_files and rename_mapping are views of it.
+    files: FileTable = field(default_factory=FileTable, init=False)
 
     use_year: bool = False
     use_suffix: bool = False
 
     selected_year: str = ""
     selected_suffix: str = ""
+    # Run before the year and the suffix, see utils/rules.py
+    rules: Tuple[Rule, ...] = ()
+
+    use_preview: bool = False
+    recursive: bool = False
+    verify: bool = False
+
+    # The fields that GUI.refresh diffs to work out what changed. Changes to the
+    # file table are flagged explicitly by whoever changes them.
+    REFRESH_FIELDS: ClassVar[Tuple[str, ...]] = (
+        "input_folder_root",
+        "output_folder_root",
+        "use_year",
+        "use_suffix",
+        "selected_year",
+        "selected_suffix",
+        "rules",
+        "use_preview",
+        "recursive",
+        "verify",
+    )
+
+    def __post_init__(
+        self,
+        selected_files: Optional[Mapping[str, bool]],
+        rename_mapping: Optional[Mapping[str, str]]
+    ) -> None:
+        if selected_files is not None or rename_mapping is not None:
+            self.files = FileTable.from_dicts(selected_files, rename_mapping)
+
+    def settings(self) -> 'Registry':
+        # The same settings with an empty file table
+        return dataclasses.replace(self, selected_files=None, rename_mapping=None)
+
+    @view
+    def selected_files(self) -> SelectionView:
+        return SelectionView(self.files)
+
+    @selected_files.setter
+    def selected_files(self, selected_files: Mapping[str, bool]) -> None:
+        self.files = FileTable.from_dicts(selected_files)
+
+    @view
+    def rename_mapping(self) -> PlanView:
+        return PlanView(self.files)
+
+    @rename_mapping.setter
+    def rename_mapping(self, rename_mapping: Mapping[str, str]) -> None:
+        rename_mapping = dict(rename_mapping)  # It could be a view of this very table
+        self.files.clear_plan()
+        for name, proposed in rename_mapping.items():
+            self.files.propose(name, proposed)
+
+    # Registry(selected_files=..., rename_mapping=...) fills the table
+    selected_files: InitVar[Optional[Mapping[str, bool]]]
+    rename_mapping: InitVar[Optional[Mapping[str, str]]]
+
+    def state(self) -> dict:
+        return {name: getattr(self, name) for name in self.REFRESH_FIELDS}
 
 
 @dataclass
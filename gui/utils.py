@@ -16,15 +16,12 @@ from loguru import logger
 import dearpygui.dearpygui as dpg
 
 import constants as c
-import utils
+from utils import log
 
 if TYPE_CHECKING:
     from gui.structures import Registry
 
 
-logger.add(**utils.log_args("gui_app"))
-
-
 class GUIUtils:
     registry: 'Registry'
 
@@ -37,11 +34,24 @@ class GUIUtils:
         self.add_space()
 
     def print_registry(self, level: str = "info"):
-        log_func = getattr(logger, level, logger.info)
-        log_func(f"Files selected for renaming: {self.registry.selected_files}")
-        log_func(f"Input folder: {self.registry.input_folder_root}")
-        log_func(f"Output folder: {self.registry.output_folder_root}")
-        log_func(f"Year Enabled: {self.registry.use_year}")
-        log_func(f"Suffix Enabled: {self.registry.use_suffix}")
-        log_func(f"Suffix Selected: {self.registry.selected_suffix}")
-        log_func(f"Year Selected: {self.registry.selected_year}")
+        # The files only as a count and a sample, worked out only if a sink
+        # takes the record, so this doesn't get slower with the folder
+        registry: 'Registry' = self.registry
+        lazy = logger.opt(lazy=True)
+        getattr(lazy, level, lazy.info)(
+            "Files selected for renaming: {} (of {:,})",
+            lambda: log.sample(
+                registry.files.names(lambda file: file.selected),
+                total=registry.files.selected_count
+            ),
+            lambda: len(registry.files)
+        )
+        getattr(logger, level, logger.info)(
+            "Input folder: {} | Output folder: {} | Year: {} ({}) | Suffix: {} ({!r})",
+            registry.input_folder_root,
+            registry.output_folder_root,
+            registry.use_year,
+            registry.selected_year,
+            registry.use_suffix,
+            registry.selected_suffix
+        )
@@ -8,7 +8,49 @@
 #
 # ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
 
-import gui
+import os
+import sys
+import time
+import multiprocessing
+from typing import List
+
+import constants as c
+
+# When the process got going, for the startup breakdown the GUI logs
+STARTED: float = time.perf_counter()
+
+
+def profiling_enabled(argv: List[str]) -> bool:
+    # Checked here so utils.profiling (and loguru) is only imported to profile
+    return "--profile" in argv or os.environ.get(c.PROFILE_ENVIRONMENT_VARIABLE, "") not in ("", "0")
+
+
+def run() -> int:
+    # Any arguments means a headless run, which must not pay for dearpygui
+    if len(sys.argv) > 1:
+        import cli
+        return cli.main()
+
+    # dearpygui, loguru and the GUI modules are only imported from here on
+    import gui
+    gui.GUI(started=STARTED)
+    return 0
+
 
 if __name__ == "__main__":
-    gui.GUI()
+    # The dedup store hashes in worker processes, which a PyInstaller exe can
+    # only start with this in place
+    multiprocessing.freeze_support()
+
+    if not profiling_enabled(sys.argv[1:]):
+        sys.exit(run())
+
+    from utils import profiling
+    # --profile (or ROLLOVER_PROFILE=1) runs the session under cProfile and
+    # tracemalloc, see utils/profiling.py
+    if "--profile" in sys.argv:
+        sys.argv.remove("--profile")
+    with profiling.profiled("cli" if len(sys.argv) > 1 else "gui") as written:
+        code: int = run()
+    print(f"Profile written to {written['prof']} and {written['report']}", file=sys.stderr)
+    sys.exit(code)
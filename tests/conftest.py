@@ -0,0 +1,21 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import pytest
+
+import constants as c
+
+
+@pytest.fixture(autouse=True)
+def journal_directory(tmp_path, monkeypatch):
+    # Keep the copy journals out of the real app folder
+    directory = tmp_path / "journals"
+    monkeypatch.setattr(c, "JOURNAL_DIRECTORY", str(directory))
+    return directory
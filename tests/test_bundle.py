@@ -0,0 +1,32 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import os
+import shlex
+
+import utils
+
+ROOT_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_exports_resolve():
+    for name, (module, _) in utils.EXPORTS.items():
+        # Only the utils package is collected into the exe
+        assert module.startswith("utils.")
+        assert getattr(utils, name) is not None
+
+
+def test_exe_bundles_the_lazy_exports():
+    with open(os.path.join(ROOT_DIR, "Makefile"), encoding="utf-8") as f:
+        commands = [shlex.split(line) for line in f if line.strip().startswith("pyinstaller")]
+    assert commands
+    for words in commands:
+        assert "--collect-submodules" in words
+        assert words[words.index("--collect-submodules") + 1] == "utils"
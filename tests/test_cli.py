@@ -0,0 +1,173 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import cli
+import utils
+
+ROOT_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_folders(tmp_path):
+    input_path = tmp_path / "input"
+    output_path = tmp_path / "output"
+    input_path.mkdir()
+    output_path.mkdir()
+    for name in ["budget_2024.xlsx", "draft_2024.xlsx", "notes_2024.txt"]:
+        (input_path / name).write_bytes(b"data")
+    return input_path, output_path
+
+
+def test_cli_dry_run_json(tmp_path, capsys):
+    input_path, output_path = make_folders(tmp_path)
+    code = cli.main([
+        str(input_path), str(output_path),
+        "--year", "2025",
+        "--exclude", "draft*",
+        "--dry-run", "--json"
+    ])
+    report = json.loads(capsys.readouterr().out)
+
+    assert code == 0
+    assert report["planned"] == {"budget_2024.xlsx": "budget_2025.xlsx"}
+    assert report["results"] == []
+    assert not any(output_path.iterdir())
+
+
+def test_cli_copies_included_files(tmp_path, capsys):
+    input_path, output_path = make_folders(tmp_path)
+    code = cli.main([
+        str(input_path), str(output_path),
+        "--year", "2025",
+        "--include", "*.txt",
+        "--suffix", " (final)",
+        "--json"
+    ])
+    report = json.loads(capsys.readouterr().out)
+
+    assert code == 0
+    assert report["copied"] == 1
+    assert sorted(os.listdir(output_path)) == ["notes_2025 (final).txt"]
+
+
+def test_cli_creates_the_output_folder(tmp_path, capsys):
+    input_path, _ = make_folders(tmp_path)
+    output_path = tmp_path / "new" / "2025"
+    code = cli.main([str(input_path), str(output_path), "--year", "2025", "--json"])
+    report = json.loads(capsys.readouterr().out)
+
+    assert code == 0
+    assert report["failed"] == 0
+    assert sorted(os.listdir(output_path)) == ["budget_2025.xlsx", "draft_2025.xlsx"]
+
+
+def test_cli_rejects_a_bad_year(tmp_path, capsys):
+    input_path, output_path = make_folders(tmp_path)
+    with pytest.raises(SystemExit):
+        cli.main([str(input_path), str(output_path), "--year", "abc"])
+    assert "argument --year: 'abc' isn't a four digit year" in capsys.readouterr().err
+
+
+def test_cli_does_not_import_dearpygui(tmp_path):
+    input_path, output_path = make_folders(tmp_path)
+    script: str = (
+        "import sys, cli; "
+        f"cli.main([{str(input_path)!r}, {str(output_path)!r}, '--dry-run']); "
+        "sys.exit('dearpygui' in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, capture_output=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_cli_recursive_mirrors_and_renames_folders(tmp_path, capsys):
+    input_path, output_path = make_folders(tmp_path)
+    nested = input_path / "Finance 2024" / "Payroll"
+    nested.mkdir(parents=True)
+    (nested / "salaries_2024.xlsx").write_bytes(b"data")
+    (nested / "readme.txt").write_bytes(b"data")
+
+    code = cli.main([
+        str(input_path), str(output_path),
+        "--year", "2025",
+        "--exclude", "draft*",
+        "--recursive", "--json"
+    ])
+    report = json.loads(capsys.readouterr().out)
+
+    assert code == 0
+    assert report["copied"] == 2
+    assert (output_path / "budget_2025.xlsx").exists()
+    assert (output_path / "Finance 2025" / "Payroll" / "salaries_2025.xlsx").exists()
+    assert not (output_path / "Finance 2025" / "Payroll" / "readme.txt").exists()
+
+
+def test_cli_resume(tmp_path, capsys, journal_directory):
+    input_path, output_path = make_folders(tmp_path)
+    journal = utils.Journal.create(str(input_path), str(output_path))
+    journal.planned_many([("budget_2024.xlsx", "budget_2025.xlsx"), ("draft_2024.xlsx", "draft_2025.xlsx")])
+    journal.done("draft_2024.xlsx", "draft_2025.xlsx")
+    journal.close(completed=False)
+
+    assert cli.main(["--resume", journal.path, "--json"]) == 0
+    report = json.loads(capsys.readouterr().out)
+
+    assert report["planned"] == {"budget_2024.xlsx": "budget_2025.xlsx"}
+    assert os.listdir(output_path) == ["budget_2025.xlsx"]
+    assert utils.unfinished_journals() == []
+
+
+def test_cli_rules(tmp_path, capsys):
+    input_path, output_path = make_folders(tmp_path)
+    code = cli.main([
+        str(input_path), str(output_path),
+        "--year", "2025",
+        "--rule", "case upper",
+        "--rule", "template {stem}_{n:02}",
+        "--dry-run", "--json"
+    ])
+    report = json.loads(capsys.readouterr().out)
+
+    assert code == 0
+    assert report["planned"] == {
+        "budget_2024.xlsx": "BUDGET_2025_01.xlsx",
+        "draft_2024.xlsx": "DRAFT_2025_02.xlsx",
+    }
+
+    with pytest.raises(SystemExit):
+        cli.main([str(input_path), str(output_path), "--rule", "case sideways"])
+    assert "argument --rule: case 'sideways'" in capsys.readouterr().err
+
+
+def test_cli_jobs(tmp_path, capsys):
+    input_path, output_path = make_folders(tmp_path)
+    jobs = tmp_path / "jobs.json"
+    jobs.write_text(json.dumps([
+        {"input": "input", "output": "output", "year": "2025"},
+        {"input": "input", "output": "output 2026", "year": "2026", "include": ["*.txt"]},
+    ]), encoding="utf-8")
+    (tmp_path / "output 2026").mkdir()
+    code = cli.main(["--jobs", str(jobs), "--dry-run", "--json"])
+    report = json.loads(capsys.readouterr().out)
+
+    assert code == 0
+    assert [(job["state"], job["planned"]) for job in report["jobs"]] == [("done", 2), ("done", 1)]
+    assert not any(output_path.iterdir()) and not any((tmp_path / "output 2026").iterdir())
+
+    code = cli.main(["--jobs", str(jobs), "--no-journal"])
+    assert code == 0
+    assert sorted(os.listdir(output_path)) == ["budget_2025.xlsx", "draft_2025.xlsx"]
+    assert os.listdir(tmp_path / "output 2026") == ["notes_2026.txt"]
+    assert "2 of 2 job(s) finished" in capsys.readouterr().out
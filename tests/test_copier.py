@@ -0,0 +1,299 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import os
+import time
+import hashlib
+import pathlib
+
+import pytest
+
+import utils
+import constants as c
+from utils import fastcopy
+from gui.structures import Registry
+
+
+def make_registry(tmp_path: pathlib.Path, n: int) -> Registry:
+    input_path: pathlib.Path = tmp_path / "input"
+    output_path: pathlib.Path = tmp_path / "output"
+    input_path.mkdir()
+    output_path.mkdir()
+    for i in range(n):
+        (input_path / f"report_{i}_2024.xlsx").write_bytes(b"x" * 128)
+    return Registry(
+        input_folder_root=str(input_path),
+        output_folder_root=str(output_path),
+        rename_mapping={
+            f"report_{i}_2024.xlsx": f"report_{i}_2025.xlsx"
+            for i in range(n)
+        }
+    )
+
+
+def wait_for(engine: utils.CopyEngine) -> list:
+    events: list = []
+    while not engine.finished:
+        events += engine.poll()
+        time.sleep(0.01)
+    return events + engine.poll()
+
+
+def test_copy_engine_runs_in_background(tmp_path):
+    registry: Registry = make_registry(tmp_path, 5)
+    engine = utils.CopyEngine(registry)
+    engine.start()
+    events = wait_for(engine)
+
+    assert sorted(e.done for e in events) == [1, 2, 3, 4, 5]
+    assert all(e.result.ok for e in events)
+    assert engine.copied == 5
+    for to_name in registry.rename_mapping.values():
+        assert (pathlib.Path(registry.output_folder_root) / to_name).exists()
+
+
+def test_copy_engine_cancel_between_files(tmp_path):
+    registry: Registry = make_registry(tmp_path, 5)
+    engine = utils.CopyEngine(registry)
+    engine.cancel()
+    engine.start()
+    events = wait_for(engine)
+
+    assert events == []
+    assert engine.copied == 0
+    assert not any(pathlib.Path(registry.output_folder_root).iterdir())
+
+
+def test_copy_engine_reports_errors(tmp_path):
+    registry: Registry = make_registry(tmp_path, 2)
+    registry.rename_mapping["missing.xlsx"] = "missing_2025.xlsx"
+    engine = utils.CopyEngine(registry)
+    engine.start()
+    events = wait_for(engine)
+
+    assert engine.copied == 2
+    assert engine.failed == 1
+    assert [e.result.from_name for e in events if not e.result.ok] == ["missing.xlsx"]
+
+
+def test_apply_rename_biggest_files_first(tmp_path):
+    registry: Registry = make_registry(tmp_path, 3)
+    (pathlib.Path(registry.input_folder_root) / "report_1_2024.xlsx").write_bytes(b"x" * 4096)
+    report = utils.apply_rename_to_registry(registry, workers=1)
+
+    assert [r.from_name for r in report][0] == "report_1_2024.xlsx"
+    assert [r.status for r in report] == ["copied", "copied", "copied"]
+    assert report[0].size == 4096
+
+
+def test_apply_rename_many_workers(tmp_path):
+    registry: Registry = make_registry(tmp_path, 50)
+    report = utils.apply_rename_to_registry(registry, workers=16)
+
+    assert len(report) == 50
+    assert all(r.ok for r in report)
+    assert len(list(pathlib.Path(registry.output_folder_root).iterdir())) == 50
+
+
+@pytest.mark.parametrize("strategy", ["auto", "buffered", "hardlink"])
+def test_copy_strategies_copy_every_byte(tmp_path, strategy):
+    source: pathlib.Path = tmp_path / "source.xlsx"
+    source.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+    used, size = fastcopy.copy(str(source), str(tmp_path / "copy.xlsx"), strategy=strategy)
+
+    assert (tmp_path / "copy.xlsx").read_bytes() == source.read_bytes()
+    assert size == source.stat().st_size
+    assert used in ("hardlink", "reflink", "copy_file_range", "sendfile", "buffered")
+    if strategy == "buffered":
+        assert used == "buffered"
+    if strategy == "hardlink":
+        assert (tmp_path / "copy.xlsx").stat().st_ino == source.stat().st_ino
+
+
+def test_copy_strategy_falls_back_when_unsupported(tmp_path, monkeypatch):
+    def unsupported(*args):
+        raise fastcopy.Unsupported()
+
+    monkeypatch.setattr(fastcopy, "FAST_PATHS", (("reflink", unsupported),))
+    (tmp_path / "source.xlsx").write_bytes(b"data")
+    used, _ = fastcopy.copy(str(tmp_path / "source.xlsx"), str(tmp_path / "copy.xlsx"))
+
+    assert used == "buffered"
+    assert (tmp_path / "copy.xlsx").read_bytes() == b"data"
+
+
+def test_unknown_copy_strategy(tmp_path):
+    (tmp_path / "source.xlsx").write_bytes(b"data")
+    with pytest.raises(ValueError):
+        fastcopy.copy(str(tmp_path / "source.xlsx"), str(tmp_path / "copy.xlsx"), strategy="teleport")
+
+
+def test_dedup_links_repeated_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(c, "DEDUP_POOL_THRESHOLD", 1)
+    store = utils.DedupStore(str(tmp_path / "store"))
+    registry: Registry = make_registry(tmp_path, 4)
+    report = utils.apply_rename_to_registry(registry, dedup=store)
+
+    assert all(r.strategy == "dedup" for r in report)
+    assert len({r.digest for r in report}) == 1
+    assert store.stored == 1
+    inodes = {p.stat().st_ino for p in pathlib.Path(registry.output_folder_root).iterdir()}
+    assert len(inodes) == 1
+
+    # Next year's run reuses the blob and the persisted index
+    next_year: pathlib.Path = tmp_path / "next"
+    next_year.mkdir()
+    registry.output_folder_root = str(next_year)
+    store = utils.DedupStore(str(tmp_path / "store"))
+    assert len(store.index) == 4
+    utils.apply_rename_to_registry(registry, dedup=store)
+    assert store.stored == 0
+    assert {p.stat().st_ino for p in next_year.iterdir()} == inodes
+
+
+
+def test_dedup_restores_a_blob_edited_through_a_link(tmp_path):
+    store = utils.DedupStore(str(tmp_path / "store"))
+    registry: Registry = make_registry(tmp_path, 1)
+    utils.apply_rename_to_registry(registry, dedup=store)
+
+    # Edited in place, so the blob behind it changes too
+    (output,) = pathlib.Path(registry.output_folder_root).iterdir()
+    with open(output, "ab") as f:
+        f.write(b"edited")
+
+    next_year: pathlib.Path = tmp_path / "next"
+    next_year.mkdir()
+    registry.output_folder_root = str(next_year)
+    store = utils.DedupStore(str(tmp_path / "store"))
+    utils.apply_rename_to_registry(registry, dedup=store)
+
+    assert store.stored == 1
+    (source,) = pathlib.Path(registry.input_folder_root).iterdir()
+    assert (next_year / output.name).read_bytes() == source.read_bytes()
+
+def test_engine_creates_the_output_folder(tmp_path):
+    registry: Registry = make_registry(tmp_path, 2)
+    registry.output_folder_root = str(tmp_path / "missing" / "2025")
+    registry.rename_mapping["report_1_2024.xlsx"] = "sub/report_1_2025.xlsx"
+    engine = utils.CopyEngine(registry, pairs=iter(registry.rename_mapping.items()))
+    engine.run()
+
+    assert engine.copied == 2 and engine.failed == 0
+    assert (tmp_path / "missing" / "2025" / "report_0_2025.xlsx").exists()
+
+
+def test_engine_copies_only_inside_the_output_folder(tmp_path):
+    registry: Registry = make_registry(tmp_path, 2)
+    registry.rename_mapping["report_1_2024.xlsx"] = os.path.join("..", "escaped.xlsx")
+    engine = utils.CopyEngine(registry)
+    engine.run()
+
+    assert engine.copied == 1 and engine.failed == 1
+    assert not (tmp_path / "escaped.xlsx").exists()
+
+
+def test_copy_of_the_longest_name(tmp_path):
+    # A name right at the usual 255 byte limit, no room for a longer temporary one
+    stem: str = "a" * (255 - len("_2024.xlsx"))
+    registry: Registry = make_registry(tmp_path, 0)
+    (tmp_path / "input" / f"{stem}_2024.xlsx").write_bytes(b"data")
+    registry.rename_mapping = {f"{stem}_2024.xlsx": f"{stem}_2025.xlsx"}
+    engine = utils.CopyEngine(registry)
+    engine.run()
+
+    assert engine.failed == 0
+    assert os.listdir(registry.output_folder_root) == [f"{stem}_2025.xlsx"]
+
+
+def test_copy_is_atomic(tmp_path, monkeypatch):
+    registry: Registry = make_registry(tmp_path, 1)
+
+    def crash(source, destination, size):
+        destination.write(b"half")
+        raise OSError("disk pulled out")
+
+    monkeypatch.setattr(fastcopy, "FAST_PATHS", (("crash", crash),))
+    report = utils.apply_rename_to_registry(registry)
+
+    assert report[0].status == "failed"
+    assert list(pathlib.Path(registry.output_folder_root).iterdir()) == []
+
+
+def test_journal_resumes_only_unfinished_files(tmp_path, journal_directory):
+    registry: Registry = make_registry(tmp_path, 3)
+    journal = utils.Journal.create(registry.input_folder_root, registry.output_folder_root)
+    journal.planned_many(registry.rename_mapping.items())
+    journal.done("report_0_2024.xlsx", "report_0_2025.xlsx")
+    journal.close(completed=False)  # The crash
+
+    assert utils.unfinished_journals() == [journal.path]
+    header, pending = utils.read_journal(journal.path)
+    assert header["output"] == registry.output_folder_root
+    assert sorted(pending) == ["report_1_2024.xlsx", "report_2_2024.xlsx"]
+
+    resumed = Registry(
+        input_folder_root=header["input"],
+        output_folder_root=header["output"],
+        rename_mapping=pending
+    )
+    report = utils.apply_rename_to_registry(resumed, journal=utils.Journal(journal.path))
+
+    assert sorted(r.to_name for r in report if r.ok) == ["report_1_2025.xlsx", "report_2_2025.xlsx"]
+    assert utils.unfinished_journals() == []
+
+
+def test_journal_resumes_after_a_torn_line(tmp_path, journal_directory):
+    registry: Registry = make_registry(tmp_path, 2)
+    journal = utils.Journal.create(registry.input_folder_root, registry.output_folder_root)
+    journal.planned_many(registry.rename_mapping.items())
+    journal.close(completed=False)
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "done", "fr')  # The crash, mid record
+
+    resumed = utils.Journal(journal.path)
+    resumed.done("report_0_2024.xlsx", "report_0_2025.xlsx")
+    resumed.close(completed=False)
+
+    _, pending = utils.read_journal(journal.path)
+    assert pending == {"report_1_2024.xlsx": "report_1_2025.xlsx"}
+
+
+def test_journal_kept_when_files_fail(tmp_path, journal_directory):
+    registry: Registry = make_registry(tmp_path, 1)
+    registry.rename_mapping["missing.xlsx"] = "missing_2025.xlsx"
+    journal = utils.Journal.create(registry.input_folder_root, registry.output_folder_root)
+    utils.apply_rename_to_registry(registry, journal=journal)
+
+    _, pending = utils.read_journal(journal.path)
+    assert pending == {"missing.xlsx": "missing_2025.xlsx"}
+
+
+def test_verify_writes_checksum_manifest(tmp_path):
+    registry: Registry = make_registry(tmp_path, 3)
+    registry.rename_mapping["report_0_2024.xlsx"] = "sub/report_0_2025.xlsx"
+    engine = utils.CopyEngine(registry, verify="blake2b")
+    report = engine.run()
+
+    expected: str = hashlib.blake2b(b"x" * 128, digest_size=32).hexdigest()
+    assert all(r.strategy == "hashed" and r.checksum == expected for r in report)
+    assert utils.read_manifest(engine.manifest) == {
+        "sub/report_0_2025.xlsx": expected,
+        "report_1_2025.xlsx": expected,
+        "report_2_2025.xlsx": expected,
+    }
+
+
+def test_verify_reuses_dedup_digests(tmp_path):
+    registry: Registry = make_registry(tmp_path, 2)
+    store = utils.DedupStore(str(tmp_path / "store"))
+    report = utils.apply_rename_to_registry(registry, dedup=store, verify="blake2b")
+
+    assert all(r.checksum and r.checksum == r.digest for r in report)
@@ -0,0 +1,158 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import os
+import json
+import time
+import threading
+
+import pytest
+
+import utils
+from utils import copier, jobs as batch_jobs
+
+
+def write_jobs(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def make_department(root, name, files):
+    folder = root / name / "2024"
+    folder.mkdir(parents=True)
+    for file in files:
+        (folder / file).parent.mkdir(parents=True, exist_ok=True)
+        (folder / file).write_bytes(b"data")
+    return f"{name}/2024", f"{name}/2025"
+
+
+def test_read_jobs(tmp_path):
+    path = write_jobs(tmp_path / "jobs.json", {
+        "defaults": {"year": 2025, "suffix": " (final)"},
+        "jobs": [
+            {"input": "a/2024", "output": "a/2025"},
+            {"input": "b", "output": "/elsewhere/b", "suffix": None, "rules": ["case upper"], "recursive": True},
+        ]
+    })
+    first, second = utils.read_jobs(path)
+    assert first.input == str(tmp_path / "a" / "2024")
+    assert (first.year, first.suffix, first.rules) == ("2025", " (final)", ())
+    assert second.output == "/elsewhere/b"
+    assert second.suffix is None and second.recursive
+    assert second.rules == (utils.Rule("case", ("upper",)),)
+
+
+@pytest.mark.parametrize("data, message", [
+    ([], "no jobs"),
+    ([{"input": "a"}], "job 1: 'output' is required"),
+    ([{"input": "a", "output": "b"}, {"input": "a", "output": "b", "sufix": "x"}], "job 2: unknown key 'sufix'"),
+    ([{"input": "a", "output": "b", "rules": ["case sideways"]}], "job 1: case 'sideways'"),
+    ([{"input": "a", "output": "b", "recursive": "yes"}], "'recursive' can't be 'yes'"),
+    ([{"input": "a", "output": "b", "use_year": False}], "nothing to do"),
+    ([{"input": "a", "output": "b", "year": 25}], "'year' must be four digits, got 25"),
+    ({"defaults": {"year": "2025/26"}, "jobs": [{"input": "a", "output": "b"}]}, "job 1: 'year' must be four digits"),
+    ({"defaults": ["year 2025"], "jobs": [{"input": "a", "output": "b"}]}, "'defaults' must be an object"),
+    ([{"input": "a", "output": "out"}, {"input": "b", "output": "./out/"}], "job 2: output folder overlaps"),
+    ([{"input": "a", "output": "out/a"}, {"input": "b", "output": "out"}], "job 2: output folder overlaps"),
+])
+def test_bad_jobs(tmp_path, data, message):
+    with pytest.raises(utils.JobError, match=message):
+        utils.read_jobs(write_jobs(tmp_path / "jobs.json", data))
+
+
+def test_batch_runs_every_job(tmp_path, journal_directory):
+    finance = make_department(tmp_path, "finance", ["DRAFT_budget_2024.xlsx", "notes.txt"])
+    hr = make_department(tmp_path, "hr", ["staff_2024.xlsx", "reviews/q4_2024.xlsx"])
+    path = write_jobs(tmp_path / "jobs.json", {
+        "defaults": {"year": "2025"},
+        "jobs": [
+            {"input": finance[0], "output": finance[1], "rules": ["remove-prefix DRAFT_"]},
+            {"input": hr[0], "output": hr[1], "recursive": True},
+            {"input": "missing/2024", "output": "missing/2025"},
+        ]
+    })
+    (tmp_path / "finance" / "2025").mkdir()
+    (tmp_path / "hr" / "2025").mkdir()
+
+    batch = utils.BatchRun(utils.read_jobs(path), parallel_jobs=2, io_limit=2)
+    statuses = batch.run()
+
+    assert [status.state for status in statuses] == ["done", "done", "failed"]
+    assert os.listdir(tmp_path / "finance" / "2025") == ["budget_2025.xlsx"]
+    assert (tmp_path / "hr" / "2025" / "reviews" / "q4_2025.xlsx").exists()
+    assert [status.copied for status in statuses] == [1, 2, 0]
+    assert batch.finished and batch.failed == 1
+    # Every finished job cleans up its own journal
+    assert os.listdir(journal_directory) == []
+
+
+def test_batch_creates_missing_output_folders(tmp_path):
+    input_folder, output_folder = make_department(tmp_path, "finance", ["budget_2024.xlsx"])
+    (tmp_path / "taken").write_bytes(b"a file, not a folder")
+    path = write_jobs(tmp_path / "jobs.json", {
+        "defaults": {"year": "2025"},
+        "jobs": [
+            {"input": input_folder, "output": output_folder},
+            {"input": input_folder, "output": "taken/2025"},
+            {"input": "missing/2024", "output": "missing/2025"},
+        ]
+    })
+
+    statuses = utils.BatchRun(utils.read_jobs(path), journal=False).run()
+
+    assert [status.state for status in statuses] == ["done", "failed", "failed"]
+    assert os.listdir(tmp_path / "finance" / "2025") == ["budget_2025.xlsx"]
+    assert statuses[1].error.startswith("can't create the output folder")
+    # Nothing to copy, so nothing created
+    assert not (tmp_path / "missing").exists()
+
+
+def test_batch_shares_the_io_limit(tmp_path, monkeypatch):
+    jobs = []
+    for name in ["a", "b", "c"]:
+        input_folder, output_folder = make_department(tmp_path, name, [f"{name}{i}_2024.xlsx" for i in range(4)])
+        (tmp_path / output_folder).mkdir()
+        jobs.append(utils.Job(str(tmp_path / input_folder), str(tmp_path / output_folder), year="2025"))
+
+    lock = threading.Lock()
+    copying = [0, 0]  # now, most at once
+    copy_file = copier.copy_file
+
+    def slow_copy(*args, **kwargs):
+        with lock:
+            copying[0] += 1
+            copying[1] = max(copying)
+        time.sleep(0.02)
+        with lock:
+            copying[0] -= 1
+        return copy_file(*args, **kwargs)
+
+    monkeypatch.setattr(copier, "copy_file", slow_copy)
+    batch = utils.BatchRun(jobs, parallel_jobs=3, io_limit=2, workers=4, journal=False)
+    batch.run()
+
+    assert [status.copied for status in batch.statuses] == [4, 4, 4]
+    assert copying[1] == 2
+
+
+def test_cancelled_while_planning_leaves_no_journal(tmp_path, journal_directory, monkeypatch):
+    input_folder, output_folder = make_department(tmp_path, "a", ["a_2024.xlsx"])
+    batch = utils.BatchRun([utils.Job(str(tmp_path / input_folder), str(tmp_path / output_folder))])
+    rename = batch_jobs.Rename
+
+    def cancel_while_planning(*args, **kwargs):
+        batch.cancel()
+        return rename(*args, **kwargs)
+
+    monkeypatch.setattr(batch_jobs, "Rename", cancel_while_planning)
+    (status,) = batch.run()
+
+    assert status.state == "cancelled" and status.engine is None
+    assert not journal_directory.exists()
@@ -0,0 +1,148 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import os
+import sys
+import time
+
+import pytest
+
+import utils
+import constants as c
+from utils import listing, watch
+
+
+def test_list_files_sorts_excel_first(tmp_path):
+    for name in ["b.txt", "b.xlsx", "a.txt", "a.XLSX"]:
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "folder.xlsx").mkdir()
+
+    snapshot = utils.list_files(str(tmp_path))
+    assert snapshot.files == ("a.XLSX", "b.xlsx", "a.txt", "b.txt")
+    assert "folder.xlsx" not in snapshot.names
+
+
+def set_mtime(path, seconds_ago: float) -> None:
+    ns: int = time.time_ns() - int(seconds_ago * 1e9)
+    os.utime(path, ns=(ns, ns))
+
+
+def test_list_files_is_cached_until_the_folder_changes(tmp_path, monkeypatch):
+    (tmp_path / "a.xlsx").write_bytes(b"")
+    set_mtime(tmp_path, 60)
+    first = utils.list_files(str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("folder should not be rescanned")
+
+    monkeypatch.setattr(os, "scandir", fail)
+    assert utils.list_files(str(tmp_path)) is first
+    monkeypatch.undo()
+
+    (tmp_path / "b.xlsx").write_bytes(b"")
+    set_mtime(tmp_path, 30)
+    assert utils.list_files(str(tmp_path)).files == ("a.xlsx", "b.xlsx")
+
+
+def test_list_files_rescans_recently_changed_folders(tmp_path):
+    first = utils.list_files(str(tmp_path))
+    # The folder's mtime could still be the same after this file lands
+    (tmp_path / "a.xlsx").write_bytes(b"")
+    os.utime(tmp_path, ns=(first.mtime_ns, first.mtime_ns))
+    assert utils.list_files(str(tmp_path)).files == ("a.xlsx",)
+
+
+def test_invalidate_forces_a_rescan(tmp_path):
+    first = utils.list_files(str(tmp_path))
+    utils.invalidate(str(tmp_path))
+    assert utils.list_files(str(tmp_path)) is not first
+
+
+def test_folder_scan_streams_batches_and_fills_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(c, "SCAN_BATCH_SIZE", 2)
+    for name in ["e.txt", "d.xlsx", "c.txt", "b.xlsx", "a.txt"]:
+        (tmp_path / name).write_bytes(b"")
+    set_mtime(tmp_path, 60)
+
+    scan = utils.FolderScan(str(tmp_path)).start()
+    assert scan.wait(5)
+    assert sorted(scan.poll()) == ["a.txt", "b.xlsx", "c.txt", "d.xlsx", "e.txt"]
+    assert scan.snapshot.files == ("b.xlsx", "d.xlsx", "a.txt", "c.txt", "e.txt")
+    assert utils.list_files(str(tmp_path)) is scan.snapshot
+
+
+def test_folder_scan_cancel(tmp_path):
+    for i in range(10):
+        (tmp_path / f"{i}.xlsx").write_bytes(b"")
+    scan = utils.FolderScan(str(tmp_path))
+    scan.cancel()
+    scan.start().wait(5)
+
+    assert scan.snapshot is None and scan.error is None
+    assert scan.poll() == []
+
+
+def test_folder_scan_error(tmp_path):
+    scan = utils.FolderScan(str(tmp_path / "missing")).start()
+    scan.wait(5)
+    assert isinstance(scan.error, FileNotFoundError)
+
+
+def test_apply_changes_patches_the_cached_listing(tmp_path):
+    for name in ["a.xlsx", "b.txt"]:
+        (tmp_path / name).write_bytes(b"")
+    utils.list_files(str(tmp_path))
+
+    (tmp_path / "a.xlsx").unlink()
+    (tmp_path / "c.xlsx").write_bytes(b"")
+    (tmp_path / "d").mkdir()
+    snapshot = listing.apply_changes(str(tmp_path), ["a.xlsx", "c.xlsx", "d"])
+    assert snapshot.files == ("c.xlsx", "b.txt")
+    assert snapshot.entries == {"b.txt", "c.xlsx", "d"}
+    assert listing.cached(str(tmp_path)) is snapshot
+
+
+def test_apply_changes_needs_a_listing(tmp_path):
+    assert listing.apply_changes(str(tmp_path), ["a.xlsx"]) is None
+
+
+@pytest.mark.parametrize("backend", [watch.PollingWatcher, watch.InotifyWatcher])
+def test_watcher_reports_new_files(tmp_path, monkeypatch, backend):
+    if backend is watch.InotifyWatcher and not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux only")
+    monkeypatch.setattr(c, "WATCH_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(c, "WATCH_BATCH_SECONDS", 0.05)
+    utils.list_files(str(tmp_path))
+    watcher = backend()
+    try:
+        watcher.set_folders([str(tmp_path)])
+        (tmp_path / "a.xlsx").write_bytes(b"")
+        # The polling watcher only sees a change in the folder's mtime
+        os.utime(tmp_path, ns=(0, time.time_ns() + 10 ** 9))
+
+        changes = []
+        deadline = time.monotonic() + 5
+        while not changes and time.monotonic() < deadline:
+            changes = watcher.poll()
+            time.sleep(0.02)
+    finally:
+        watcher.close()
+
+    assert [change.names for change in changes] == [frozenset({"a.xlsx"})]
+    assert changes[0].snapshot.files == ("a.xlsx",)
+
+
+def test_watcher_needs_a_backend():
+    class Incomplete(watch.Watcher):
+        def _add(self, key, folder):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
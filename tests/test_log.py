@@ -0,0 +1,48 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import os
+
+from loguru import logger
+
+import constants as c
+from utils import log
+from utils.general import get_today
+
+
+def test_setup_adds_each_log_once_and_only_writes_on_demand(tmp_path, monkeypatch):
+    directory = tmp_path / "logs"
+    monkeypatch.setattr(c, "LOG_DIRECTORY", str(directory))
+    try:
+        log.setup()
+        log.setup()
+        assert not directory.exists()
+        logger.info("hello")
+    finally:
+        log.close()  # Waits for the queue to be written
+
+    # Not a span, so nothing for the spans log
+    assert os.listdir(directory) == [f"gui_app_{get_today()}_.log"]
+    with open(directory / os.listdir(directory)[0], encoding="utf-8") as f:
+        assert f.read().count("hello") == 1
+
+
+def test_sample_counts_the_rest():
+    assert log.sample([]) == "none"
+    assert log.sample(["a", "b"], limit=5) == "a, b"
+    assert log.sample(["a", "b", "c"], limit=2) == "a, b and 1 more"
+    assert log.sample((f"{i}.xlsx" for i in range(1000)), total=1000, limit=2) == "0.xlsx, 1.xlsx and 998 more"
+
+
+def test_sample_takes_only_what_it_shows():
+    taken = []
+    items = (taken.append(i) or i for i in range(1000))
+    assert log.sample(items, total=1000, limit=2) == "0, 1 and 998 more"
+    assert taken == [0, 1]
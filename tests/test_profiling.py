@@ -0,0 +1,43 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import pstats
+import threading
+
+import main
+import constants as c
+from utils import profiling
+
+
+def busy_work() -> int:
+    return sum(i * i for i in range(10000))
+
+
+def test_profiled_writes_profile_and_report(tmp_path):
+    with profiling.profiled("test", directory=str(tmp_path)) as written:
+        worker = threading.Thread(target=busy_work)
+        worker.start()
+        worker.join()
+        data = [bytearray(1024) for _ in range(100)]
+
+    functions = {name for _, _, name in pstats.Stats(written["prof"]).stats}
+    assert "busy_work" in functions  # Profiled on its own thread
+    with open(written["report"], encoding="utf-8") as f:
+        report: str = f.read()
+    assert "allocations" in report and "test_profiling.py" in report
+    assert len(data) == 100
+
+
+def test_profile_switches(monkeypatch):
+    monkeypatch.delenv(c.PROFILE_ENVIRONMENT_VARIABLE, raising=False)
+    assert not main.profiling_enabled([])
+    assert main.profiling_enabled(["--profile"])
+    monkeypatch.setenv(c.PROFILE_ENVIRONMENT_VARIABLE, "1")
+    assert main.profiling_enabled([])
@@ -19,24 +19,16 @@ import shutil
 
 ROOT_DIR: str = os.path.dirname(os.path.abspath(__file__))
 backup_path = pathlib.Path(os.path.join(ROOT_DIR, "backup"))
-input_path = pathlib.Path(os.path.join(ROOT_DIR, "input"))
-output_path = pathlib.Path(os.path.join(ROOT_DIR, "output"))
-
-# delete input folder and copy over backup files
-if input_path.exists():
-    for f in input_path.iterdir():
-        f.unlink()
-else:
-    input_path.mkdir()
-
-for f in backup_path.iterdir():
-    shutil.copy(f, input_path / f.name)
-
-if output_path.exists():
-    for f in output_path.iterdir():
-        f.unlink()
-else:
+
+
+@pytest.fixture
+def folders(tmp_path):
+    # Fresh copies of the backup files for every test
+    input_path = tmp_path / "input"
+    output_path = tmp_path / "output"
+    shutil.copytree(backup_path, input_path)
     output_path.mkdir()
+    return input_path, output_path
 
 
 def check_output_file_exists(registry: Registry):
@@ -55,7 +47,8 @@ def check_output_file_exists(registry: Registry):
         pytest.param("report1234.xlsx", "report1234 (2025).xlsx", id="4 digit, not a year")
     ]
 )
-def test_rename_year(input_file, expected_output):
+def test_rename_year(input_file, expected_output, folders):
+    input_path, output_path = folders
     registry: Registry = Registry(
         input_folder_root=str(input_path.absolute()),
         output_folder_root=str(output_path.absolute()),
@@ -86,7 +79,8 @@ def test_rename_year(input_file, expected_output):
         pytest.param("report1234.xlsx", "report1234 (my suffix).xlsx", id="4 digit, not a year")
     ]
 )
-def test_suffix(input_file, expected_output):
+def test_suffix(input_file, expected_output, folders):
+    input_path, output_path = folders
     registry: Registry = Registry(
         input_folder_root=str(input_path.absolute()),
         output_folder_root=str(output_path.absolute()),
@@ -117,7 +111,8 @@ def test_suffix(input_file, expected_output):
         pytest.param("report1234.xlsx", "report1234 (2025) (my suffix).xlsx", id="4 digit, not a year")
     ]
 )
-def test_rename_year_and_suffix(input_file, expected_output):
+def test_rename_year_and_suffix(input_file, expected_output, folders):
+    input_path, output_path = folders
     registry: Registry = Registry(
         input_folder_root=str(input_path.absolute()),
         output_folder_root=str(output_path.absolute()),
@@ -136,3 +131,104 @@ def test_rename_year_and_suffix(input_file, expected_output):
 
     utils.apply_rename_to_registry(registry)
     check_output_file_exists(registry)
+
+
+@pytest.mark.parametrize(
+    "name, expected_output",
+    [
+        pytest.param("2024_budget_12024.xlsx", "_budget_12024 (2025).xlsx", id="only the matched digits"),
+        pytest.param("2023 vs 2024.xlsx", " vs  (2025).xlsx", id="all years removed"),
+        pytest.param("v1000 2024.xlsx", "v1000  (2025).xlsx", id="non-year token kept"),
+        pytest.param("notes.xlsx", "notes (2025).xlsx", id="no digits"),
+    ]
+)
+def test_rename_year_spans(name, expected_output):
+    registry: Registry = Registry(selected_year="2025")
+    renamer = utils.Rename(registry=registry, plan=False)
+    assert renamer.rename_year(name) == expected_output
+
+
+def test_plan_is_memoized_and_conflicts_are_not(tmp_path):
+    registry: Registry = Registry(
+        input_folder_root=str(tmp_path),
+        output_folder_root=str(tmp_path),
+        selected_files={"memo_2024.xlsx": True},
+        selected_year="2025",
+        use_year=True
+    )
+    utils.Rename(registry=registry)
+    assert registry.rename_mapping == {"memo_2024.xlsx": "memo_2025.xlsx"}
+
+    hits: int = utils.plan_name.cache_info().hits
+    (tmp_path / "memo_2025.xlsx").write_bytes(b"")
+    utils.Rename(registry=registry)
+    assert utils.plan_name.cache_info().hits == hits + 1
+    assert registry.rename_mapping == {}
+
+
+def test_conflicts_within_batch_and_with_folders(tmp_path):
+    (tmp_path / "taken_2025.xlsx").mkdir()
+    registry: Registry = Registry(
+        input_folder_root=str(tmp_path),
+        output_folder_root=str(tmp_path),
+        selected_files={
+            "taken_2024.xlsx": True,
+            "dup_2023.xlsx": True,
+            "dup_2024.xlsx": True,
+            "free_2024.xlsx": True,
+        },
+        selected_year="2025",
+        use_year=True
+    )
+    renamer = utils.Rename(registry=registry)
+    assert registry.rename_mapping == {
+        "dup_2023.xlsx": "dup_2025.xlsx",
+        "free_2024.xlsx": "free_2025.xlsx",
+    }
+    assert renamer.conflicts == {
+        "taken_2024.xlsx": "taken_2025.xlsx",
+        "dup_2024.xlsx": "dup_2025.xlsx",
+    }
+    assert {file.name: file.conflict for file in registry.files.conflicts()} == renamer.conflicts
+
+
+def test_planning_records_spans(tmp_path):
+    utils.STATS.reset()
+    registry: Registry = Registry(
+        input_folder_root=str(tmp_path),
+        output_folder_root=str(tmp_path),
+        selected_files={"a_2024.xlsx": True, "b_2024.xlsx": True, "c_2024.txt": False},
+        selected_year="2025",
+        use_year=True
+    )
+    utils.Rename(registry=registry)
+    stages = utils.STATS.snapshot()
+
+    assert stages["planning"].calls == 1
+    assert stages["planning"].count == 2
+    assert stages["conflicts"].count == 2
+    assert stages["listing"].calls == 1
+
+
+def test_plan_tree_claims_names_per_output_folder(tmp_path):
+    # "2023 Dept" and "2024 Dept" both become "2025 Dept", with "2023 Other"
+    # walked in between
+    input_path = tmp_path / "input"
+    for folder, name in (("2023 Dept", "a.xlsx"), ("2023 Other", "b.xlsx"), ("2024 Dept", "a.xlsx")):
+        (input_path / folder).mkdir(parents=True, exist_ok=True)
+        (input_path / folder / name).write_bytes(b"data")
+    registry: Registry = Registry(
+        input_folder_root=str(input_path),
+        output_folder_root=str(tmp_path / "output"),
+        selected_files={},
+        selected_year="2025",
+        use_year=True
+    )
+    renamer = utils.Rename(registry=registry, plan=False)
+    pairs = dict(renamer.plan_tree(lambda path: True))
+
+    assert sorted(pairs.values()) == [
+        os.path.join("2025 Dept", "a (2025).xlsx"),
+        os.path.join("2025 Other", "b (2025).xlsx"),
+    ]
+    assert list(renamer.conflicts.values()) == [os.path.join("2025 Dept", "a (2025).xlsx")]
@@ -0,0 +1,150 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import pytest
+
+import constants as c
+import utils
+from utils import rules
+from gui.structures import Registry
+from benchmarks.synthetic import synthetic_names
+
+
+@pytest.mark.parametrize("lines, name, expected_output", [
+    (["remove-prefix DRAFT_"], "DRAFT_budget.xlsx", "budget.xlsx"),
+    (["remove-prefix DRAFT_"], "budget.xlsx", "budget.xlsx"),
+    (["remove-prefix -i draft_"], "DRAFT_budget.xlsx", "budget.xlsx"),
+    (["replace '\\s+' _"], "my  budget v2.xlsx", "my_budget_v2.xlsx"),
+    (["replace -i 'final' FINAL"], "Final.report.xlsx", "FINAL.report.xlsx"),
+    (["replace '(\\w+)-(\\w+)' '\\2-\\1'"], "a-b.xlsx", "b-a.xlsx"),
+    (["template {stem}_{year}"], "budget.xlsx", "budget_2025.xlsx"),
+    (["template '{stem} ({ext})'"], "budget.xlsx", "budget (.xlsx).xlsx"),
+    (["case upper"], "budget.xlsx", "BUDGET.xlsx"),
+    (["case title", "# comments and blank lines are skipped", ""], "my budget.XLSX", "My Budget.XLSX"),
+    (["year"], "budget_2024.xlsx", "budget_2025.xlsx"),
+    (["suffix ' (final)'"], "budget.xlsx", "budget (final).xlsx"),
+    (["remove-prefix DRAFT_", "case lower", "year", "suffix _v1"], "DRAFT_Budget 2024.xlsx", "budget 2025_v1.xlsx"),
+])
+def test_rules(lines, name, expected_output):
+    pipeline = utils.compile_rules(utils.parse_rules(lines), "2025")
+    assert pipeline(name) == expected_output
+
+
+def test_numbered_template():
+    pipeline = utils.compile_rules(utils.parse_rules(["template {stem}_{year}_{n:03}"]), "2025")
+    assert pipeline.numbered
+    assert pipeline("budget.xlsx", 7) == "budget_2025_007.xlsx"
+    assert not utils.compile_rules(utils.parse_rules(["template {stem}_{year}"]), "2025").numbered
+
+
+@pytest.mark.parametrize("line", [
+    "rename everything",
+    "replace only-one-argument",
+    "replace '(' x",
+    "replace a '\\1'",
+    "template {stem}_{month}",
+    "template {stem",
+    "template {stem.upper}",
+    "template {name[0]}",
+    "template '{n:{stem.__class__}}'",
+    "template {0}",
+    "template '{n:q}'",
+    "template '../../escaped_{stem}'",
+    "replace _ /",
+    "suffix ' (final)/'",
+    "case sideways",
+    "year 2025",
+    "suffix 'unclosed",
+    "",
+    "# note",
+])
+def test_bad_rules(line):
+    with pytest.raises(utils.RuleError):
+        utils.parse_rule(line)
+
+
+def test_rule_round_trips():
+    rule = utils.parse_rule("replace -i '\\s+' ' - '")
+    assert rule == utils.Rule("replace", ("\\s+", " - "), ignore_case=True)
+    assert utils.parse_rule(str(rule)) == rule
+
+
+def test_rules_run_before_the_year_and_suffix(tmp_path):
+    registry: Registry = Registry(
+        input_folder_root=str(tmp_path),
+        output_folder_root=str(tmp_path),
+        selected_files={"DRAFT_b_2024.xlsx": True, "DRAFT_a_2024.xlsx": True, "c_2024.xlsx": False},
+        selected_year="2025",
+        selected_suffix=" (final)",
+        use_year=True,
+        use_suffix=True,
+        rules=utils.parse_rules(["remove-prefix DRAFT_", "template {stem}_{n}"])
+    )
+    utils.Rename(registry=registry)
+    assert registry.rename_mapping == {
+        "DRAFT_b_2024.xlsx": "b_2025_1 (final).xlsx",
+        "DRAFT_a_2024.xlsx": "a_2025_2 (final).xlsx",
+    }
+    # The preview numbers the files the same way as the plan
+    preview = utils.Rename(registry=registry, plan=False)
+    assert preview.propose("DRAFT_a_2024.xlsx") == "a_2025_2 (final).xlsx"
+    # ... with the same compiled pipeline
+    hits: int = rules.compile_rules.cache_info().hits
+    assert utils.Rename(registry=registry, plan=False).pipeline is preview.pipeline
+    assert rules.compile_rules.cache_info().hits == hits + 1
+
+
+@pytest.mark.parametrize("bulk_threshold", [1, 1000])
+def test_names_that_are_not_names_conflict(bulk_threshold, monkeypatch):
+    monkeypatch.setattr(c, "RENAME_BULK_THRESHOLD", bulk_threshold)
+    registry: Registry = Registry(
+        selected_files={"DRAFT_": True, "DRAFT_..": True, "DRAFT_a.xlsx": True},
+        rules=utils.parse_rules(["remove-prefix DRAFT_"])
+    )
+    renamer = utils.Rename(registry=registry)
+    assert registry.rename_mapping == {"DRAFT_a.xlsx": "a.xlsx"}
+    assert renamer.conflicts == {"DRAFT_": "", "DRAFT_..": ".."}
+
+
+EDGE_NAMES = [
+    "no extension 2024", ".hidden", "trailing dot 2024.", "x12024.xlsx", "2024 and 2025.xlsx",
+    "1990.xlsx", "DRAFT_.xlsx", "draft_Mixed Case 2024.XLSX", "20242024.xlsx",
+]
+
+
+@pytest.mark.parametrize("lines", [
+    ["year"],
+    ["suffix ' (final)'"],
+    ["year", "suffix _v2"],
+    ["remove-prefix -i draft_", "replace '[\\s-]+' _", "case lower", "year"],
+    ["replace '(\\w+)_(\\d{4})' '\\2_\\1'", "template {stem}_{year}_{n:05}", "suffix x"],
+    ["case upper", "remove-prefix BUDGET", "template '{name} {ext}'", "year"],
+    ["template '{{{stem!r:>30}}} {year:.2} {n:x}'"],
+    ["template {stem}{n:{n}}"],
+    ["template fixed"],
+])
+def test_bulk_plan_matches_per_name(lines, monkeypatch):
+    names = synthetic_names(5000) + EDGE_NAMES
+    pipeline = utils.compile_rules(utils.parse_rules(lines), "2025", "2005", "2045")
+    assert pipeline.plan(names, start=3) == [pipeline(name, n) for n, name in enumerate(names, 3)]
+
+    # ... and Rename plans the same table either way
+    registry: Registry = Registry(
+        selected_files={name: True for name in names if name},
+        selected_year="2025",
+        use_year=True,
+        rules=utils.parse_rules(lines)
+    )
+    monkeypatch.setattr(c, "RENAME_BULK_THRESHOLD", len(names) + 1)
+    utils.Rename(registry=registry)
+    per_name = dict(registry.rename_mapping)
+    monkeypatch.setattr(c, "RENAME_BULK_THRESHOLD", 1)
+    utils.Rename(registry=registry)
+    assert dict(registry.rename_mapping) == per_name
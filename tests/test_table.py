@@ -0,0 +1,61 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+import os
+
+from gui.structures import Registry
+from utils.table import FileTable
+
+
+def test_registry_dicts_are_views_of_the_table():
+    registry = Registry(
+        selected_files={"a.xlsx": True, "b.txt": False},
+        rename_mapping={"c.xlsx": "c_2025.xlsx"}
+    )
+    assert registry.selected_files == {"a.xlsx": True, "b.txt": False, "c.xlsx": True}
+    assert registry.rename_mapping == {"c.xlsx": "c_2025.xlsx"}
+
+    registry.selected_files["b.txt"] = True
+    assert registry.files.is_selected("b.txt")
+    registry.rename_mapping = {}
+    assert len(registry.rename_mapping) == 0 and len(registry.files) == 3
+
+
+def test_extend_keeps_the_selection_of_known_files():
+    table = FileTable()
+    assert table.extend(["a.xlsx", "b.txt"], lambda name: name.endswith(".xlsx")) == 2
+    table.select("a.xlsx", False)
+    assert table.extend(["a.xlsx", "c.xlsx"], lambda name: True) == 1
+    assert list(table.names(lambda file: file.selected)) == ["c.xlsx"]
+
+
+def test_selected_count_follows_every_change():
+    table = FileTable.from_dicts({"a.xlsx": True, "b.txt": False})
+    table.extend(["c.xlsx", "d.txt"], lambda name: name.endswith(".xlsx"))
+    table.select("b.txt", True)
+    table.select("a.xlsx", True)
+    table.propose("e.xlsx", "e_2025.xlsx")
+    table.remove("c.xlsx")
+    assert table.selected_count == sum(record.selected for record in table) == 3
+    assert table.copy().selected_count == 3
+    table.clear()
+    assert table.selected_count == 0
+
+
+def test_stat_reads_sizes(tmp_path):
+    (tmp_path / "a.xlsx").write_bytes(b"12345")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.xlsx").write_bytes(b"1")
+    table = FileTable()
+    table.extend(["a.xlsx", os.path.join("sub", "b.xlsx"), "missing.xlsx"], lambda name: True)
+    table.stat(str(tmp_path))
+
+    assert [(file.name, file.size) for file in table] == [("a.xlsx", 5), (os.path.join("sub", "b.xlsx"), 1), ("missing.xlsx", -1)]
+    assert table.get("a.xlsx").mtime_ns == (tmp_path / "a.xlsx").stat().st_mtime_ns
@@ -1,10 +1,97 @@
-from utils.general import (
-    log_args,
-    get_year_range,
-    get_current_year,
-    format_path_display
-)
-from utils.rename import (
-    Rename,
-    apply_rename_to_registry
+# Everything here is imported on first use, so `import utils` doesn't pull in
+# the copier's thread and process pools before the window is even up. The
+# submodules can still be imported directly (`from utils import listing`).
+# PyInstaller can't follow these imports, so the Makefile bundles every
+# submodule with --collect-submodules utils (tests/test_bundle.py checks it).
+
+import importlib
+from typing import (
+    Dict,
+    Tuple
 )
+
+# name -> (module, name in that module)
+EXPORTS: Dict[str, Tuple[str, str]] = {
+    **{name: ("utils.general", name) for name in (
+        "log_args",
+        "get_year_range",
+        "get_current_year",
+        "is_year",
+        "format_path_display",
+    )},
+    **{name: ("utils.rename", name) for name in (
+        "Rename",
+        "plan_name",
+        "apply_rename_to_registry",
+    )},
+    **{name: ("utils.rules", name) for name in (
+        "Rule",
+        "RuleError",
+        "Pipeline",
+        "parse_rule",
+        "parse_rules",
+        "compile_rules",
+    )},
+    **{name: ("utils.copier", name) for name in (
+        "CopyEngine",
+        "CopyProgress",
+        "CopyResult",
+        "copy_file",
+    )},
+    **{name: ("utils.listing", name) for name in (
+        "DirectorySnapshot",
+        "FolderScan",
+        "list_files",
+        "is_excel",
+        "is_selected",
+        "invalidate",
+    )},
+    "STRATEGIES": ("utils.fastcopy", "STRATEGIES"),
+    **{name: ("utils.dedup", name) for name in (
+        "DedupStore",
+        "default_store",
+    )},
+    **{name: ("utils.journal", name) for name in (
+        "Journal",
+        "read_journal",
+        "unfinished_journals",
+    )},
+    "CHECKSUM_ALGORITHMS": ("utils.verify", "ALGORITHMS"),
+    "CHECKSUM_MANIFESTS": ("utils.verify", "MANIFESTS"),
+    **{name: ("utils.verify", name) for name in (
+        "checksum_file",
+        "read_manifest",
+    )},
+    **{name: ("utils.spans", name) for name in (
+        "STATS",
+        "span",
+        "is_span",
+    )},
+    **{name: ("utils.jobs", name) for name in (
+        "BatchRun",
+        "Job",
+        "JobError",
+        "JobStatus",
+        "read_jobs",
+    )},
+    **{name: ("utils.watch", name) for name in (
+        "FolderChanges",
+        "Watcher",
+        "new_watcher",
+    )},
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in EXPORTS:
+        raise AttributeError(f"module 'utils' has no attribute {name!r}")
+    module, attribute = EXPORTS[name]
+    value = getattr(importlib.import_module(module), attribute)
+    globals()[name] = value  # Only looked up the slow way once
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
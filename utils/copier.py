@@ -0,0 +1,398 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+
+import os
+import time
+import errno
+import queue
+import itertools
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TYPE_CHECKING
+)
+
+import constants as c
+from utils import fastcopy
+from utils.dedup import DedupStore
+from utils.journal import Journal
+from utils.spans import record_span
+from utils.table import FileTable
+from utils.verify import (
+    ALGORITHMS as CHECKSUM_ALGORITHMS,
+    checksum_file,
+    new_hasher,
+    write_manifest
+)
+
+if TYPE_CHECKING:
+    from gui.structures import Registry
+
+
+@dataclass
+class CopyResult:
+    from_name: str
+    to_name: str
+    size: int = 0
+    seconds: float = 0.0
+    status: str = "pending"
+    strategy: str = ""
+    digest: str = ""
+    checksum: str = ""
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "copied"
+
+
+@dataclass
+class CopyProgress:
+    done: int
+    total: int
+    result: CopyResult
+
+
+# Numbers the temporary files of this process
+PARTIALS: Iterator[int] = itertools.count()
+
+
+def partial_path(destination: str) -> str:
+    # Unique per copy, so two copies racing for the same destination (two
+    # jobs, or two runs on one share) never write into each other's temporary
+    # file. Short and of a fixed length, so a destination name that only just
+    # fits the file system's limit still gets one.
+    name: str = f"{c.COPY_PARTIAL_PREFIX}{os.getpid():x}-{next(PARTIALS):x}{c.COPY_PARTIAL_SUFFIX}"
+    return os.path.join(os.path.dirname(destination), name)
+
+
+def is_contained(name: str) -> bool:
+    # A path relative to the output folder that stays inside it: no drive or
+    # root, and no empty, "." or ".." parts
+    if os.path.isabs(name) or os.path.splitdrive(name)[0]:
+        return False
+    parts: List[str] = name.replace(os.altsep, os.sep).split(os.sep) if os.altsep else name.split(os.sep)
+    return all(part not in ("", ".", "..") for part in parts)
+
+
+def copy_file(
+    input_folder_root: str,
+    output_folder_root: str,
+    from_name: str,
+    to_name: str,
+    overwrite: bool = True,
+    strategy: str = "auto",
+    dedup: Optional[DedupStore] = None,
+    digest: Optional[str] = None,
+    hasher=None
+) -> Tuple[str, int]:
+    source: str = os.path.join(input_folder_root, from_name)
+    destination: str = os.path.join(output_folder_root, to_name)
+    if os.path.dirname(to_name):
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+
+    # Copy under a temporary name and rename it into place, so the destination
+    # is never a half written file
+    partial: str = partial_path(destination)
+    try:
+        if dedup is not None:
+            copied: Tuple[str, int] = dedup.materialize(source, partial, digest=digest)
+        else:
+            copied = fastcopy.copy(source, partial, strategy=strategy, hasher=hasher)
+        if not overwrite and os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), destination)
+        os.replace(partial, destination)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(partial)
+        raise
+    return copied
+
+
+class CopyEngine:
+    # Copies are spread over a pool of workers. A planned run (the planned
+    # files of the registry's table) goes biggest files first so the slowest copy isn't left
+    # until the end. A streamed run (`pairs`, e.g. from Rename.plan_tree)
+    # starts copying while the plan is still being produced, and only keeps
+    # the results that didn't copy so memory stays flat.
+    # With `start` the pool runs off the UI thread and progress goes onto a
+    # bounded queue that the GUI drains every frame. Cancelling is only
+    # checked between files.
+    # With a `journal`, every file is written to it before it's copied and
+    # again once it's in place, see utils.journal. A planned run journals the
+    # whole plan up front, a streamed run as the plan is produced.
+    # With `verify` (one of CHECKSUM_ALGORITHMS), every file is hashed as it's
+    # copied and the checksums go into a manifest in the output folder.
+    # With `slots`, a semaphore shared by several engines (see utils.jobs),
+    # every copy holds a slot, so all of them together never copy more files
+    # at once than it allows.
+    def __init__(
+        self,
+        registry: 'Registry',
+        workers: Optional[int] = None,
+        pairs: Optional[Iterable[Tuple[str, str]]] = None,
+        strategy: Optional[str] = None,
+        dedup: Optional[DedupStore] = None,
+        journal: Optional[Journal] = None,
+        verify: Optional[str] = None,
+        slots: Optional[threading.Semaphore] = None
+    ) -> None:
+        # Snapshot the registry, the user can keep clicking around while we copy
+        self.input_folder_root: str = registry.input_folder_root
+        self.output_folder_root: str = registry.output_folder_root
+        self.files: FileTable = registry.files.copy(lambda file: file.proposed is not None) if pairs is None else FileTable()
+        self.pairs: Optional[Iterable[Tuple[str, str]]] = pairs
+        self.workers: int = max(1, workers or c.COPY_WORKERS)
+        self.strategy: str = strategy or c.COPY_STRATEGY
+        self.dedup: Optional[DedupStore] = dedup
+        self.journal: Optional[Journal] = journal
+        if verify is not None and verify not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Unknown checksum {verify!r}, expected one of {CHECKSUM_ALGORITHMS}")
+        self.verify: Optional[str] = verify
+        self.slots: Optional[threading.Semaphore] = slots
+        self.checksums: Dict[str, str] = {}
+        self.manifest: Optional[str] = None
+        self.manifest_error: Optional[str] = None
+        self.events: Optional[queue.Queue] = None
+        self.report: List[CopyResult] = []
+        self.queued: int = 0
+        self.copied: int = 0
+        self.copied_bytes: int = 0
+        self.failed: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._cancel: threading.Event = threading.Event()
+        self._finished: threading.Event = threading.Event()
+
+    @property
+    def streaming(self) -> bool:
+        return self.pairs is not None
+
+    @property
+    def total(self) -> int:
+        # While streaming, this grows as the plan is produced
+        return self.queued if self.streaming else len(self.files)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def start(self) -> None:
+        self.events = queue.Queue(maxsize=c.COPY_QUEUE_SIZE)
+        threading.Thread(
+            target=self._run,
+            name="rollover_copy",
+            daemon=True
+        ).start()
+
+    def run(self) -> List[CopyResult]:
+        self._run()
+        return self.report
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def poll(self) -> List[CopyProgress]:
+        events: List[CopyProgress] = []
+        while self.events is not None:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _publish(self, event: CopyProgress) -> None:
+        if self.events is None:
+            return
+        # The queue is bounded, so wait for the GUI to catch up, unless the
+        # user gave up on the run in the meantime.
+        while not self._cancel.is_set():
+            try:
+                self.events.put(event, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _plan(self) -> List[CopyResult]:
+        self.files.stat(self.input_folder_root)
+        self.files.sort(key=lambda file: file.size, reverse=True)
+        # A file that couldn't be stat-ed goes last, the copy reports the problem
+        return [
+            CopyResult(from_name=file.name, to_name=file.proposed, size=max(file.size, 0))
+            for file in self.files
+        ]
+
+    def _copy(self, result: CopyResult) -> Tuple[int, CopyResult]:
+        start: float = time.perf_counter()
+        try:
+            if not is_contained(result.to_name):
+                # Planning flags these, this is the last line before the disk
+                raise OSError(errno.EINVAL, "not a name inside the output folder", result.to_name)
+            if self.dedup is not None and not result.digest:
+                result.digest = self.dedup.digest(os.path.join(self.input_folder_root, result.from_name))
+            # Dedup links a blob, there is no copy to hash on the way through
+            hasher = new_hasher(self.verify) if self.verify and self.dedup is None else None
+            result.strategy, result.size = copy_file(
+                self.input_folder_root,
+                self.output_folder_root,
+                result.from_name,
+                result.to_name,
+                overwrite=not self.streaming,
+                strategy=self.strategy,
+                dedup=self.dedup,
+                digest=result.digest or None,
+                hasher=hasher
+            )
+            if hasher is not None:
+                result.checksum = hasher.hexdigest()
+            elif self.verify == "blake2b":
+                result.checksum = result.digest  # The store hashes with blake2b too
+            elif self.verify:
+                result.checksum = checksum_file(
+                    os.path.join(self.output_folder_root, result.to_name),
+                    self.verify
+                )
+            result.status = "copied"
+            if self.journal is not None:
+                self.journal.done(result.from_name, result.to_name)
+        except OSError as e:
+            result.status = "failed"
+            result.error = str(e)
+        result.seconds = time.perf_counter() - start
+        record_span(
+            "copy",
+            result.seconds,
+            file=result.to_name,
+            status=result.status,
+            strategy=result.strategy,
+            count=1,
+            bytes=result.size if result.ok else 0
+        )
+
+        with self._lock:
+            if result.ok:
+                self.copied += 1
+                self.copied_bytes += result.size
+                if self.verify:
+                    self.checksums[result.to_name] = result.checksum
+            else:
+                self.failed += 1
+                if self.streaming:
+                    self.report.append(result)
+            done: int = self.copied + self.failed
+        return done, result
+
+    def _work(self, todo: queue.Queue) -> None:
+        while not self._cancel.is_set():
+            try:
+                result: Optional[CopyResult] = todo.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if result is None:
+                return
+            # Waiting for a slot doesn't count towards the copy's time
+            with self.slots if self.slots is not None else contextlib.nullcontext():
+                done, result = self._copy(result)
+            self._publish(CopyProgress(done=done, total=self.total, result=result))
+
+    def _put(self, todo: queue.Queue, item: Optional[CopyResult]) -> bool:
+        while not self._cancel.is_set():
+            try:
+                todo.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self) -> Iterator[CopyResult]:
+        if not self.streaming:
+            self.report = self._plan()
+            if self.dedup is not None:
+                # Hash the whole batch up front, over all the cores
+                digests: dict = self.dedup.digests([
+                    os.path.join(self.input_folder_root, result.from_name)
+                    for result in self.report
+                ])
+                for result in self.report:
+                    result.digest = digests.get(os.path.join(self.input_folder_root, result.from_name), "")
+            if self.journal is not None:
+                self.journal.planned_many((result.from_name, result.to_name) for result in self.report)
+            yield from self.report
+            return
+        for from_name, to_name in self.pairs:
+            if self.journal is not None:
+                self.journal.planned(from_name, to_name)
+            yield CopyResult(from_name=from_name, to_name=to_name)
+
+    def _run(self) -> None:
+        start: float = time.perf_counter()
+        completed: bool = False
+        try:
+            # Once, before any worker starts. copy_file only makes the
+            # subfolders of a name, and if this fails every copy says why.
+            with contextlib.suppress(OSError):
+                os.makedirs(self.output_folder_root, exist_ok=True)
+            workers: int = self.workers if self.streaming else min(self.workers, max(1, self.total))
+            todo: queue.Queue = queue.Queue(maxsize=workers * 4)
+            with ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="rollover_copy"
+            ) as executor:
+                futures: list = [executor.submit(self._work, todo) for _ in range(workers)]
+                try:
+                    for result in self._produce():
+                        if not self._put(todo, result):
+                            break
+                        with self._lock:
+                            self.queued += 1
+                finally:
+                    for _ in range(workers):
+                        self._put(todo, None)
+            for future in futures:
+                future.result()
+
+            for result in self.report:
+                if result.status == "pending":
+                    result.status = "skipped"
+            completed = not self.cancelled and self.failed == 0
+            if self.verify and self.checksums:
+                try:
+                    self.manifest = write_manifest(self.output_folder_root, self.verify, self.checksums)
+                except OSError as e:
+                    self.manifest_error = str(e)
+                    completed = False
+        finally:
+            if self.dedup is not None:
+                self.dedup.save()
+            if self.journal is not None:
+                # Keep the journal of a run that didn't finish, to resume it
+                self.journal.close(completed=completed)
+            record_span(
+                "copy_run",
+                time.perf_counter() - start,
+                count=self.copied,
+                bytes=self.copied_bytes,
+                failed=self.failed,
+                workers=self.workers,
+                cancelled=self.cancelled
+            )
+            self._finished.set()
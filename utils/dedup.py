@@ -0,0 +1,205 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# A content addressed store for rollovers that copy the same templates every
+# year. Every file's content is kept once as a blob named after its hash, and
+# the rolled over files are hard links to those blobs.
+#
+#   <store>/blobs/ab/abcdef...   one file per distinct content
+#   <store>/index.json           path -> (size, mtime_ns, digest), so files
+#                                that didn't change aren't hashed again
+#   <store>/blobs.json           digest -> (size, mtime_ns) of the blob as it
+#                                was stored
+#
+# Hard links share the file itself: an edit made in place shows up in every
+# year that links to the same blob, the blob included. Excel saves by writing
+# a new file and renaming it over the old one, which breaks the link instead.
+# A blob that no longer matches what was stored is stored again before
+# anything new links to it.
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+import constants as c
+from utils import fastcopy
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        while True:
+            chunk: bytes = f.read(c.COPY_BUFFER_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_store(output_folder_root: str) -> str:
+    # Next to the output folder, so it's on the same drive as next year's
+    # output folder too and the hard links work
+    parent: str = os.path.dirname(os.path.abspath(output_folder_root))
+    return os.path.join(parent, c.DEDUP_STORE_NAME)
+
+
+class DedupStore:
+    def __init__(self, root: str) -> None:
+        self.root: str = root
+        self.blobs: str = os.path.join(root, "blobs")
+        self.index_path: str = os.path.join(root, "index.json")
+        self.blobs_path: str = os.path.join(root, "blobs.json")
+        self.index: Dict[str, List] = {}
+        self.blob_index: Dict[str, List] = {}
+        self.linked: int = 0
+        self.stored: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._blob_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(self.blobs, exist_ok=True)
+        self.load()
+
+    def _read(self, path: str) -> Dict[str, List]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, path: str, data: Dict[str, List]) -> None:
+        fd, temp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp, path)
+
+    def load(self) -> None:
+        self.index = self._read(self.index_path)
+        self.blob_index = self._read(self.blobs_path)
+
+    def save(self) -> None:
+        self._write(self.index_path, self.index)
+        self._write(self.blobs_path, self.blob_index)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs, digest[:2], digest)
+
+    def _key(self, path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def _cached_digest(self, path: str) -> Tuple[Optional[str], Optional[List]]:
+        stat = os.stat(path)
+        signature: List = [stat.st_size, stat.st_mtime_ns]
+        entry: Optional[List] = self.index.get(self._key(path))
+        if entry is not None and entry[:2] == signature:
+            return entry[2], signature
+        return None, signature
+
+    def digests(self, paths: Sequence[str]) -> Dict[str, str]:
+        # Hashes every file that changed since it was last indexed. Big batches
+        # go to a process pool so hashing scales over all the cores.
+        found: Dict[str, str] = {}
+        todo: List[Tuple[str, List]] = []
+        for path in paths:
+            try:
+                digest, signature = self._cached_digest(path)
+            except OSError:
+                continue  # The copy itself will report the missing file
+            if digest is not None:
+                found[path] = digest
+            else:
+                todo.append((path, signature))
+
+        todo_paths: List[str] = [path for path, _ in todo]
+        if len(todo) >= c.DEDUP_POOL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=c.DEDUP_HASH_PROCESSES) as pool:
+                hashed: List[str] = list(pool.map(hash_file, todo_paths, chunksize=16))
+        else:
+            hashed = [hash_file(path) for path in todo_paths]
+
+        with self._lock:
+            for (path, signature), digest in zip(todo, hashed):
+                self.index[self._key(path)] = signature + [digest]
+                found[path] = digest
+        return found
+
+    def digest(self, path: str) -> str:
+        digest, signature = self._cached_digest(path)
+        if digest is None:
+            digest = hash_file(path)
+            with self._lock:
+                self.index[self._key(path)] = signature + [digest]
+        return digest
+
+    def _ensure_blob(self, source: str, digest: str) -> str:
+        blob: str = self.blob_path(digest)
+        with self._lock:
+            lock: threading.Lock = self._blob_locks.setdefault(digest, threading.Lock())
+        with lock:
+            if self._blob_intact(blob, digest):
+                return blob
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            temp: str = f"{blob}.{threading.get_ident()}.tmp"
+            fastcopy.copy(source, temp)
+            os.replace(temp, blob)
+            stat = os.stat(blob)
+            with self._lock:
+                self.blob_index[digest] = [stat.st_size, stat.st_mtime_ns]
+                self.stored += 1
+            return blob
+
+    def _blob_intact(self, blob: str, digest: str) -> bool:
+        # An edit made in place through one of the links changes the blob too.
+        # A blob with no record (from an older store) is hashed once instead.
+        try:
+            stat = os.stat(blob)
+        except OSError:
+            return False
+        signature: List = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            recorded: Optional[List] = self.blob_index.get(digest)
+        if recorded is not None:
+            return recorded == signature
+        if hash_file(blob) != digest:
+            return False
+        with self._lock:
+            self.blob_index[digest] = signature
+        return True
+
+    def materialize(
+        self,
+        source: str,
+        destination: str,
+        digest: Optional[str] = None,
+        overwrite: bool = True
+    ) -> Tuple[str, int]:
+        # Puts the content of source at destination as a link to its blob.
+        # Falls back to a normal copy when the store is on another drive.
+        digest = digest or self.digest(source)
+        blob: str = self._ensure_blob(source, digest)
+        try:
+            if overwrite and os.path.lexists(destination):
+                os.unlink(destination)
+            os.link(blob, destination)
+        except OSError as e:
+            if e.errno not in fastcopy.UNSUPPORTED:
+                raise
+            return fastcopy.copy(source, destination, overwrite=overwrite)
+        with self._lock:
+            self.linked += 1
+        return "dedup", os.path.getsize(destination)
@@ -0,0 +1,183 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Picks the cheapest correct way to copy one file:
+#
+#   hardlink         only when asked for, and only on the same filesystem
+#   reflink          FICLONE, shares the blocks on CoW filesystems (Btrfs, XFS)
+#   copy_file_range  the kernel copies (or offloads to the server) for us
+#   sendfile         kernel to kernel copy, no user space buffers
+#   buffered         plain read/write, works everywhere
+#   hashed           buffered, hashing each chunk on its way through (verify)
+#
+# Each fast path falls through to the next one when the OS or filesystem
+# says it can't do it, before a single byte has been written.
+
+import os
+import sys
+import errno
+import shutil
+from typing import (
+    BinaryIO,
+    Callable,
+    Tuple
+)
+
+import constants as c
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+STRATEGIES: Tuple[str, ...] = ("auto", "hardlink", "buffered")
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+FICLONE: int = 0x40049409
+
+# The errors that mean "not supported here", rather than a real I/O problem
+UNSUPPORTED: frozenset = frozenset({
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EBADF,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EPERM,
+})
+
+
+class Unsupported(Exception):
+    pass
+
+
+def same_filesystem(source: str, destination: str) -> bool:
+    try:
+        return os.stat(source).st_dev == os.stat(os.path.dirname(destination) or ".").st_dev
+    except OSError:
+        return False
+
+
+def _reflink(source: BinaryIO, destination: BinaryIO, size: int) -> None:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise Unsupported()
+    try:
+        fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+    except OSError as e:
+        if e.errno in UNSUPPORTED:
+            raise Unsupported() from e
+        raise
+
+
+def _copy_file_range(source: BinaryIO, destination: BinaryIO, size: int) -> None:
+    if not hasattr(os, "copy_file_range"):
+        raise Unsupported()
+    _kernel_loop(os.copy_file_range, source, destination, size)
+
+
+def _sendfile(source: BinaryIO, destination: BinaryIO, size: int) -> None:
+    if not hasattr(os, "sendfile") or not sys.platform.startswith("linux"):
+        raise Unsupported()
+    _kernel_loop(
+        lambda src, dst, count: os.sendfile(dst, src, None, count),
+        source,
+        destination,
+        size
+    )
+
+
+def _kernel_loop(call, source: BinaryIO, destination: BinaryIO, size: int) -> None:
+    copied: int = 0
+    while True:
+        try:
+            sent: int = call(source.fileno(), destination.fileno(), c.COPY_BUFFER_SIZE)
+        except OSError as e:
+            # Only fall through if nothing was written yet
+            if copied == 0 and e.errno in UNSUPPORTED:
+                raise Unsupported() from e
+            raise
+        if sent == 0:
+            break
+        copied += sent
+    if copied == 0 and size > 0:
+        # Some filesystems (procfs, some FUSE mounts) report success but copy
+        # nothing, let the next strategy do it properly
+        raise Unsupported()
+
+
+def _buffered(source: BinaryIO, destination: BinaryIO, size: int) -> None:
+    shutil.copyfileobj(source, destination, c.COPY_BUFFER_SIZE)
+
+
+def _hashed(source: BinaryIO, destination: BinaryIO, hasher) -> None:
+    # One buffer, reused for every chunk: read into it, hash it, write it
+    buffer: bytearray = bytearray(c.COPY_BUFFER_SIZE)
+    view: memoryview = memoryview(buffer)
+    while True:
+        read: int = source.readinto(buffer)
+        if not read:
+            break
+        hasher.update(view[:read])
+        destination.write(view[:read])
+
+
+FAST_PATHS: Tuple[Tuple[str, Callable[[BinaryIO, BinaryIO, int], None]], ...] = (
+    ("reflink", _reflink),
+    ("copy_file_range", _copy_file_range),
+    ("sendfile", _sendfile),
+)
+
+
+def copy(
+    source: str,
+    destination: str,
+    strategy: str = "auto",
+    overwrite: bool = True,
+    hasher=None
+) -> Tuple[str, int]:
+    # Returns the strategy that did the copy and the number of bytes copied.
+    # With a hasher, the data has to pass through our buffers, so the kernel
+    # fast paths are skipped and a hard link is hashed after linking.
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown copy strategy {strategy!r}, expected one of {STRATEGIES}")
+
+    if strategy == "hardlink" and same_filesystem(source, destination):
+        try:
+            if overwrite and os.path.lexists(destination):
+                os.unlink(destination)
+            os.link(source, destination)
+            if hasher is not None:
+                with open(destination, "rb") as f:
+                    for chunk in iter(lambda: f.read(c.COPY_BUFFER_SIZE), b""):
+                        hasher.update(chunk)
+            return "hardlink", os.path.getsize(destination)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED:
+                raise
+
+    with open(source, "rb") as fsrc, open(destination, "wb" if overwrite else "xb") as fdst:
+        size: int = os.fstat(fsrc.fileno()).st_size
+        used: str = "buffered"
+        if hasher is not None:
+            _hashed(fsrc, fdst, hasher)
+            used = "hashed"
+        elif strategy != "buffered":
+            for name, fast_path in FAST_PATHS:
+                try:
+                    fast_path(fsrc, fdst, size)
+                    used = name
+                    break
+                except Unsupported:
+                    continue
+        if used == "buffered":
+            _buffered(fsrc, fdst, size)
+    shutil.copymode(source, destination)
+    return used, size
@@ -36,6 +36,11 @@ def get_current_year() -> int:
     return datetime.date.today().year
 
 
+def is_year(year: str) -> bool:
+    # Four plain digits, the only years the renamer finds and puts back
+    return len(year) == 4 and year.isascii() and year.isdigit()
+
+
 def get_year_range() -> list:
     return [get_current_year() - 5 + i for i in range(10)]
 
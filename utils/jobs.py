@@ -0,0 +1,385 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Batch jobs: a whole set of rollovers (one per department, say) from one
+# jobs file, run unattended. The file is JSON, either a list of jobs or:
+#
+#   {
+#     "defaults": {"year": "2025", "suffix": " (final)"},
+#     "jobs": [
+#       {"input": "Finance/2024", "output": "Finance/2025"},
+#       {"input": "HR/2024", "output": "HR/2025", "rules": ["remove-prefix DRAFT_"], "recursive": true}
+#     ]
+#   }
+#
+# Every job takes the keys in JOB_KEYS, and "defaults" fills in whatever a job
+# leaves out. Relative folders are relative to the jobs file, and no two jobs
+# may share (or nest) an output folder.
+#
+# BatchRun plans and copies c.BATCH_JOBS jobs at a time. Each job gets its
+# own CopyEngine (and journal, so a job can be resumed on its own), but all
+# the engines share one semaphore, so no more than c.BATCH_IO_LIMIT files
+# are copied at once over the whole batch. A job that is waiting on a slow
+# share leaves the slots to the jobs that aren't.
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import (
+    dataclass,
+    field
+)
+from typing import (
+    Iterable,
+    List,
+    Optional,
+    Tuple
+)
+
+import constants as c
+from gui.structures import Registry
+from utils.copier import CopyEngine
+from utils.general import (
+    get_current_year,
+    is_year
+)
+from utils.journal import Journal
+from utils.listing import (
+    invalidate,
+    is_selected,
+    list_files
+)
+from utils.rename import Rename
+from utils.rules import (
+    Rule,
+    RuleError,
+    parse_rules
+)
+from utils.spans import record_span
+
+# key -> the types it takes
+JOB_KEYS: dict = {
+    "input": (str,),
+    "output": (str,),
+    "year": (str, int),
+    "use_year": (bool,),
+    "suffix": (str, type(None)),
+    "rules": (list,),
+    "recursive": (bool,),
+    "include": (list,),
+    "exclude": (list,),
+}
+
+# Job states, in the order a job goes through them
+QUEUED: str = "queued"
+PLANNING: str = "planning"
+COPYING: str = "copying"
+DONE: str = "done"
+FAILED: str = "failed"
+CANCELLED: str = "cancelled"
+
+
+class JobError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Job:
+    input: str
+    output: str
+    year: str = ""
+    use_year: bool = True
+    suffix: Optional[str] = None
+    rules: Tuple[Rule, ...] = ()
+    recursive: bool = False
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+
+    def registry(self) -> Registry:
+        files: Tuple[str, ...] = list_files(self.input).files
+        return Registry(
+            input_folder_root=self.input,
+            output_folder_root=self.output,
+            selected_files={file: is_selected(file, self.include, self.exclude) for file in files},
+            use_year=self.use_year,
+            use_suffix=self.suffix is not None,
+            selected_year=self.year or str(get_current_year()),
+            selected_suffix=self.suffix or "",
+            rules=self.rules,
+            recursive=self.recursive
+        )
+
+
+def parse_job(data: dict, folder: str = "") -> Job:
+    if not isinstance(data, dict):
+        raise JobError(f"expected an object, got {data!r}")
+    for key, value in data.items():
+        if key not in JOB_KEYS:
+            raise JobError(f"unknown key {key!r}, expected one of {', '.join(JOB_KEYS)}")
+        if not isinstance(value, JOB_KEYS[key]):
+            raise JobError(f"{key!r} can't be {value!r}")
+    for key in ("input", "output"):
+        if not data.get(key):
+            raise JobError(f"{key!r} is required")
+    if "year" in data and not is_year(str(data["year"])):
+        raise JobError(f"'year' must be four digits, got {data['year']!r}")
+    if not data.get("use_year", True) and data.get("suffix") is None and not data.get("rules"):
+        raise JobError("nothing to do, give it a suffix or rules or leave the year replacement on")
+    try:
+        rules: Tuple[Rule, ...] = parse_rules(data.get("rules", []))
+    except RuleError as e:
+        raise JobError(str(e)) from e
+    return Job(
+        input=os.path.join(folder, data["input"]),
+        output=os.path.join(folder, data["output"]),
+        year=str(data.get("year", "")),
+        use_year=data.get("use_year", True),
+        suffix=data.get("suffix"),
+        rules=rules,
+        recursive=data.get("recursive", False),
+        include=tuple(data.get("include", ())),
+        exclude=tuple(data.get("exclude", ()))
+    )
+
+
+def read_jobs(path: str) -> List[Job]:
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise JobError(f"{path} isn't valid JSON: {e}") from e
+    defaults: dict = {}
+    if isinstance(data, dict):
+        defaults = data.get("defaults", {})
+        data = data.get("jobs")
+        if not isinstance(defaults, dict):
+            raise JobError("'defaults' must be an object")
+    if not isinstance(data, list) or not data:
+        raise JobError(f"{path} has no jobs")
+
+    folder: str = os.path.dirname(os.path.abspath(path))
+    jobs: List[Job] = []
+    for i, job in enumerate(data, 1):
+        try:
+            jobs.append(parse_job({**defaults, **job} if isinstance(job, dict) else job, folder))
+        except JobError as e:
+            raise JobError(f"job {i}: {e}") from e
+    check_outputs(jobs)
+    return jobs
+
+
+def _overlaps(folder: str, other: str) -> bool:
+    try:
+        return os.path.commonpath([folder, other]) in (folder, other)
+    except ValueError:
+        return False  # Different drives
+
+
+def check_outputs(jobs: List[Job]) -> None:
+    # Jobs run side by side, so two of them writing into the same folder (or
+    # one into the other's) would race for the same names
+    outputs: List[str] = [os.path.normcase(os.path.abspath(job.output)) for job in jobs]
+    for i, output in enumerate(outputs):
+        for j, other in enumerate(outputs[:i]):
+            if _overlaps(output, other):
+                raise JobError(f"job {i + 1}: output folder overlaps the one of job {j + 1}")
+
+
+@dataclass
+class JobStatus:
+    # Written by the job's thread, read by whoever shows the progress
+    job: Job
+    state: str = QUEUED
+    planned: int = 0
+    conflicts: int = 0
+    error: Optional[str] = None
+    seconds: float = 0.0
+    engine: Optional[CopyEngine] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> int:
+        return self.engine.copied + self.engine.failed if self.engine is not None else 0
+
+    @property
+    def total(self) -> int:
+        return self.engine.total if self.engine is not None else self.planned
+
+    @property
+    def copied(self) -> int:
+        return self.engine.copied if self.engine is not None else 0
+
+    @property
+    def failed(self) -> int:
+        return self.engine.failed if self.engine is not None else 0
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def report(self) -> dict:
+        return {
+            "input": self.job.input,
+            "output": self.job.output,
+            "state": self.state,
+            "planned": self.total,
+            "copied": self.copied,
+            "failed": self.failed,
+            "conflicts": self.conflicts,
+            "manifest": self.engine.manifest if self.engine is not None else None,
+            "error": self.error,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class BatchRun:
+    def __init__(
+        self,
+        jobs: Iterable[Job],
+        parallel_jobs: Optional[int] = None,
+        io_limit: Optional[int] = None,
+        workers: Optional[int] = None,
+        strategy: Optional[str] = None,
+        verify: Optional[str] = None,
+        journal: bool = True,
+        dry_run: bool = False
+    ) -> None:
+        self.statuses: List[JobStatus] = [JobStatus(job) for job in jobs]
+        self.parallel_jobs: int = max(1, parallel_jobs or c.BATCH_JOBS)
+        self.io_limit: int = max(1, io_limit or c.BATCH_IO_LIMIT)
+        # More workers than slots would only wait
+        self.workers: int = min(workers or c.COPY_WORKERS, self.io_limit)
+        self.strategy: Optional[str] = strategy
+        self.verify: Optional[str] = verify
+        self.journal: bool = journal
+        self.dry_run: bool = dry_run
+        self.slots: threading.BoundedSemaphore = threading.BoundedSemaphore(self.io_limit)
+        self._cancel: threading.Event = threading.Event()
+        self._finished: threading.Event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def failed(self) -> int:
+        return sum(status.state == FAILED for status in self.statuses)
+
+    def start(self) -> None:
+        threading.Thread(
+            target=self._run,
+            name="rollover_batch",
+            daemon=True
+        ).start()
+
+    def run(self) -> List[JobStatus]:
+        self._run()
+        return self.statuses
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        for status in self.statuses:
+            if status.engine is not None:
+                status.engine.cancel()
+
+    def report(self) -> List[dict]:
+        return [status.report() for status in self.statuses]
+
+    def _run(self) -> None:
+        start: float = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(
+                max_workers=min(self.parallel_jobs, len(self.statuses)) or 1,
+                thread_name_prefix="rollover_job"
+            ) as executor:
+                for future in [executor.submit(self._run_job, status) for status in self.statuses]:
+                    future.result()
+        finally:
+            record_span(
+                "batch_run",
+                time.perf_counter() - start,
+                count=len(self.statuses),
+                failed=self.failed,
+                jobs=self.parallel_jobs,
+                io_limit=self.io_limit,
+                cancelled=self.cancelled
+            )
+            self._finished.set()
+
+    def _new_engine(self, registry: Registry, pairs=None) -> CopyEngine:
+        journal: Optional[Journal] = None
+        if self.journal:
+            journal = Journal.create(
+                registry.input_folder_root,
+                registry.output_folder_root,
+                strategy=self.strategy,
+                verify=self.verify
+            )
+        return CopyEngine(
+            registry,
+            workers=self.workers,
+            pairs=pairs,
+            strategy=self.strategy,
+            journal=journal,
+            verify=self.verify,
+            slots=self.slots
+        )
+
+    def _run_job(self, status: JobStatus) -> None:
+        if self.cancelled:
+            status.state = CANCELLED
+            return
+        start: float = time.perf_counter()
+        job: Job = status.job
+        try:
+            status.state = PLANNING
+            registry: Registry = job.registry()
+            pairs = None
+            if job.recursive:
+                renamer = Rename(registry=registry, plan=False)
+                pairs = renamer.plan_tree(lambda path: is_selected(path, job.include, job.exclude))
+                if self.dry_run:
+                    status.planned = sum(1 for _ in pairs)
+            else:
+                renamer = Rename(registry=registry)
+                status.planned = sum(1 for _ in registry.files.planned())
+
+            # No engine (and so no journal) for a job cancelled while planning
+            if not self.dry_run and not self.cancelled:
+                try:
+                    os.makedirs(job.output, exist_ok=True)
+                except OSError as e:
+                    raise JobError(f"can't create the output folder {job.output}: {e.strerror or e}") from e
+                status.engine = self._new_engine(registry, pairs=pairs)
+                if self.cancelled:
+                    status.engine.cancel()  # cancel() may have missed it
+                status.state = COPYING
+                status.engine.run()
+                invalidate(job.output)
+            status.conflicts = len(renamer.conflicts)
+
+            engine: Optional[CopyEngine] = status.engine
+            if self.cancelled or (engine is not None and engine.cancelled):
+                status.state = CANCELLED
+            elif engine is not None and (engine.failed or engine.manifest_error):
+                status.state = FAILED
+                status.error = engine.manifest_error or f"{engine.failed} file(s) failed to copy"
+            else:
+                status.state = DONE
+        except (OSError, ValueError) as e:
+            status.state = FAILED
+            status.error = str(e)
+        finally:
+            status.seconds = time.perf_counter() - start
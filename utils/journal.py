@@ -0,0 +1,128 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# A write-ahead journal per copy run, one JSON record per line:
+#
+#   {"type": "run", "input": ..., "output": ..., "strategy": ..., ...}
+#   {"type": "plan", "from": ..., "to": ...}     before the file is queued
+#   {"type": "done", "from": ..., "to": ...}     after it was renamed into place
+#
+# Copies land under a temporary name and are renamed into place, so a
+# destination is either complete or missing. A run that finishes cleanly
+# deletes its journal. Any journal left behind belongs to a run that died or
+# was cancelled, and resuming it only copies the files without a "done".
+
+import os
+import json
+import time
+import glob
+import threading
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple
+)
+
+import constants as c
+
+
+class Journal:
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock: threading.Lock = threading.Lock()
+        torn: bool = _ends_mid_line(path)
+        self._file = open(path, "a", encoding="utf-8")
+        if torn:
+            # Finish the torn line a crash left, so the first new record isn't
+            # glued onto it (and lost with it)
+            self._file.write("\n")
+
+    @classmethod
+    def create(
+        cls,
+        input_folder_root: str,
+        output_folder_root: str,
+        strategy: Optional[str] = None,
+        dedup: Optional[str] = None,
+        verify: Optional[str] = None,
+        directory: Optional[str] = None
+    ) -> 'Journal':
+        directory = directory or c.JOURNAL_DIRECTORY
+        os.makedirs(directory, exist_ok=True)
+        name: str = f"rollover_{time.strftime('%Y_%m_%d_%H%M%S')}_{os.getpid()}_{threading.get_ident()}.jsonl"
+        journal = cls(os.path.join(directory, name))
+        journal._write({
+            "type": "run",
+            "input": os.path.abspath(input_folder_root),
+            "output": os.path.abspath(output_folder_root),
+            "strategy": strategy,
+            "dedup": dedup,
+            "verify": verify
+        })
+        return journal
+
+    def _write(self, *records: dict) -> None:
+        with self._lock:
+            self._file.writelines(json.dumps(record) + "\n" for record in records)
+            self._file.flush()
+
+    def planned(self, from_name: str, to_name: str) -> None:
+        self._write({"type": "plan", "from": from_name, "to": to_name})
+
+    def planned_many(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        self._write(*({"type": "plan", "from": from_name, "to": to_name} for from_name, to_name in pairs))
+
+    def done(self, from_name: str, to_name: str) -> None:
+        self._write({"type": "done", "from": from_name, "to": to_name})
+
+    def close(self, completed: bool) -> None:
+        with self._lock:
+            self._file.close()
+        if completed:
+            os.remove(self.path)
+
+
+def _ends_mid_line(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    except OSError:
+        return False
+
+
+def read_journal(path: str) -> Tuple[dict, Dict[str, str]]:
+    # The run's header and the (from, to) pairs that never finished. A torn
+    # last line from a crash is ignored.
+    header: dict = {}
+    pending: Dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record: dict = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("type") == "run":
+                header = record
+            elif record.get("type") == "plan":
+                pending[record["from"]] = record["to"]
+            elif record.get("type") == "done":
+                pending.pop(record["from"], None)
+    return header, pending
+
+
+def unfinished_journals(directory: Optional[str] = None) -> List[str]:
+    # Newest first
+    paths: List[str] = glob.glob(os.path.join(directory or c.JOURNAL_DIRECTORY, "rollover_*.jsonl"))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
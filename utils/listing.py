@@ -0,0 +1,315 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+
+import os
+import time
+import stat
+import queue
+import bisect
+import fnmatch
+import threading
+from dataclasses import (
+    dataclass,
+    field
+)
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+import constants as c
+from utils.spans import span
+
+
+@dataclass(frozen=True)
+class DirectorySnapshot:
+    path: str
+    mtime_ns: int
+    scanned_ns: int = 0
+    files: Tuple[str, ...] = ()
+    names: FrozenSet[str] = field(default_factory=frozenset)
+    # Every entry, folders included, for checking whether a name is taken
+    entries: FrozenSet[str] = field(default_factory=frozenset)
+
+
+RACY_NS: int = int(c.LISTING_RACY_SECONDS * 1e9)
+
+_snapshots: Dict[str, DirectorySnapshot] = {}
+_lock: threading.Lock = threading.Lock()
+
+
+def is_excel(name: str) -> bool:
+    return name.lower().endswith(".xlsx")
+
+
+def matches(name: str, patterns: Sequence[str]) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def is_selected(
+    path: str,
+    include: Sequence[str] = (),
+    exclude: Sequence[str] = ()
+) -> bool:
+    # Globs always see "/" separators, whatever the OS. Without include
+    # globs, only Excel files are selected, like in the app.
+    path = path.replace(os.sep, "/")
+    selected: bool = matches(path, include) if include else is_excel(path)
+    return selected and not matches(path, exclude)
+
+
+def sort_key(name: str) -> tuple:
+    return (0 if is_excel(name) else 1, name)
+
+
+def _cache_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def scan_files(path: str) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+    # DirEntry.is_file() answers from the directory listing itself, so we don't
+    # pay a stat per entry (except for symlinks and odd filesystems)
+    files: List[str] = []
+    entries: List[str] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            entries.append(entry.name)
+            if entry.is_file():
+                files.append(entry.name)
+    files.sort(key=sort_key)
+    return tuple(files), frozenset(entries)
+
+
+def _trusted(key: str, mtime_ns: int) -> Optional[DirectorySnapshot]:
+    with _lock:
+        snapshot = _snapshots.get(key)
+    # A folder that changed within the timestamp granularity of the scan could
+    # have changed again without its mtime moving, so only trust snapshots
+    # taken well after the last change
+    if (
+        snapshot is not None and
+        snapshot.mtime_ns == mtime_ns and
+        mtime_ns < snapshot.scanned_ns - RACY_NS
+    ):
+        return snapshot
+    return None
+
+
+def _store(
+    path: str,
+    mtime_ns: int,
+    scanned_ns: int,
+    files: Tuple[str, ...],
+    entries: FrozenSet[str]
+) -> DirectorySnapshot:
+    snapshot = DirectorySnapshot(
+        path=path,
+        mtime_ns=mtime_ns,
+        scanned_ns=scanned_ns,
+        files=files,
+        names=frozenset(files),
+        entries=entries
+    )
+    with _lock:
+        _snapshots[_cache_key(path)] = snapshot
+    return snapshot
+
+
+def list_files(path: str) -> DirectorySnapshot:
+    mtime_ns: int = os.stat(path).st_mtime_ns
+    snapshot: Optional[DirectorySnapshot] = _trusted(_cache_key(path), mtime_ns)
+    if snapshot is not None:
+        return snapshot
+
+    scanned_ns: int = time.time_ns()
+    with span("listing", path=path) as record:
+        files, entries = scan_files(path)
+        record["count"] = len(entries)
+    return _store(path, mtime_ns, scanned_ns, files, entries)
+
+
+class FolderScan:
+    # list_files on a background thread, for folders that can take a while
+    # (network shares over a VPN). The file names come out in batches, in the
+    # order the OS lists them, while the scan is still going. Once it's done,
+    # `snapshot` holds the same (sorted, cached) snapshot list_files returns.
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.snapshot: Optional[DirectorySnapshot] = None
+        self.error: Optional[OSError] = None
+        self.count: int = 0
+        self._batches: queue.Queue = queue.Queue()
+        self._cancel: threading.Event = threading.Event()
+        self._done: threading.Event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def start(self) -> 'FolderScan':
+        threading.Thread(target=self._run, name="rollover_scan", daemon=True).start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def poll(self) -> List[str]:
+        files: List[str] = []
+        while True:
+            try:
+                files += self._batches.get_nowait()
+            except queue.Empty:
+                return files
+
+    def _run(self) -> None:
+        try:
+            mtime_ns: int = os.stat(self.path).st_mtime_ns
+            snapshot: Optional[DirectorySnapshot] = _trusted(_cache_key(self.path), mtime_ns)
+            if snapshot is None:
+                snapshot = self._scan(mtime_ns)
+            elif not self.cancelled:
+                self._batches.put(list(snapshot.files))
+                self.count = len(snapshot.files)
+            self.snapshot = snapshot
+        except OSError as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def _scan(self, mtime_ns: int) -> Optional[DirectorySnapshot]:
+        scanned_ns: int = time.time_ns()
+        files: List[str] = []
+        entries: List[str] = []
+        batch: List[str] = []
+        with span("listing", path=self.path, background=True) as record:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if self.cancelled:
+                        record["cancelled"] = True
+                        return None
+                    entries.append(entry.name)
+                    if entry.is_file():
+                        files.append(entry.name)
+                        batch.append(entry.name)
+                        if len(batch) >= c.SCAN_BATCH_SIZE:
+                            self._batches.put(batch)
+                            self.count += len(batch)
+                            batch = []
+            if batch:
+                self._batches.put(batch)
+                self.count += len(batch)
+            record["count"] = len(entries)
+        files.sort(key=sort_key)
+        return _store(self.path, mtime_ns, scanned_ns, tuple(files), frozenset(entries))
+
+
+def walk_files(root: str) -> Iterator[str]:
+    # Streams the relative path of every file under root, depth first. All the
+    # files of a folder come out together, before its subfolders, and only the
+    # folders still to visit are kept in memory.
+    stack: List[str] = [""]
+    while stack:
+        folder: str = stack.pop()
+        subfolders: List[str] = []
+        try:
+            with os.scandir(os.path.join(root, folder)) as it:
+                for entry in it:
+                    path: str = os.path.join(folder, entry.name) if folder else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        subfolders.append(path)
+                    elif entry.is_file():
+                        yield path
+        except OSError:
+            continue  # A folder we can't read is a folder with nothing to copy
+        subfolders.sort(key=sort_key, reverse=True)
+        stack.extend(subfolders)
+
+
+def _entry_state(path: str) -> Tuple[bool, bool]:
+    # (exists, is a file), the same way scandir's DirEntry would answer
+    try:
+        mode: int = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return False, False
+    if stat.S_ISLNK(mode):
+        try:
+            mode = os.stat(path).st_mode
+        except OSError:
+            return True, False  # A broken link still takes the name
+    return True, stat.S_ISREG(mode)
+
+
+def cached(path: str) -> Optional[DirectorySnapshot]:
+    # Whatever was last seen, however old
+    with _lock:
+        return _snapshots.get(_cache_key(path))
+
+
+def apply_changes(path: str, names: Iterable[str]) -> Optional[DirectorySnapshot]:
+    # Patches the cached snapshot of path by looking at only the entries that
+    # changed, instead of scanning the whole folder again. Returns None when
+    # there is nothing cached to patch.
+    key: str = _cache_key(path)
+    with _lock:
+        old: Optional[DirectorySnapshot] = _snapshots.get(key)
+    if old is None:
+        return None
+
+    mtime_ns: int = os.stat(path).st_mtime_ns
+    scanned_ns: int = time.time_ns()
+    entries: set = set(old.entries)
+    added: List[str] = []
+    removed: set = set()
+    for name in names:
+        exists, is_file = _entry_state(os.path.join(path, name))
+        if exists:
+            entries.add(name)
+        else:
+            entries.discard(name)
+        if is_file and name not in old.names:
+            added.append(name)
+        elif not is_file and name in old.names:
+            removed.add(name)
+
+    files: List[str] = [file for file in old.files if file not in removed] if removed else list(old.files)
+    for name in added:
+        bisect.insort(files, name, key=sort_key)
+    snapshot = DirectorySnapshot(
+        path=old.path,
+        mtime_ns=mtime_ns,
+        scanned_ns=scanned_ns,
+        files=tuple(files),
+        names=frozenset(files),
+        entries=frozenset(entries)
+    )
+    with _lock:
+        # Unless a scan replaced it in the meantime, that one is newer
+        if _snapshots.get(key) is old:
+            _snapshots[key] = snapshot
+    return snapshot
+
+
+def invalidate(path: str) -> None:
+    with _lock:
+        _snapshots.pop(_cache_key(path), None)
@@ -0,0 +1,72 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# The GUI's log files, set up once per process by whoever needs them first
+# instead of by every module that gets imported.
+#
+#   gui_app     everything the app logs, from INFO up
+#   spans       one JSON record per timing span, see utils/spans.py
+#
+# Each file has exactly one sink. Records are written by loguru's own thread
+# (enqueue), so a slow disk or network drive doesn't hold up the UI, and the
+# files are only created when the first record is written. For anything that
+# grows with the folder, log a count and a sample instead (see sample).
+
+import itertools
+import threading
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional
+)
+
+from loguru import logger
+
+import constants as c
+from utils.general import log_args
+from utils.spans import is_span
+
+# log name -> extra logger.add options
+SINKS: Dict[str, dict] = {
+    "gui_app": {},
+    "spans": {"serialize": True, "filter": is_span},
+}
+
+_lock: threading.Lock = threading.Lock()
+_handlers: Dict[str, int] = {}  # log name -> loguru handler id
+
+
+def setup() -> None:
+    with _lock:
+        for name, options in SINKS.items():
+            if name not in _handlers:
+                _handlers[name] = logger.add(**log_args(name), delay=True, enqueue=True, **options)
+
+
+def close() -> None:
+    # Writes whatever is still queued and closes the files, a later setup
+    # opens them again
+    with _lock:
+        for handler in _handlers.values():
+            logger.remove(handler)
+        _handlers.clear()
+
+
+def sample(items: Iterable, total: Optional[int] = None, limit: int = c.LOG_SAMPLE_SIZE) -> str:
+    # "a, b, c and 997 more" from the first few items only. The caller knows
+    # how many there are (a generator has to say so with total).
+    if total is None:
+        total = len(items)
+    shown: List[str] = [str(item) for item in itertools.islice(items, limit)]
+    if not shown:
+        return "none"
+    rest: int = total - len(shown)
+    return ", ".join(shown) + (f" and {rest:,} more" if rest > 0 else "")
@@ -0,0 +1,120 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Runs a whole session under cProfile and tracemalloc, for diagnosing a slow
+# machine without patching the code on it:
+#
+#   python main.py --profile            (or ROLLOVER_PROFILE=1 Rollover.exe)
+#
+# Leaves two files in the log folder:
+#
+#   <name>_<time>.prof         open with snakeviz, or python -m pstats
+#   <name>_<time>_report.txt   the slowest functions and the top allocations
+#
+# Copies run on worker threads, which cProfile before Python 3.12 doesn't see
+# from the main thread, so each thread gets its own profiler and they are
+# merged at the end. The dedup store's hashing processes aren't profiled.
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import contextlib
+import tracemalloc
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple
+)
+
+from loguru import logger
+
+import constants as c
+
+# From 3.12 one profiler sees every thread, and only one can be active
+PER_THREAD: bool = sys.version_info < (3, 12)
+
+
+def _report(stats: pstats.Stats, snapshot: tracemalloc.Snapshot, peak: int) -> str:
+    out = io.StringIO()
+    out.write(f"Peak traced memory: {peak / 1024 / 1024:,.1f} MiB\n\n")
+    out.write(f"Top {c.PROFILE_TOP_ALLOCATIONS} allocations (by line)\n")
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    for statistic in snapshot.statistics("lineno")[:c.PROFILE_TOP_ALLOCATIONS]:
+        frame = statistic.traceback[0]
+        out.write(f"{statistic.size / 1024:12,.1f} KiB {statistic.count:10,} blocks  {frame.filename}:{frame.lineno}\n")
+
+    out.write(f"\nTop {c.PROFILE_TOP_FUNCTIONS} functions (by cumulative time)\n")
+    stats.stream = out
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(c.PROFILE_TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+@contextlib.contextmanager
+def profiled(name: str, directory: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    # Yields a dict that holds the paths of the two files once the block exits
+    written: Dict[str, str] = {}
+    directory = directory or c.LOG_DIRECTORY
+    thread_profilers: List[cProfile.Profile] = []
+
+    def profile_thread(*args) -> None:
+        # Called on the first event of every new thread, swaps itself for a
+        # profiler of that thread's own
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        thread_profilers.append(profiler)
+        profiler.enable()
+
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    if PER_THREAD:
+        threading.setprofile(profile_thread)
+    profiler.enable()
+    try:
+        yield written
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+        peak: int = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        stats = pstats.Stats(profiler)
+        for thread_profiler in thread_profilers:
+            try:
+                stats.add(thread_profiler)
+            except TypeError:
+                continue  # A thread that never got to run anything
+
+        written["prof"], written["report"] = write_profile(name, directory, stats, _report(stats, snapshot, peak))
+        logger.info(f"Profile written to {written['prof']} and {written['report']}")
+
+
+def write_profile(
+    name: str,
+    directory: str,
+    stats: pstats.Stats,
+    report: str
+) -> Tuple[str, str]:
+    os.makedirs(directory, exist_ok=True)
+    stem: str = os.path.join(directory, f"{name}_{time.strftime('%Y_%m_%d_%H%M%S')}")
+    stats.dump_stats(f"{stem}.prof")
+    with open(f"{stem}_report.txt", "w", encoding="utf-8") as f:
+        f.write(report)
+    return f"{stem}.prof", f"{stem}_report.txt"
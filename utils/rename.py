@@ -9,75 +9,360 @@
 # ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
 
 
-import shutil
 import os
-import re
-import pathlib
 import datetime
+import functools
 from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
     TYPE_CHECKING,
 )
+
+import constants as c
+from utils.copier import (
+    CopyEngine,
+    CopyResult
+)
+from utils.dedup import DedupStore
+from utils.journal import Journal
+from utils.listing import (
+    list_files,
+    walk_files
+)
+from utils.rules import (
+    Pipeline,
+    Rule,
+    add_suffix,
+    all_bare_names,
+    compile_rules,
+    find_years,
+    is_bare_name,
+    rename_year
+)
+from utils.spans import span
+from utils.table import (
+    FileRecord,
+    FileTable
+)
+
 if TYPE_CHECKING:
     from gui.structures import Registry
 
 
+def with_settings(
+    rules: Tuple[Rule, ...],
+    selected_suffix: str,
+    use_year: bool,
+    use_suffix: bool
+) -> Tuple[Rule, ...]:
+    # The year and the suffix settings run after the registry's own rules
+    if use_year:
+        rules += (Rule("year"),)
+    if use_suffix:
+        rules += (Rule("suffix", (selected_suffix,)),)
+    return rules
+
+
+@functools.lru_cache(maxsize=c.RENAME_CACHE_SIZE)
+def plan_name(
+    file: str,
+    pipeline: Optional[Pipeline]
+) -> Optional[str]:
+    # For pipelines without {n}, which only depend on the name. Pipelines are
+    # cached by their settings, so the same settings hit the same entries.
+    return pipeline(file) if pipeline is not None else None
+
+
+@functools.lru_cache(maxsize=c.RENAME_CACHE_SIZE)
+def plan_folder_name(
+    folder: str,
+    selected_year: str,
+    selected_suffix: str,
+    use_year: bool,
+    use_suffix: bool,
+    year_lower: str,
+    year_upper: str
+) -> str:
+    # Folders follow the file rules, except that a folder without a year is
+    # left alone instead of getting " (year)", and folders have no extension
+    # to keep the suffix in front of
+    proposed_name: str = folder
+    if use_year and find_years(folder, year_lower, year_upper)[1]:
+        proposed_name = rename_year(folder, selected_year, year_lower, year_upper)
+    if use_suffix:
+        proposed_name += selected_suffix
+    return proposed_name
+
+
 class Rename:
     year_tolerance: int = 20
 
-    def __init__(self, registry: 'Registry') -> None:
+    def __init__(
+        self,
+        registry: 'Registry',
+        plan: bool = True
+    ) -> None:
         self.registry: 'Registry' = registry
+        self.conflicts: Dict[str, str] = {}
+        self._taken: Optional[Set[str]] = None
+        self._numbers: Optional[Dict[str, int]] = None
         self.get_year_tolerance()
-        self.loop()
+        self.pipeline: Optional[Pipeline] = compile_rules(
+            with_settings(registry.rules, registry.selected_suffix, registry.use_year, registry.use_suffix),
+            registry.selected_year,
+            self._year_lower,
+            self._year_upper
+        )
+        if plan:
+            self.loop()
 
     def get_year_tolerance(self) -> None:
         current_year: int = datetime.date.today().year
         self.year_lower = current_year - self.year_tolerance
         self.year_upper = current_year + self.year_tolerance
+        self._year_lower: str = f"{self.year_lower:04d}"
+        self._year_upper: str = f"{self.year_upper:04d}"
+
+    def find_years(self, name: str) -> Tuple[int, List[Tuple[int, int]]]:
+        return find_years(name, self._year_lower, self._year_upper)
 
     def rename_year(self, name: str) -> str:
-        search: str = re.findall(r"\d{4}", name)
-        if len(search) == 1:
-            proposed_year = int(search[0])
-            if self.year_lower <= proposed_year <= self.year_upper:
-                return name.replace(str(proposed_year), self.registry.selected_year)
-        elif len(search) > 1:
-            search = [int(i) for i in search if self.year_lower <= int(i) <= self.year_upper]
-            for year in search:
-                name = name.replace(str(year), "")
-        return self.add_suffix(name, f" ({self.registry.selected_year})")
+        return rename_year(name, self.registry.selected_year, self._year_lower, self._year_upper)
 
     def add_suffix(
         self,
         path: str,
         suffix: str
     ) -> str:
-        path = pathlib.Path(path)
-        return path.stem + suffix + path.suffix
+        return add_suffix(path, suffix)
+
+    @property
+    def numbered(self) -> bool:
+        return self.pipeline is not None and self.pipeline.numbered
+
+    def number(self, file: str) -> int:
+        # A file's {n}: its place among the selected files, from 1
+        if self._numbers is None:
+            self._numbers = {name: n for n, name in enumerate(self.registry.files.names(lambda file: file.selected), 1)}
+        return self._numbers.get(file, 0)
+
+    def plan_name(self, file: str, n: Optional[int] = None) -> Optional[str]:
+        if self.numbered:
+            return self.pipeline(file, self.number(file) if n is None else n)
+        return plan_name(file, self.pipeline)
+
+    def plan_folder(self, folder: str) -> str:
+        if not folder:
+            return folder
+        return os.path.join(*[
+            plan_folder_name(
+                part,
+                self.registry.selected_year,
+                self.registry.selected_suffix,
+                self.registry.use_year,
+                self.registry.use_suffix,
+                self._year_lower,
+                self._year_upper
+            )
+            for part in folder.split(os.sep)
+        ])
+
+    def plan_tree(self, select: Callable[[str], bool]) -> Iterator[Tuple[str, str]]:
+        # Streams (from, to) relative paths for every selected file under the
+        # input folder, mirroring (and renaming) the folders on the way. Only
+        # the names claimed in the output folder being filled are kept.
+        output_root: str = self.registry.output_folder_root
+        input_root: str = self.registry.input_folder_root
+        settings: 'Registry' = self.registry.settings()
+        renamer: 'Rename' = Rename(settings, plan=False)
+        self.conflicts = {}
+
+        def planned_in(folder: str, n: int) -> Iterator[str]:
+            # What the walk proposed for the files of an input folder it already
+            # left, numbered the same way (walk_files lists a folder's files
+            # together, in scandir order)
+            with os.scandir(os.path.join(input_root, folder)) as it:
+                for entry in it:
+                    path: str = os.path.join(folder, entry.name) if folder else entry.name
+                    if not entry.is_file() or not select(path):
+                        continue
+                    proposed_name: Optional[str] = renamer.plan_name(entry.name, n)
+                    n += 1
+                    if proposed_name is not None:
+                        yield os.path.normcase(proposed_name)
+
+        def claimed(proposed_folder: str, earlier: List[Tuple[str, int]]) -> Set[str]:
+            try:
+                with os.scandir(os.path.join(output_root, proposed_folder)) as it:
+                    taken: Set[str] = {os.path.normcase(entry.name) for entry in it}
+            except OSError:
+                taken = set()
+            # Two input folders can map onto one output folder ("2023 Dept" and
+            # "2024 Dept" both become "2025 Dept"). The first one's copies may
+            # not have landed yet, so its names are planned again.
+            for folder, n in earlier:
+                try:
+                    taken.update(planned_in(folder, n))
+                except OSError:
+                    continue
+            return taken
+
+        def walk() -> Iterator[Tuple[str, str]]:
+            # output folder -> (input folder, its first n) for every input
+            # folder that mapped onto it, so memory grows with the folders and
+            # not with the files
+            sources: Dict[str, List[Tuple[str, int]]] = {}
+            current_folder: Optional[str] = None
+            proposed_folder: str = ""
+            taken: Set[str] = set()
+            n: int = 0
+            for path in walk_files(input_root):
+                if not select(path):
+                    continue
+                n += 1
+                folder, file = os.path.split(path)
+                if folder != current_folder:
+                    current_folder = folder
+                    proposed_folder = renamer.plan_folder(folder)
+                    earlier: List[Tuple[str, int]] = sources.setdefault(os.path.normcase(proposed_folder), [])
+                    taken = claimed(proposed_folder, earlier)
+                    earlier.append((folder, n))
+
+                proposed_name: Optional[str] = renamer.plan_name(file, n)
+                if proposed_name is None:
+                    continue
+                key: str = os.path.normcase(proposed_name)
+                if key in taken or not is_bare_name(proposed_name):
+                    self.conflicts[path] = os.path.join(proposed_folder, proposed_name)
+                    continue
+                taken.add(key)
+                yield path, os.path.join(proposed_folder, proposed_name)
+
+        return walk()
+
+    @property
+    def taken(self) -> Set[str]:
+        # Built once per plan from the (cached) output folder listing. Keys are
+        # normcased, so on Windows "Report.xlsx" and "report.xlsx" collide.
+        if self._taken is None:
+            try:
+                entries = list_files(self.registry.output_folder_root).entries
+            except (OSError, TypeError):
+                entries = frozenset()
+            self._taken = {os.path.normcase(name) for name in entries}
+        return self._taken
+
+    def update_taken(self, names: Iterable[str], entries: Optional[FrozenSet[str]]) -> None:
+        # The output folder changed under a live preview: patch the index with
+        # the names that changed instead of listing the folder again
+        if self._taken is None:
+            return
+        if entries is None:
+            self._taken = None
+            self.conflicts = {}
+            return
+        keys: Set[str] = set()
+        for name in names:
+            key: str = os.path.normcase(name)
+            keys.add(key)
+            if name in entries:
+                self._taken.add(key)
+            else:
+                self._taken.discard(key)
+        self.conflicts = {
+            file: proposed_name for file, proposed_name in self.conflicts.items()
+            if os.path.normcase(proposed_name) not in keys
+        }
+
+    def propose(
+        self,
+        file: str,
+        claim: bool = False
+    ) -> Optional[str]:
+        # The name itself comes from the memoized plan, only the conflict check
+        # against the output folder is done every time. With claim, the name is
+        # reserved so that later files in the same batch can't take it too.
+        return self.check(file, self.plan_name(file), claim=claim)
+
+    def check(
+        self,
+        file: str,
+        proposed_name: Optional[str],
+        claim: bool = False
+    ) -> Optional[str]:
+        if proposed_name is None:
+            return None
+        key: str = os.path.normcase(proposed_name)
+        if key in self.taken or not is_bare_name(proposed_name):
+            self.conflicts[file] = proposed_name
+            return None
+        if claim:
+            self.taken.add(key)
+        return proposed_name
 
     def loop(self) -> None:
-        self.registry.rename_mapping = {}
-        output_root_path = pathlib.Path(self.registry.output_folder_root)
-        for file in [k for k, v in self.registry.selected_files.items() if v]:
-            proposed_name: str = file
-            if (
-                not self.registry.use_year and
-                not self.registry.use_suffix
-            ):
-                continue
-            if self.registry.use_year:
-                proposed_name: str = self.rename_year(file)
-            if self.registry.use_suffix:
-                proposed_name: str = self.add_suffix(proposed_name, self.registry.selected_suffix)
-            proposed_path: pathlib.Path = output_root_path / proposed_name
-            if not proposed_path.exists():
-                self.registry.rename_mapping[file] = str(proposed_path.name)
+        # Fills in the proposed and conflict columns of the registry's table
+        files: FileTable = self.registry.files
+        files.clear_plan()
+        self.conflicts = {}
+        self._taken = None
+        with span("planning") as record:
+            selected: List[FileRecord] = list(files.selected())
+            count: int = len(selected)
+            pipeline: Optional[Pipeline] = self.pipeline
+            if pipeline is not None and count >= c.RENAME_BULK_THRESHOLD:
+                # Big folders go through the rules a column at a time,
+                # skipping the per-name cache
+                for file, proposed_name in zip(selected, pipeline.plan(file.name for file in selected)):
+                    file.proposed = proposed_name
+                record["bulk"] = True
+            elif self.numbered:
+                for n, file in enumerate(selected, 1):
+                    file.proposed = pipeline(file.name, n)
             else:
-                continue
+                for file in selected:
+                    file.proposed = plan_name(file.name, pipeline)
+            record["count"] = count
+        with span("conflicts") as record:
+            # check(claim=True) for every planned file, without a call per file
+            taken: Set[str] = self.taken
+            planned: List[FileRecord] = [file for file in selected if file.proposed is not None]
+            proposed_names: List[str] = [file.proposed for file in planned]
+            # A rule that emptied a name or put a folder in it gets flagged like
+            # a taken name instead of copied somewhere else. One scan of the
+            # column clears them all, the names are only checked one by one
+            # when it finds something.
+            suspect: bool = not all_bare_names(proposed_names)
+            for file, proposed_name, key in zip(planned, proposed_names, map(os.path.normcase, proposed_names)):
+                if key in taken or (suspect and not is_bare_name(proposed_name)):
+                    self.conflicts[file.name] = proposed_name
+                    file.conflict, file.proposed = proposed_name, None
+                else:
+                    taken.add(key)
+            record["count"] = count
+            record["conflicts"] = len(self.conflicts)
 
 
-def apply_rename_to_registry(registry: 'Registry') -> None:
-    for from_name, to_name in registry.rename_mapping.items():
-        shutil.copy(
-            os.path.join(registry.input_folder_root, from_name),
-            os.path.join(registry.output_folder_root, to_name)
-        )
+def apply_rename_to_registry(
+    registry: 'Registry',
+    workers: Optional[int] = None,
+    strategy: Optional[str] = None,
+    dedup: Optional[DedupStore] = None,
+    journal: Optional[Journal] = None,
+    verify: Optional[str] = None
+) -> List[CopyResult]:
+    return CopyEngine(
+        registry,
+        workers=workers,
+        strategy=strategy,
+        dedup=dedup,
+        journal=journal,
+        verify=verify
+    ).run()
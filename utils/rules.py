@@ -0,0 +1,475 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Rename rules, one per line and applied in order. The year and suffix
+# settings become the last two rules:
+#
+#   remove-prefix DRAFT_            drop a prefix from the start of the name
+#   replace '\s+' _                 regex substitution (re.sub) on the stem
+#   replace -i 'final' FINAL        ... ignoring case
+#   template {stem}_{year}_{n:03}   build the stem from tokens
+#   case lower                      lower, upper or title case on the stem
+#   year                            swap the year in the name for the selected one
+#   suffix ' (final)'               add text in front of the extension
+#
+# Template tokens: {stem} and {ext} of the name so far, {name} (the two
+# together), {year} (the selected year) and {n}, the file's number in the
+# order the files are planned in, from 1. Format specs work like format().
+#
+# Arguments are split like a shell would, so quote anything with spaces,
+# and single quote regexes. The extension is left alone by everything but
+# remove-prefix, so a rule can't turn an Excel file into something else.
+#
+# compile_rules turns the rules into one Pipeline: every regex compiled once,
+# and every file goes through all the steps in one call. Pipelines are cached,
+# so the preview and the copy share the same one. Pipeline.plan runs the same
+# steps over a whole column of names, one list pass per step, for big plans.
+# Folders only ever get the year and the suffix, see utils/rename.py.
+
+import os
+import re
+import shlex
+import pathlib
+import string
+import operator
+import functools
+import itertools
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+CASES: Tuple[str, ...] = ("lower", "upper", "title")
+TOKENS: Tuple[str, ...] = ("name", "stem", "ext", "year", "n")
+
+
+# Compiled once for the whole app instead of looking it up in re's cache per file
+YEAR_PATTERN: re.Pattern = re.compile(r"\d{4}")
+# The same tokens, kept by re.split
+YEAR_SPLIT: re.Pattern = re.compile(r"(\d{4})")
+
+
+class RuleError(ValueError):
+    pass
+
+
+def split_suffix(name: str) -> Tuple[str, str]:
+    # Same split as pathlib's stem and suffix, without building a Path
+    i: int = name.rfind(".")
+    if 0 < i < len(name) - 1:
+        return name[:i], name[i:]
+    return name, ""
+
+
+def add_suffix(
+    path: str,
+    suffix: str
+) -> str:
+    if os.sep in path or (os.altsep and os.altsep in path):
+        path = pathlib.Path(path).name
+    stem, extension = split_suffix(path)
+    return stem + suffix + extension
+
+
+def find_years(
+    name: str,
+    year_lower: str,
+    year_upper: str
+) -> Tuple[int, List[Tuple[int, int]]]:
+    # One pass over the name: the number of 4 digit tokens, and the spans of
+    # the ones that look like a year. Every token is exactly four digits, so
+    # comparing the strings is the same as comparing the numbers.
+    tokens: int = 0
+    spans: List[Tuple[int, int]] = []
+    for match in YEAR_PATTERN.finditer(name):
+        tokens += 1
+        if year_lower <= match.group() <= year_upper:
+            spans.append(match.span())
+    return tokens, spans
+
+
+def rename_year(
+    name: str,
+    selected_year: str,
+    year_lower: str,
+    year_upper: str
+) -> str:
+    tokens, spans = find_years(name, year_lower, year_upper)
+    if tokens == 1 and spans:
+        start, end = spans[0]
+        return name[:start] + selected_year + name[end:]
+    if tokens > 1 and spans:
+        pieces: List[str] = []
+        last: int = 0
+        for start, end in spans:
+            pieces.append(name[last:start])
+            last = end
+        pieces.append(name[last:])
+        name = "".join(pieces)
+    return add_suffix(name, f" ({selected_year})")
+
+
+@dataclass(frozen=True)
+class Rule:
+    kind: str
+    args: Tuple[str, ...] = ()
+    ignore_case: bool = False
+
+    def __str__(self) -> str:
+        return " ".join([self.kind] + (["-i"] if self.ignore_case else []) + [shlex.quote(arg) for arg in self.args])
+
+
+# kind -> how many arguments it takes
+KINDS: dict = {
+    "remove-prefix": 1,
+    "replace": 2,
+    "template": 1,
+    "case": 1,
+    "year": 0,
+    "suffix": 1,
+}
+
+
+def parse_rule(line: str) -> Rule:
+    try:
+        words: List[str] = shlex.split(line, comments=True)
+    except ValueError as e:
+        raise RuleError(f"{line!r}: {e}") from e
+    if not words:
+        raise RuleError("empty rule")
+    kind: str = words[0].lower()
+    if kind not in KINDS:
+        raise RuleError(f"{line!r}: unknown rule {words[0]!r}, expected one of {', '.join(KINDS)}")
+    ignore_case: bool = "-i" in words[1:2]
+    args: Tuple[str, ...] = tuple(words[2:] if ignore_case else words[1:])
+    if len(args) != KINDS[kind]:
+        raise RuleError(f"{line!r}: {kind} takes {KINDS[kind]} argument(s), got {len(args)}")
+    rule = Rule(kind=kind, args=args, ignore_case=ignore_case)
+    _compile_step(rule)  # Bad regexes and templates are found here, not per file
+    return rule
+
+
+def parse_rules(lines: Iterable[str]) -> Tuple[Rule, ...]:
+    # Blank lines and # comments are skipped
+    return tuple(parse_rule(line) for line in lines if line.split("#", 1)[0].strip())
+
+
+def template_fields(template: str) -> List[str]:
+    # Every field, with the ones nested in format specs. Raises ValueError for
+    # a template that format() can't read.
+    fields: List[str] = []
+    for _, field, spec, _ in string.Formatter().parse(template):
+        if field is not None:
+            fields.append(field)
+            fields += template_fields(spec)
+    return fields
+
+
+# The separators a rule result must not contain, see is_bare_name
+SEPARATORS: Tuple[str, ...] = tuple(sep for sep in (os.sep, os.altsep) if sep)
+
+
+NOT_NAMES: FrozenSet[str] = frozenset(("", ".", ".."))
+
+
+def is_bare_name(name: str) -> bool:
+    # A file name and nothing else: no folders, and nothing that climbs out of
+    # the output folder
+    return name not in NOT_NAMES and not any(sep in name for sep in SEPARATORS)
+
+
+def all_bare_names(names: List[str]) -> bool:
+    # is_bare_name for a whole column, from one scan of the names joined up
+    joined: str = "".join(names)
+    return NOT_NAMES.isdisjoint(names) and not any(sep in joined for sep in SEPARATORS)
+
+
+def check_separators(rule: Rule, text: str) -> None:
+    # Rule text that would turn every name into a path
+    if any(sep in text for sep in SEPARATORS):
+        raise RuleError(f"{rule}: a name can't contain {' or '.join(map(repr, SEPARATORS))}")
+
+
+Step = Callable[[str, int, str], str]  # (name, n, year) -> name
+StemStep = Callable[[str, str, int, str], str]  # (stem, extension, n, year) -> stem
+# The same, for a whole column of names at once (see Pipeline.plan)
+Batch = Callable[[List[str], Sequence[int], str], List[str]]
+StemBatch = Callable[[List[str], List[str], Sequence[int], str], List[str]]
+
+
+def split_column(names: Iterable[str]) -> Tuple[List[str], List[str]]:
+    # split_suffix for a column of names, without a call per name
+    stems: List[str] = []
+    extensions: List[str] = []
+    for name in names:
+        i: int = name.rfind(".")
+        if 0 < i < len(name) - 1:
+            stems.append(name[:i])
+            extensions.append(name[i:])
+        else:
+            stems.append(name)
+            extensions.append("")
+    return stems, extensions
+
+
+def _fuse(stem_steps: List[StemStep]) -> Step:
+    # A run of rules on the stem splits the name once between them
+    def step(name: str, n: int, year: str) -> str:
+        stem, extension = split_suffix(name)
+        for stem_step in stem_steps:
+            stem = stem_step(stem, extension, n, year)
+        return stem + extension
+    return step
+
+
+def _fuse_batches(stem_batches: List[StemBatch]) -> Batch:
+    def batch(names: List[str], ns: Sequence[int], year: str) -> List[str]:
+        stems, extensions = split_column(names)
+        for stem_batch in stem_batches:
+            stems = stem_batch(stems, extensions, ns, year)
+        return list(map(operator.add, stems, extensions))
+    return batch
+
+
+def _year_batch(year_lower: str, year_upper: str) -> Batch:
+    def batch(names: List[str], ns: Sequence[int], year: str) -> List[str]:
+        # rename_year for a column of names. One split per name, run from C
+        # by map, gives the text between the 4 digit tokens and the tokens
+        # themselves: [text, token, text, ..., text].
+        joined: str = "".join(names)
+        if any(sep in joined for sep in SEPARATORS):
+            return [rename_year(name, year, year_lower, year_upper) for name in names]
+        renamed: List[str] = []
+        bracketed: List[int] = []  # the names that get " (year)"
+        append: Callable[[str], None] = renamed.append
+        for pieces in map(YEAR_SPLIT.split, names):
+            if len(pieces) == 3 and year_lower <= pieces[1] <= year_upper:
+                append(pieces[0] + year + pieces[2])
+                continue
+            if len(pieces) > 3:
+                for i in range(1, len(pieces), 2):
+                    if year_lower <= pieces[i] <= year_upper:
+                        pieces[i] = ""
+            bracketed.append(len(renamed))
+            append("".join(pieces))
+
+        suffix: str = f" ({year})"
+        stems, extensions = split_column([renamed[i] for i in bracketed])
+        for i, stem, extension in zip(bracketed, stems, extensions):
+            renamed[i] = stem + suffix + extension
+        return renamed
+    return batch
+
+
+CONVERSIONS: dict = {"r": repr, "s": str, "a": ascii}
+
+
+def _template_batch(template: str) -> StemBatch:
+    # Builds the template a column at a time: one column per literal and per
+    # token, formatted with the token's spec, then joined row by row. Tokens
+    # with nested specs are filled in name by name.
+    parts: List[Tuple[str, Optional[str], str, Optional[str]]] = list(string.Formatter().parse(template))
+    fill: Callable = template.format
+    if any(field is not None and "{" in spec for _, field, spec, _ in parts):
+        return lambda stems, extensions, ns, year: [
+            fill(name=stem + extension, stem=stem, ext=extension, year=year, n=n)
+            for stem, extension, n in zip(stems, extensions, ns)
+        ]
+    if all(field is None for _, field, _, _ in parts):
+        constant: str = "".join(literal for literal, _, _, _ in parts)
+        return lambda stems, extensions, ns, year: [constant] * len(stems)
+
+    def batch(stems: List[str], extensions: List[str], ns: Sequence[int], year: str) -> List[str]:
+        columns: List[Iterable] = []
+        for literal, field, spec, conversion in parts:
+            if literal:
+                columns.append(itertools.repeat(literal))
+            if field is None:
+                continue
+            column: Iterable = {
+                "stem": stems,
+                "ext": extensions,
+                "name": map(operator.add, stems, extensions),
+                "year": itertools.repeat(year),
+                "n": ns,
+            }[field]
+            if conversion:
+                column = map(CONVERSIONS[conversion], column)
+            columns.append(map(format, column, itertools.repeat(spec)))
+        # The literal and {year} columns are endless
+        return list(map("".join, itertools.islice(zip(*columns), len(stems))))
+    return batch
+
+
+def _compile_step(
+    rule: Rule,
+    year_lower: str = "0000",
+    year_upper: str = "9999"
+) -> Tuple[bool, Callable, Callable]:
+    # (True, StemStep, StemBatch) for the rules that only touch the stem,
+    # else (False, Step, Batch)
+    if rule.kind == "remove-prefix":
+        prefix: str = rule.args[0]
+        length: int = len(prefix)
+        if rule.ignore_case:
+            folded: str = prefix.casefold()
+            return (
+                False,
+                lambda name, n, year: name[length:] if name[:length].casefold() == folded else name,
+                lambda names, ns, year: [name[length:] if name[:length].casefold() == folded else name for name in names]
+            )
+        return (
+            False,
+            lambda name, n, year: name[length:] if name.startswith(prefix) else name,
+            lambda names, ns, year: [name[length:] if name.startswith(prefix) else name for name in names]
+        )
+
+    if rule.kind == "replace":
+        try:
+            pattern: re.Pattern = re.compile(rule.args[0], re.IGNORECASE if rule.ignore_case else 0)
+            pattern.sub(rule.args[1], "")  # A bad group reference in the replacement
+        except re.error as e:
+            raise RuleError(f"replace {rule.args[0]!r}: {e}") from e
+        check_separators(rule, rule.args[1])
+        sub: Callable = functools.partial(pattern.sub, rule.args[1])
+        return (
+            True,
+            lambda stem, extension, n, year: sub(stem),
+            lambda stems, extensions, ns, year: list(map(sub, stems))
+        )
+
+    if rule.kind == "template":
+        template: str = rule.args[0]
+        try:
+            fields: List[str] = template_fields(template)
+        except ValueError as e:
+            raise RuleError(f"template {template!r}: {e}") from e
+        # Bare tokens only: an attribute or an index reaches into the str
+        # (or int) behind the token, "{stem.upper}" fills in a method
+        reaching: List[str] = [field for field in fields if "." in field or "[" in field]
+        if reaching:
+            raise RuleError(f"template {template!r}: {reaching} can't use attributes or indexes, only bare tokens")
+        unknown: List[str] = [field for field in fields if field not in TOKENS]
+        if unknown:
+            raise RuleError(f"template {template!r}: unknown token(s) {unknown}, expected {', '.join(TOKENS)}")
+        try:
+            template.format(name="a.b", stem="a", ext=".b", year="2025", n=1)
+        except ValueError as e:  # A spec that doesn't fit its token
+            raise RuleError(f"template {template!r}: {e}") from e
+        check_separators(rule, "".join(literal for literal, _, _, _ in string.Formatter().parse(template)))
+        fill: Callable = template.format
+        return (
+            True,
+            lambda stem, extension, n, year: fill(name=stem + extension, stem=stem, ext=extension, year=year, n=n),
+            _template_batch(template)
+        )
+
+    if rule.kind == "case":
+        case: str = rule.args[0].lower()
+        if case not in CASES:
+            raise RuleError(f"case {rule.args[0]!r}: expected one of {', '.join(CASES)}")
+        change: Callable[[str], str] = getattr(str, case)
+        return (
+            True,
+            lambda stem, extension, n, year: change(stem),
+            lambda stems, extensions, ns, year: list(map(change, stems))
+        )
+
+    if rule.kind == "year":
+        return (
+            False,
+            lambda name, n, year: rename_year(name, year, year_lower, year_upper),
+            _year_batch(year_lower, year_upper)
+        )
+
+    if rule.kind == "suffix":
+        suffix: str = rule.args[0]
+        check_separators(rule, suffix)
+        return (
+            True,
+            lambda stem, extension, n, year: stem + suffix,
+            lambda stems, extensions, ns, year: [stem + suffix for stem in stems]
+        )
+
+    raise RuleError(f"unknown rule {rule.kind!r}")
+
+
+class Pipeline:
+    # All the steps of a rename, applied to one name in one call, or to a
+    # whole column of names in one call per step (plan)
+    def __init__(
+        self,
+        steps: List[Step],
+        batches: List[Batch],
+        year: str,
+        numbered: bool
+    ) -> None:
+        self.steps: Tuple[Step, ...] = tuple(steps)
+        self.batches: Tuple[Batch, ...] = tuple(batches)
+        self.year: str = year
+        # {n} depends on where the file is in the plan, not just its name
+        self.numbered: bool = numbered
+
+    def __call__(self, name: str, n: int = 1) -> str:
+        year: str = self.year
+        for step in self.steps:
+            name = step(name, n, year)
+        return name
+
+    def plan(self, names: Iterable[str], start: int = 1) -> List[str]:
+        # The same names as calling the pipeline on each name in turn, with
+        # n counting up from start
+        column: List[str] = list(names)
+        ns: range = range(start, start + len(column))
+        for batch in self.batches:
+            column = batch(column, ns, self.year)
+        return column
+
+
+def is_numbered(rule: Rule) -> bool:
+    return rule.kind == "template" and "n" in template_fields(rule.args[0])
+
+
+@functools.lru_cache(maxsize=64)
+def compile_rules(
+    rules: Tuple[Rule, ...],
+    year: str = "",
+    year_lower: str = "0000",
+    year_upper: str = "9999"
+) -> Optional[Pipeline]:
+    # None when there is nothing to do
+    if not rules:
+        return None
+    steps: List[Step] = []
+    batches: List[Batch] = []
+    stem_steps: List[StemStep] = []
+    stem_batches: List[StemBatch] = []
+    for rule in rules:
+        on_stem, step, batch = _compile_step(rule, year_lower, year_upper)
+        if on_stem:
+            stem_steps.append(step)
+            stem_batches.append(batch)
+            continue
+        if stem_steps:
+            steps.append(_fuse(stem_steps))
+            batches.append(_fuse_batches(stem_batches))
+            stem_steps, stem_batches = [], []
+        steps.append(step)
+        batches.append(batch)
+    if stem_steps:
+        steps.append(_fuse(stem_steps))
+        batches.append(_fuse_batches(stem_batches))
+    return Pipeline(steps, batches, year, any(is_numbered(rule) for rule in rules))
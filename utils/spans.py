@@ -0,0 +1,95 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Timing spans around the stages that can get slow on big folders, so a log
+# from a customer's machine shows where the time went:
+#
+#   with span("listing", path=path) as record:
+#       files = scan(path)
+#       record["count"] = len(files)
+#
+# Every span is logged with its fields bound to the record (`extra`), which the
+# JSON spans log keeps, and is added to STATS for the GUI's stats panel.
+# "count" and "bytes" are summed per stage, any other field is only logged.
+
+import time
+import threading
+import contextlib
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    Iterator
+)
+
+from loguru import logger
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    count: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    last: float = 0.0
+    slowest: float = 0.0
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageStats] = {}
+        # Bumped on every change, so the GUI only redraws when needed
+        self.version: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, record: dict) -> None:
+        with self._lock:
+            stats: StageStats = self.stages.setdefault(stage, StageStats())
+            stats.calls += 1
+            stats.count += int(record.get("count", 0))
+            stats.bytes += int(record.get("bytes", 0))
+            stats.seconds += seconds
+            stats.last = seconds
+            stats.slowest = max(stats.slowest, seconds)
+            self.version += 1
+
+    def snapshot(self) -> Dict[str, StageStats]:
+        with self._lock:
+            return {stage: StageStats(**vars(stats)) for stage, stats in self.stages.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages = {}
+            self.version += 1
+
+
+STATS: Stats = Stats()
+
+
+def record_span(stage: str, seconds: float, **fields) -> None:
+    # For stages that already time themselves
+    STATS.add(stage, seconds, fields)
+    # Formatted by loguru, and only if some sink takes the record
+    logger.bind(span=stage, seconds=seconds, **fields).info(
+        "[span] {} took {:.2f}ms {}", stage, seconds * 1000, fields
+    )
+
+
+@contextlib.contextmanager
+def span(stage: str, **fields) -> Iterator[dict]:
+    start: float = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record_span(stage, time.perf_counter() - start, **fields)
+
+
+def is_span(record: dict) -> bool:
+    # A loguru filter, for a sink that only takes the span records
+    return "span" in record["extra"]
@@ -0,0 +1,267 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# The files of a rename and everything worked out about them, one record per
+# file instead of one dict per column:
+#
+#   name        relative to the input folder
+#   size        in bytes, -1 until stat reads it
+#   mtime_ns    0 until stat reads it
+#   selected    whether the file gets renamed
+#   proposed    the new name from the last plan, None if there's none
+#   conflict    the new name that was already taken, None if there's none
+#
+# The records are __slots__ objects that are changed in place, so selecting,
+# planning and filtering walk the table without building lists on the way.
+# Registry.selected_files and Registry.rename_mapping are dict views of the
+# selected and proposed columns, for the code that still thinks in dicts.
+# Selections only change through the table, which keeps count of them.
+
+import os
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set
+)
+
+
+class FileRecord:
+    __slots__ = ("name", "size", "mtime_ns", "selected", "proposed", "conflict")
+
+    def __init__(self, name: str, selected: bool = False) -> None:
+        self.name: str = name
+        self.size: int = -1
+        self.mtime_ns: int = 0
+        self.selected: bool = selected
+        self.proposed: Optional[str] = None
+        self.conflict: Optional[str] = None
+
+    def copy(self) -> 'FileRecord':
+        record = FileRecord(self.name, self.selected)
+        record.size = self.size
+        record.mtime_ns = self.mtime_ns
+        record.proposed = self.proposed
+        record.conflict = self.conflict
+        return record
+
+    def __repr__(self) -> str:
+        return (
+            f"FileRecord({self.name!r}, selected={self.selected}, size={self.size}, "
+            f"proposed={self.proposed!r}, conflict={self.conflict!r})"
+        )
+
+
+class FileTable:
+    def __init__(self, records: Iterable[FileRecord] = ()) -> None:
+        self._records: Dict[str, FileRecord] = {record.name: record for record in records}
+        self._selected: int = sum(record.selected for record in self._records.values())
+
+    @classmethod
+    def from_dicts(
+        cls,
+        selected_files: Optional[Mapping[str, Any]] = None,
+        rename_mapping: Optional[Mapping[str, str]] = None
+    ) -> 'FileTable':
+        # The old registry shape. A file with a planned name is selected.
+        table = cls()
+        for name, selected in (selected_files or {}).items():
+            table.select(name, bool(selected))
+        for name, proposed in (rename_mapping or {}).items():
+            table.propose(name, proposed)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def selected_count(self) -> int:
+        return self._selected
+
+    def __repr__(self) -> str:
+        return f"FileTable({len(self._records)} files)"
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._records
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        return iter(self._records.values())
+
+    def get(self, name: str) -> Optional[FileRecord]:
+        return self._records.get(name)
+
+    def add(self, name: str, selected: bool = False) -> FileRecord:
+        # A file that's already there keeps its selection
+        record: Optional[FileRecord] = self._records.get(name)
+        if record is None:
+            record = self._records[name] = FileRecord(name, selected)
+            self._selected += selected
+        return record
+
+    def extend(self, names: Iterable[str], select: Callable[[str], bool]) -> int:
+        # Adds the files that aren't there yet, selected by default if select
+        # says so. Returns how many were new.
+        added: int = 0
+        for name in names:
+            if name not in self._records:
+                record: FileRecord = FileRecord(name, select(name))
+                self._records[name] = record
+                self._selected += record.selected
+                added += 1
+        return added
+
+    def remove(self, name: str) -> None:
+        record: Optional[FileRecord] = self._records.pop(name, None)
+        if record is not None:
+            self._selected -= record.selected
+
+    def clear(self) -> None:
+        self._records = {}
+        self._selected = 0
+
+    def select(self, name: str, selected: bool) -> None:
+        record: FileRecord = self.add(name)
+        self._selected += selected - record.selected
+        record.selected = selected
+
+    def is_selected(self, name: str) -> bool:
+        record: Optional[FileRecord] = self._records.get(name)
+        return record is not None and record.selected
+
+    def propose(self, name: str, proposed: Optional[str]) -> None:
+        record: FileRecord = self.add(name, selected=True)
+        record.proposed = proposed
+        record.conflict = None
+
+    def clear_plan(self) -> None:
+        for record in self._records.values():
+            record.proposed = None
+            record.conflict = None
+
+    def selected(self) -> Iterator[FileRecord]:
+        return (record for record in self._records.values() if record.selected)
+
+    def planned(self) -> Iterator[FileRecord]:
+        return (record for record in self._records.values() if record.proposed is not None)
+
+    def conflicts(self) -> Iterator[FileRecord]:
+        return (record for record in self._records.values() if record.conflict is not None)
+
+    def names(self, where: Optional[Callable[[FileRecord], bool]] = None) -> Iterator[str]:
+        if where is None:
+            return iter(self._records)
+        return (record.name for record in self._records.values() if where(record))
+
+    def sort(self, key: Callable[[FileRecord], Any], reverse: bool = False) -> None:
+        self._records = {
+            record.name: record
+            for record in sorted(self._records.values(), key=key, reverse=reverse)
+        }
+
+    def copy(self, where: Optional[Callable[[FileRecord], bool]] = None) -> 'FileTable':
+        # Records are copied too, so the copy can't see later changes
+        return FileTable(
+            record.copy() for record in self._records.values()
+            if where is None or where(record)
+        )
+
+    def stat(self, folder: str) -> None:
+        # Reads size and mtime_ns with one pass over the folder, which on
+        # Windows comes with the listing for free. Names in subfolders, and
+        # anything the pass didn't find, are looked up one by one.
+        found: Set[str] = set()
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    record: Optional[FileRecord] = self._records.get(entry.name)
+                    if record is None:
+                        continue
+                    try:
+                        stat_result: os.stat_result = entry.stat()
+                    except OSError:
+                        continue
+                    record.size, record.mtime_ns = stat_result.st_size, stat_result.st_mtime_ns
+                    found.add(entry.name)
+        except OSError:
+            pass
+        for record in self._records.values():
+            if record.name in found:
+                continue
+            try:
+                stat_result = os.stat(os.path.join(folder, record.name))
+            except OSError:
+                # Whoever opens it next reports the problem
+                record.size, record.mtime_ns = -1, 0
+                continue
+            record.size, record.mtime_ns = stat_result.st_size, stat_result.st_mtime_ns
+
+
+class SelectionView(MutableMapping[str, bool]):
+    # {name: selected} for every file in the table
+    def __init__(self, table: FileTable) -> None:
+        self.table: FileTable = table
+
+    def __getitem__(self, name: str) -> bool:
+        record: Optional[FileRecord] = self.table.get(name)
+        if record is None:
+            raise KeyError(name)
+        return record.selected
+
+    def __setitem__(self, name: str, selected: bool) -> None:
+        self.table.select(name, bool(selected))
+
+    def __delitem__(self, name: str) -> None:
+        if name not in self.table:
+            raise KeyError(name)
+        self.table.remove(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.table.names()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class PlanView(MutableMapping[str, str]):
+    # {name: proposed} for every file that has a planned name
+    def __init__(self, table: FileTable) -> None:
+        self.table: FileTable = table
+
+    def __getitem__(self, name: str) -> str:
+        record: Optional[FileRecord] = self.table.get(name)
+        if record is None or record.proposed is None:
+            raise KeyError(name)
+        return record.proposed
+
+    def __setitem__(self, name: str, proposed: str) -> None:
+        self.table.propose(name, proposed)
+
+    def __delitem__(self, name: str) -> None:
+        record: Optional[FileRecord] = self.table.get(name)
+        if record is None or record.proposed is None:
+            raise KeyError(name)
+        record.proposed = None
+
+    def __iter__(self) -> Iterator[str]:
+        return (record.name for record in self.table.planned())
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.table.planned())
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
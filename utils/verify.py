@@ -0,0 +1,89 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Checksums for verified copies. The manifest uses the same format as b2sum
+# and xxh128sum, so the output folder can be checked without this app:
+#
+#   cd "2025 (output)" && b2sum -l 256 -c CHECKSUMS.b2
+
+import os
+import hashlib
+from typing import (
+    Dict,
+    Tuple
+)
+
+import constants as c
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Algorithm -> manifest file name
+MANIFESTS: Dict[str, str] = {
+    "blake2b": "CHECKSUMS.b2",
+    "xxh128": "CHECKSUMS.xxh128",
+}
+ALGORITHMS: Tuple[str, ...] = tuple(MANIFESTS) if xxhash is not None else ("blake2b",)
+
+
+def new_hasher(algorithm: str):
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown checksum {algorithm!r}, expected one of {ALGORITHMS}")
+    if algorithm == "xxh128":
+        return xxhash.xxh3_128()
+    # The same digest as dedup.hash_file, so the two can share their work
+    return hashlib.blake2b(digest_size=32)
+
+
+def checksum_file(path: str, algorithm: str) -> str:
+    hasher = new_hasher(algorithm)
+    with open(path, "rb") as f:
+        while True:
+            chunk: bytes = f.read(c.COPY_BUFFER_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def manifest_path(output_folder_root: str, algorithm: str) -> str:
+    return os.path.join(output_folder_root, MANIFESTS[algorithm])
+
+
+def read_manifest(path: str) -> Dict[str, str]:
+    checksums: Dict[str, str] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                digest, _, name = line.rstrip("\n").partition("  ")
+                if name:
+                    checksums[name] = digest
+    except FileNotFoundError:
+        pass
+    return checksums
+
+
+def write_manifest(
+    output_folder_root: str,
+    algorithm: str,
+    checksums: Dict[str, str]
+) -> str:
+    # Merged into the manifest of an earlier (or resumed) run of the same folder
+    path: str = manifest_path(output_folder_root, algorithm)
+    merged: Dict[str, str] = read_manifest(path)
+    merged.update((name.replace(os.sep, "/"), digest) for name, digest in checksums.items())
+    temp: str = path + c.COPY_PARTIAL_SUFFIX
+    with open(temp, "w", encoding="utf-8", newline="\n") as f:
+        for name in sorted(merged):
+            f.write(f"{merged[name]}  {name}\n")
+    os.replace(temp, path)
+    return path
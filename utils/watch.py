@@ -0,0 +1,282 @@
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+#      /\_/\
+#     ( o.o )
+#      > ^ <
+#
+# Author: Johan Hanekom
+# Date: February 2025
+#
+# ~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~^~
+
+# Watches the input and output folders so the GUI hears about files that
+# appear or disappear, without waiting for something else to refresh.
+#
+#   inotify   Linux. Only the entries named in the events are looked at again,
+#             and the cached listing is patched in place.
+#   polling   everywhere else. Stats each folder every WATCH_POLL_SECONDS and
+#             rescans the ones whose mtime moved.
+#
+# Either way, the changes of WATCH_BATCH_SECONDS are handed over together, as
+# one FolderChanges per folder. inotify doesn't see changes made by other
+# machines on a network share, only the ones made through this one.
+
+import os
+import sys
+import abc
+import queue
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import time
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set
+)
+
+import constants as c
+from utils import listing
+
+
+@dataclass(frozen=True)
+class FolderChanges:
+    folder: str
+    names: FrozenSet[str]
+    # The patched listing, or None if the folder has to be scanned again
+    snapshot: Optional[listing.DirectorySnapshot] = None
+
+
+def _key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+class Watcher(abc.ABC):
+    # The thread and the hand over to the GUI, the subclasses only find out
+    # what changed
+    def __init__(self) -> None:
+        self.folders: Dict[str, str] = {}  # key -> the path as it was given
+        self._changes: queue.Queue = queue.Queue()
+        self._lock: threading.Lock = threading.Lock()
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._run,
+            name="rollover_watch",
+            daemon=True
+        )
+        self._thread.start()
+
+    def set_folders(self, folders: Iterable[str]) -> None:
+        wanted: Dict[str, str] = {_key(folder): folder for folder in folders if folder}
+        with self._lock:
+            for key in set(self.folders) - set(wanted):
+                self._remove(key)
+                del self.folders[key]
+            for key, folder in wanted.items():
+                if key not in self.folders:
+                    try:
+                        self._add(key, folder)
+                    except OSError:
+                        continue  # A folder we can't watch is just never live
+                    self.folders[key] = folder
+
+    def poll(self) -> List[FolderChanges]:
+        changes: List[FolderChanges] = []
+        while True:
+            try:
+                changes.append(self._changes.get_nowait())
+            except queue.Empty:
+                return changes
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _publish(self, key: str, names: Set[str], rescan: bool = False) -> None:
+        with self._lock:
+            folder: Optional[str] = self.folders.get(key)
+        if folder is None:
+            return  # Stopped watching it in the meantime
+        snapshot: Optional[listing.DirectorySnapshot] = None
+        if not rescan:
+            try:
+                snapshot = listing.apply_changes(folder, names)
+            except OSError:
+                snapshot = None
+        if snapshot is None:
+            listing.invalidate(folder)
+        self._changes.put(FolderChanges(folder=folder, names=frozenset(names), snapshot=snapshot))
+
+    # _add and _remove are called with self._lock held
+    @abc.abstractmethod
+    def _add(self, key: str, folder: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _remove(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def _run(self) -> None:
+        ...
+
+
+class PollingWatcher(Watcher):
+    def __init__(self) -> None:
+        self._mtimes: Dict[str, Optional[int]] = {}  # key -> mtime_ns, under self._lock
+        super().__init__()
+
+    def _add(self, key: str, folder: str) -> None:
+        self._mtimes[key] = os.stat(folder).st_mtime_ns
+
+    def _remove(self, key: str) -> None:
+        self._mtimes.pop(key, None)
+
+    def _run(self) -> None:
+        while not self._stop.wait(c.WATCH_POLL_SECONDS):
+            with self._lock:
+                folders: Dict[str, str] = dict(self.folders)
+            for key, folder in folders.items():
+                try:
+                    mtime_ns: Optional[int] = os.stat(folder).st_mtime_ns
+                except OSError:
+                    mtime_ns = None
+                with self._lock:
+                    # Dropped in the meantime, or nothing moved
+                    if key not in self._mtimes or mtime_ns == self._mtimes[key]:
+                        continue
+                    self._mtimes[key] = mtime_ns
+                # No way around a rescan here, diff it against the old listing
+                before: Optional[listing.DirectorySnapshot] = listing.cached(folder)
+                listing.invalidate(folder)
+                try:
+                    after: listing.DirectorySnapshot = listing.list_files(folder)
+                except OSError:
+                    self._publish(key, set(), rescan=True)
+                    continue
+                if before is None:
+                    self._changes.put(FolderChanges(folder=folder, names=frozenset(), snapshot=after))
+                elif before.entries != after.entries:
+                    self._changes.put(FolderChanges(
+                        folder=folder,
+                        names=before.entries ^ after.entries,
+                        snapshot=after
+                    ))
+
+
+class InotifyWatcher(Watcher):
+    # From sys/inotify.h
+    IN_ATTRIB: int = 0x00000004
+    IN_MOVED_FROM: int = 0x00000040
+    IN_MOVED_TO: int = 0x00000080
+    IN_CREATE: int = 0x00000100
+    IN_DELETE: int = 0x00000200
+    IN_DELETE_SELF: int = 0x00000400
+    IN_MOVE_SELF: int = 0x00000800
+    IN_Q_OVERFLOW: int = 0x00004000
+    IN_IGNORED: int = 0x00008000
+    IN_ONLYDIR: int = 0x01000000
+    IN_NONBLOCK: int = 0o4000
+    IN_CLOEXEC: int = 0o2000000
+
+    # Renames, creates and deletes change the listing. IN_ATTRIB covers a
+    # link whose target changed, writes to a file don't matter.
+    MASK: int = (
+        IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ATTRIB |
+        IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    )
+    RESCAN: int = IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF
+
+    HEADER: struct.Struct = struct.Struct("iIII")
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self._fd: int = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            error: int = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._watches: Dict[int, str] = {}  # watch descriptor -> key
+        super().__init__()
+
+    def _add(self, key: str, folder: str) -> None:
+        wd: int = self._add_watch(self._fd, os.fsencode(folder), self.MASK)
+        if wd < 0:
+            error: int = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), folder)
+        self._watches[wd] = key
+
+    def _remove(self, key: str) -> None:
+        for wd, watched in list(self._watches.items()):
+            if watched == key:
+                del self._watches[wd]
+                self._rm_watch(self._fd, wd)
+
+    def _read(self) -> Dict[str, Optional[Set[str]]]:
+        # key -> the names that changed, None for "rescan it"
+        changed: Dict[str, Optional[Set[str]]] = {}
+        try:
+            data: bytes = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return changed
+            raise
+        offset: int = 0
+        while offset + self.HEADER.size <= len(data):
+            wd, mask, _, length = self.HEADER.unpack_from(data, offset)
+            offset += self.HEADER.size
+            name: str = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped, every folder has to be looked at again
+                with self._lock:
+                    return {key: None for key in self.folders}
+            with self._lock:
+                key: Optional[str] = self._watches.get(wd)
+            if key is None:
+                continue
+            if mask & self.RESCAN:
+                changed[key] = None
+            elif name and changed.get(key, set()) is not None:
+                changed.setdefault(key, set()).add(name)
+        return changed
+
+    def _run(self) -> None:
+        pending: Dict[str, Optional[Set[str]]] = {}
+        due: float = 0.0
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([self._fd], [], [], c.WATCH_BATCH_SECONDS)
+                if ready:
+                    for key, names in self._read().items():
+                        if names is None or pending.get(key, set()) is None:
+                            pending[key] = None
+                        else:
+                            pending.setdefault(key, set()).update(names)
+                    if not due:
+                        due = time.monotonic() + c.WATCH_BATCH_SECONDS
+                if pending and time.monotonic() >= due:
+                    for key, names in pending.items():
+                        self._publish(key, names or set(), rescan=names is None)
+                    pending = {}
+                    due = 0.0
+        finally:
+            os.close(self._fd)
+
+
+def new_watcher() -> Watcher:
+    if c.WATCH_BACKEND != "polling" and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError, TypeError):
+            pass  # No inotify in this libc (or no libc at all)
+    return PollingWatcher()